@@ -1,21 +1,22 @@
-from fastapi import APIRouter, HTTPException, Query, Header, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from ..models.alert import AlertSetting, AlertSettingCreate, AlertSettingUpdate, NotificationHistory
 from ..services.alert_service import AlertService
 from ..services.monitoring_service import get_monitoring_service
 from ..services.notification import NotificationService
+from ..utils.streaming import STREAM_MEDIA_TYPES, csv_stream, ndjson_stream
 from .auth import get_current_user_id
+from .dependencies import provide_alert_service, provide_notification_service
 
 router = APIRouter(tags=["alerts"])
-alert_service = AlertService()
-notification_service = NotificationService()
 
 @router.get("/", response_model=List[AlertSetting])
-async def get_user_alerts(user_id: str = Header(alias="X-User-ID")):
+async def get_user_alerts(
+    user_id: str = Depends(get_current_user_id),
+    alert_service: AlertService = Depends(provide_alert_service)
+):
     """사용자의 모든 알림 설정 조회"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
         alerts = await alert_service.get_user_alerts(user_id)
         return alerts
@@ -25,12 +26,10 @@ async def get_user_alerts(user_id: str = Header(alias="X-User-ID")):
 @router.post("/", response_model=AlertSetting)
 async def create_alert(
     alert_data: AlertSettingCreate,
-    user_id: str = Header(alias="X-User-ID")
+    user_id: str = Depends(get_current_user_id),
+    alert_service: AlertService = Depends(provide_alert_service)
 ):
     """새 알림 설정 생성"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
         alert = await alert_service.create_alert_setting(user_id, alert_data)
         return alert
@@ -40,15 +39,13 @@ async def create_alert(
 @router.get("/{alert_id}", response_model=AlertSetting)
 async def get_alert(
     alert_id: str,
-    user_id: str = Header(alias="X-User-ID")
+    user_id: str = Depends(get_current_user_id),
+    alert_service: AlertService = Depends(provide_alert_service)
 ):
     """특정 알림 설정 조회"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
-        alert = await alert_service.get_alert_by_id(alert_id)
-        if not alert or alert.user_id != user_id:
+        alert = await alert_service.get_user_alert(user_id, alert_id)
+        if not alert:
             raise HTTPException(status_code=404, detail="알림을 찾을 수 없습니다")
         return alert
     except HTTPException:
@@ -60,21 +57,15 @@ async def get_alert(
 async def update_alert(
     alert_id: str,
     alert_update: AlertSettingUpdate,
-    user_id: str = Header(alias="X-User-ID")
+    user_id: str = Depends(get_current_user_id),
+    alert_service: AlertService = Depends(provide_alert_service)
 ):
     """알림 설정 수정"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
-        # 권한 확인
-        existing_alert = await alert_service.get_alert_by_id(alert_id)
-        if not existing_alert or existing_alert.user_id != user_id:
-            raise HTTPException(status_code=404, detail="알림을 찾을 수 없습니다")
-        
-        updated_alert = await alert_service.update_alert_setting(alert_id, alert_update)
+        # 소유자 확인은 UPDATE 조건에 포함
+        updated_alert = await alert_service.update_alert_setting(alert_id, alert_update, user_id)
         if not updated_alert:
-            raise HTTPException(status_code=404, detail="알림 수정에 실패했습니다")
+            raise HTTPException(status_code=404, detail="알림을 찾을 수 없습니다")
         
         return updated_alert
     except HTTPException:
@@ -85,21 +76,15 @@ async def update_alert(
 @router.delete("/{alert_id}")
 async def delete_alert(
     alert_id: str,
-    user_id: str = Header(alias="X-User-ID")
+    user_id: str = Depends(get_current_user_id),
+    alert_service: AlertService = Depends(provide_alert_service)
 ):
     """알림 설정 삭제"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
-        # 권한 확인
-        existing_alert = await alert_service.get_alert_by_id(alert_id)
-        if not existing_alert or existing_alert.user_id != user_id:
-            raise HTTPException(status_code=404, detail="알림을 찾을 수 없습니다")
-        
-        success = await alert_service.delete_alert_setting(alert_id)
+        # 소유자 확인은 DELETE 조건에 포함
+        success = await alert_service.delete_alert_setting(alert_id, user_id)
         if not success:
-            raise HTTPException(status_code=404, detail="알림 삭제에 실패했습니다")
+            raise HTTPException(status_code=404, detail="알림을 찾을 수 없습니다")
         
         return {"message": "알림이 성공적으로 삭제되었습니다"}
     except HTTPException:
@@ -109,25 +94,45 @@ async def delete_alert(
 
 @router.get("/history/notifications", response_model=List[NotificationHistory])
 async def get_notification_history(
-    user_id: str = Header(alias="X-User-ID"),
-    limit: int = Query(50, ge=1, le=100)
+    response: Response,
+    user_id: str = Depends(get_current_user_id),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    alert_service: AlertService = Depends(provide_alert_service)
 ):
-    """사용자의 알림 발송 이력 조회"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
+    """사용자의 알림 발송 이력 조회 (다음 페이지 커서는 X-Next-Cursor 헤더로 전달)"""
     try:
-        history = await alert_service.get_user_notification_history(user_id, limit)
+        history, next_cursor = await alert_service.get_notification_page(user_id, limit, cursor)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return history
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"알림 이력 조회 실패: {str(e)}")
 
+@router.get("/history/notifications/export")
+async def export_notification_history(
+    user_id: str = Depends(get_current_user_id),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson 또는 csv"),
+    alert_service: AlertService = Depends(provide_alert_service)
+):
+    """사용자의 전체 알림 발송 이력을 스트리밍으로 내보내기"""
+    rows = alert_service.iter_notification_history(user_id)
+    if format == "csv":
+        body = csv_stream(rows, ["id", "alert_setting_id", "triggered_rate", "notification_type", "sent_at"])
+    else:
+        body = ndjson_stream(rows)
+    return StreamingResponse(
+        body,
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="notifications.{format}"'}
+    )
+
 @router.get("/statistics/summary")
-async def get_alert_statistics(user_id: str = Header(alias="X-User-ID")):
+async def get_alert_statistics(
+    user_id: str = Depends(get_current_user_id),
+    alert_service: AlertService = Depends(provide_alert_service)
+):
     """사용자 알림 통계 조회"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
         stats = await alert_service.get_alert_statistics(user_id)
         return stats
@@ -135,11 +140,11 @@ async def get_alert_statistics(user_id: str = Header(alias="X-User-ID")):
         raise HTTPException(status_code=400, detail=f"통계 조회 실패: {str(e)}")
 
 @router.post("/test/trigger")
-async def test_alert_trigger(user_id: str = Header(alias="X-User-ID")):
+async def test_alert_trigger(
+    user_id: str = Depends(get_current_user_id),
+    alert_service: AlertService = Depends(provide_alert_service)
+):
     """알림 조건 테스트 (개발용)"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
         triggered_alerts = await alert_service.check_alert_conditions()
         user_triggered = [
@@ -196,11 +201,11 @@ async def manual_monitoring_check():
         raise HTTPException(status_code=500, detail=f"수동 확인 실패: {str(e)}")
 
 @router.post("/test/email")
-async def send_test_email(user_id: str = Header(alias="X-User-ID")):
+async def send_test_email(
+    user_id: str = Depends(get_current_user_id),
+    notification_service: NotificationService = Depends(provide_notification_service)
+):
     """테스트 이메일 발송"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
         success = await notification_service.send_test_email(user_id)
         if success:
@@ -213,12 +218,10 @@ async def send_test_email(user_id: str = Header(alias="X-User-ID")):
 @router.post("/user/email")
 async def register_user_email(
     email: str = Query(..., description="사용자 이메일 주소"),
-    user_id: str = Header(alias="X-User-ID")
+    user_id: str = Depends(get_current_user_id),
+    notification_service: NotificationService = Depends(provide_notification_service)
 ):
     """사용자 이메일 등록 (MVP용)"""
-    if not user_id:
-        raise HTTPException(status_code=401, detail="사용자 인증이 필요합니다")
-    
     try:
         notification_service.add_user_email(user_id, email)
         return {"message": f"이메일이 등록되었습니다: {email}"}
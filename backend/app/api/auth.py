@@ -1,11 +1,14 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends, Header
-from supabase import Client
 from app.database import get_supabase
 from app.models.user import UserProfile, UserProfileCreate, UserProfileUpdate
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from pydantic import BaseModel
-import jwt
 from app.config import settings
+from app.services.token_verifier import get_token_verifier
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 router = APIRouter()
 
@@ -18,7 +21,7 @@ class SignupRequest(BaseModel):
     password: str
     display_name: Optional[str] = None
 
-def get_current_user_id(authorization: str = Header(None)) -> str:
+async def get_current_user_id(authorization: str = Header(None)) -> str:
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header required")
     
@@ -27,9 +30,17 @@ def get_current_user_id(authorization: str = Header(None)) -> str:
     
     token = authorization.split(" ")[1]
     
+    import jwt
     try:
-        # Supabase JWT 토큰 검증
-        payload = jwt.decode(token, options={"verify_signature": False})
+        if settings.jwt_verify_signature:
+            # Supabase JWT 서명 검증 (검증된 토큰은 만료 전까지 캐시에서 바로 반환)
+            verifier = get_token_verifier()
+            payload = verifier.cached(token)
+            if payload is None:
+                # 서명 검증과 JWKS 조회는 이벤트 루프를 막지 않도록 스레드에서 실행
+                payload = await asyncio.to_thread(verifier.verify, token)
+        else:
+            payload = jwt.decode(token, options={"verify_signature": False})
         user_id = payload.get("sub")
         
         if not user_id:
@@ -40,7 +51,7 @@ def get_current_user_id(authorization: str = Header(None)) -> str:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 @router.post("/signup")
-async def signup(request: SignupRequest, supabase: Client = Depends(get_supabase)):
+async def signup(request: SignupRequest, supabase: "Client" = Depends(get_supabase)):
     try:
         response = supabase.auth.sign_up({
             "email": request.email,
@@ -62,7 +73,7 @@ async def signup(request: SignupRequest, supabase: Client = Depends(get_supabase
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login")
-async def login(request: LoginRequest, supabase: Client = Depends(get_supabase)):
+async def login(request: LoginRequest, supabase: "Client" = Depends(get_supabase)):
     try:
         response = supabase.auth.sign_in_with_password({
             "email": request.email,
@@ -85,7 +96,7 @@ async def login(request: LoginRequest, supabase: Client = Depends(get_supabase))
         raise HTTPException(status_code=401, detail=str(e))
 
 @router.post("/logout")
-async def logout(supabase: Client = Depends(get_supabase)):
+async def logout(supabase: "Client" = Depends(get_supabase)):
     try:
         supabase.auth.sign_out()
         return {"message": "Logout successful"}
@@ -95,7 +106,7 @@ async def logout(supabase: Client = Depends(get_supabase)):
 @router.get("/me")
 async def get_current_user(
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase)
+    supabase: "Client" = Depends(get_supabase)
 ):
     try:
         response = supabase.table("user_profiles").select("*").eq("id", user_id).execute()
@@ -111,7 +122,7 @@ async def get_current_user(
 async def update_profile(
     profile_update: UserProfileUpdate,
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_supabase)
+    supabase: "Client" = Depends(get_supabase)
 ):
     try:
         update_data = profile_update.dict(exclude_unset=True)
@@ -0,0 +1,114 @@
+"""라우터에서 사용하는 서비스 의존성
+
+동기 함수 의존성은 FastAPI가 스레드풀에서 실행하므로,
+요청마다 스레드 전환이 생기지 않도록 async 래퍼로 제공합니다.
+"""
+
+import asyncio
+import hashlib
+from datetime import date
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from ..config import settings
+from ..services.alert_service import AlertService, get_alert_service
+from ..services.daily_exchange_rate_service import DailyExchangeRateService, get_daily_exchange_service
+from ..services.exchange_rate import ExchangeRateService, get_exchange_service
+from ..services.notification import NotificationService, get_notification_service
+from ..services.rate_snapshot import RateSnapshot, get_snapshot_store
+from ..services.rate_tick_service import RateTickService, get_rate_tick_service
+from ..services.upstream_budget import get_upstream_budget
+
+
+async def provide_exchange_service() -> ExchangeRateService:
+    return get_exchange_service()
+
+
+async def provide_daily_exchange_service() -> DailyExchangeRateService:
+    return get_daily_exchange_service()
+
+
+async def provide_rate_tick_service() -> RateTickService:
+    return get_rate_tick_service()
+
+
+async def provide_alert_service() -> AlertService:
+    return get_alert_service()
+
+
+async def provide_notification_service() -> NotificationService:
+    return get_notification_service()
+
+
+def _cache_headers(tag: str) -> Dict[str, str]:
+    max_age = settings.http_cache_max_age
+    return {
+        "ETag": f'"{tag}"',
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={max_age}",
+    }
+
+
+def snapshot_cache_headers(snapshot: Optional[RateSnapshot]) -> Optional[Dict[str, str]]:
+    """스냅샷 버전으로 만든 ETag 와 Cache-Control 헤더 (임시/오래된 스냅샷이면 None)
+
+    업스트림 갱신 시각을 함께 넣어 프로세스 재시작으로 버전이 다시 시작되어도 ETag 가 겹치지 않게 합니다.
+    예산 모드에서는 최신 여부를 정기 갱신 주기 기준으로 판단합니다 (갱신 루프가 계산해 둔 값, DB 조회 없음).
+    """
+    if (snapshot is None or snapshot.version == 0
+            or not snapshot.is_fresh(get_upstream_budget().cached_snapshot_max_age())):
+        return None
+    return _cache_headers(f"{snapshot.version:x}-{int(snapshot.updated_at):x}")
+
+
+def daily_cache_headers(data_version: Optional[str]) -> Optional[Dict[str, str]]:
+    """저장된 일일 환율의 마지막 변경 시각으로 만든 ETag 와 Cache-Control 헤더 (저장된 데이터가 없으면 None)
+
+    수동 저장(POST /rates/store)처럼 스냅샷과 무관하게 바뀐 행도 반영되고,
+    날짜 기본값(오늘)을 쓰는 응답이 있으므로 오늘 날짜도 넣습니다.
+    """
+    if not data_version:
+        return None
+    digest = hashlib.blake2b(data_version.encode(), digest_size=8).hexdigest()
+    return _cache_headers(f"d{digest}-{date.today().strftime('%Y%m%d')}")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _conditional_get(request: Request, response: Response,
+                     headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    if headers is None:
+        return None
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        # 서비스/DB 호출 전에 본문 없이 응답, 캐시가 200 응답과 같은 키로 저장하도록 Vary 도 함께 보냄
+        raise HTTPException(status_code=304, headers={"Vary": "Accept-Encoding", **headers})
+    response.headers.update(headers)
+    return headers
+
+
+async def snapshot_conditional_get(request: Request, response: Response) -> Optional[Dict[str, str]]:
+    """실시간 환율 스냅샷 기반 응답의 조건부 GET 처리"""
+    return _conditional_get(request, response, snapshot_cache_headers(get_snapshot_store().current()))
+
+
+async def daily_conditional_get(request: Request, response: Response) -> Optional[Dict[str, str]]:
+    """일일 환율(DB) 기반 응답의 조건부 GET 처리 (저장된 행의 변경 시각 기준)
+
+    버전은 프로세스에 잠시 보관한 값을 쓰고, 만료되었을 때만 스레드에서 DB 를 읽어 이벤트 루프를 막지 않습니다.
+    """
+    service = get_daily_exchange_service()
+    cached, data_version = service.cached_data_version()
+    if not cached:
+        try:
+            data_version = await asyncio.to_thread(service.get_data_version)
+        except Exception:
+            # 버전을 읽지 못하면 조건부 처리 없이 본문 응답
+            return None
+    return _conditional_get(request, response, daily_cache_headers(data_version))
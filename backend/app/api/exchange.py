@@ -1,14 +1,37 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional, Dict
-from datetime import date, datetime
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Dict, Tuple
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pydantic import BaseModel, Field
+from ..config import settings
 from ..services.exchange_rate import ExchangeRateService
 from ..services.daily_exchange_rate_service import DailyExchangeRateService
-from ..services.monitoring_service import get_monitoring_service
+from ..services.rate_bundle import bundle_binary, bundle_diff, bundle_json
+from ..services.rate_snapshot import RateSnapshot
+from ..services.rate_tick_service import RateTickService
+from ..utils.money import convert_decimal
+from ..utils.responses import SnapshotPayloadCache
+from ..utils.streaming import STREAM_MEDIA_TYPES, csv_stream, ndjson_stream
+from .dependencies import (
+    daily_conditional_get,
+    provide_daily_exchange_service,
+    provide_exchange_service,
+    provide_rate_tick_service,
+    snapshot_cache_headers,
+    snapshot_conditional_get,
+)
 
 router = APIRouter(prefix="/exchange", tags=["exchange"])
-exchange_service = ExchangeRateService()
-daily_exchange_service = DailyExchangeRateService()
+
+# 스냅샷별 직렬화/압축 결과 (전체 환율, 통화 목록, 환율 번들)
+_payload_cache = SnapshotPayloadCache(settings.compression_minimum_size)
+# 스냅샷 차분 (since 버전별, 스냅샷이 바뀌면 정리)
+_diff_cache = SnapshotPayloadCache(settings.compression_minimum_size)
+
+def _payload_version(snapshot: RateSnapshot) -> Tuple[int, float]:
+    """응답 캐시 키 (버전, 갱신 시각)"""
+    return snapshot.version, snapshot.updated_at
 
 class ConversionRequest(BaseModel):
     amount: float
@@ -23,15 +46,30 @@ class ConversionResponse(BaseModel):
     converted_amount: float
     timestamp: str
 
+class BatchConversionRequest(BaseModel):
+    from_currency: str
+    to_currency: str
+    amounts: List[Decimal] = Field(..., max_length=10000)
+
+class BatchConversionResponse(BaseModel):
+    from_currency: str
+    to_currency: str
+    rate: float
+    amounts: List[Decimal]
+    converted_amounts: List[Decimal]
+    timestamp: str
+
 class RatesResponse(BaseModel):
     base: str
     rates: dict
     timestamp: str
 
-@router.get("/rates", response_model=RatesResponse)
+@router.get("/rates", response_model=RatesResponse, dependencies=[Depends(snapshot_conditional_get)])
 async def get_current_rates(
+    request: Request,
     base: str = Query("USD", description="기준 통화 코드"),
-    currencies: Optional[str] = Query(None, description="조회할 통화 목록 (쉼표로 구분)")
+    currencies: Optional[str] = Query(None, description="조회할 통화 목록 (쉼표로 구분)"),
+    exchange_service: ExchangeRateService = Depends(provide_exchange_service)
 ):
     """현재 환율 정보를 조회합니다."""
     try:
@@ -39,6 +77,16 @@ async def get_current_rates(
             target_currencies = [c.strip().upper() for c in currencies.split(",")]
             rates_data = await exchange_service.get_multiple_rates(base.upper(), target_currencies)
         else:
+            snapshot = await exchange_service.get_snapshot()
+            if base.upper() in snapshot.usd_rates:
+                # 전체 환율은 스냅샷 버전마다 한 번만 직렬화/압축
+                def build():
+                    response = snapshot.to_upstream_response(base.upper())
+                    return {"base": response["base"], "rates": response["rates"], "timestamp": response["date"]}
+                return _payload_cache.response(
+                    ("rates", base.upper()), _payload_version(snapshot), build, request.headers.get("accept-encoding", ""),
+                    snapshot_cache_headers(snapshot),
+                )
             rates_data = await exchange_service.get_current_rates(base.upper())
             rates_data = {
                 "base": rates_data.get("base", base.upper()),
@@ -52,7 +100,10 @@ async def get_current_rates(
 
 
 @router.post("/convert", response_model=ConversionResponse)
-async def convert_currency(request: ConversionRequest):
+async def convert_currency(
+    request: ConversionRequest,
+    exchange_service: ExchangeRateService = Depends(provide_exchange_service)
+):
     """통화 변환을 수행합니다."""
     try:
         result = await exchange_service.convert_amount(
@@ -64,20 +115,100 @@ async def convert_currency(request: ConversionRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"통화 변환 실패: {str(e)}")
 
-@router.get("/currencies")
-async def get_supported_currencies():
+@router.post("/convert/batch", response_model=BatchConversionResponse)
+async def convert_currency_batch(
+    request: BatchConversionRequest,
+    exchange_service: ExchangeRateService = Depends(provide_exchange_service)
+):
+    """같은 통화쌍의 여러 금액을 한 번에 변환합니다. (통화별 소수 자릿수로 정확히 반올림)"""
+    try:
+        return await exchange_service.convert_batch(
+            request.amounts,
+            request.from_currency.upper(),
+            request.to_currency.upper()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"통화 일괄 변환 실패: {str(e)}")
+
+@router.get("/currencies", dependencies=[Depends(snapshot_conditional_get)])
+async def get_supported_currencies(
+    request: Request,
+    exchange_service: ExchangeRateService = Depends(provide_exchange_service)
+):
     """지원하는 통화 목록을 조회합니다."""
     try:
-        currencies = await exchange_service.get_supported_currencies()
-        return {
-            "currencies": sorted(currencies),
-            "count": len(currencies)
-        }
+        snapshot = await exchange_service.get_snapshot()
+        return _payload_cache.response(
+            "currencies",
+            _payload_version(snapshot),
+            lambda: {"currencies": sorted(snapshot.usd_rates), "count": len(snapshot.usd_rates)},
+            request.headers.get("accept-encoding", ""),
+            snapshot_cache_headers(snapshot),
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"통화 목록 조회 실패: {str(e)}")
 
-@router.get("/rates/popular")
-async def get_popular_rates():
+@router.get("/bundle", dependencies=[Depends(snapshot_conditional_get)])
+async def get_rate_bundle(
+    request: Request,
+    format: str = Query("json", pattern="^(json|binary)$", description="응답 형식 (json 또는 binary)"),
+    exchange_service: ExchangeRateService = Depends(provide_exchange_service)
+):
+    """오프라인 변환용 환율 번들 (통화 목록 + USD 기준 float32 환율, 스냅샷 버전별 캐시)"""
+    try:
+        snapshot = await exchange_service.get_snapshot()
+        if format == "binary":
+            build, media_type = (lambda: bundle_binary(snapshot)), "application/octet-stream"
+        else:
+            build, media_type = (lambda: bundle_json(snapshot)), "application/json"
+        return _payload_cache.response(
+            ("bundle", format),
+            _payload_version(snapshot),
+            build,
+            request.headers.get("accept-encoding", ""),
+            snapshot_cache_headers(snapshot),
+            media_type=media_type,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"환율 번들 조회 실패: {str(e)}")
+
+@router.get("/snapshots/diff", dependencies=[Depends(snapshot_conditional_get)])
+async def get_snapshot_diff(
+    request: Request,
+    since: int = Query(..., ge=0, description="클라이언트가 가진 스냅샷 버전"),
+    timestamp: Optional[int] = Query(None, ge=0, description="그 버전과 함께 받은 timestamp (번들/차분 응답의 timestamp)"),
+    exchange_service: ExchangeRateService = Depends(provide_exchange_service)
+):
+    """since 버전 이후 바뀐 환율만 반환
+
+    since/timestamp 가 최근 스냅샷 링의 버전과 맞지 않으면 (재시작으로 버전이 다시 시작된 경우 포함) 전체 번들, full=true
+    """
+    try:
+        snapshot = await exchange_service.get_snapshot()
+        base = None
+        if snapshot.version and timestamp is not None:
+            base = exchange_service.get_snapshot_at(since, timestamp)
+        if base is not None and base.version <= snapshot.version:
+            key, build = since, (lambda: bundle_diff(base, snapshot))
+        else:
+            # 전체 응답은 since 와 무관하므로 하나만 캐시
+            key, build = "full", (lambda: {**bundle_json(snapshot), "full": True})
+        if len(_diff_cache) > 2 * settings.rate_snapshot_history:
+            _diff_cache.prune(_payload_version(snapshot))
+        return _diff_cache.response(
+            key,
+            _payload_version(snapshot),
+            build,
+            request.headers.get("accept-encoding", ""),
+            snapshot_cache_headers(snapshot),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"스냅샷 차분 조회 실패: {str(e)}")
+
+@router.get("/rates/popular", dependencies=[Depends(snapshot_conditional_get)])
+async def get_popular_rates(
+    exchange_service: ExchangeRateService = Depends(provide_exchange_service)
+):
     """인기 있는 환율 쌍을 조회합니다."""
     try:
         popular_pairs = {
@@ -99,8 +230,11 @@ async def get_popular_rates():
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"인기 환율 조회 실패: {str(e)}")
 
-@router.get("/rates/daily")
-async def get_daily_rates(target_date: Optional[str] = Query(None, description="조회할 날짜 (YYYY-MM-DD)")):
+@router.get("/rates/daily", dependencies=[Depends(daily_conditional_get)])
+async def get_daily_rates(
+    target_date: Optional[str] = Query(None, description="조회할 날짜 (YYYY-MM-DD)"),
+    daily_exchange_service: DailyExchangeRateService = Depends(provide_daily_exchange_service)
+):
     """일일 환율 데이터를 조회합니다."""
     try:
         if target_date:
@@ -126,11 +260,13 @@ async def get_daily_rates(target_date: Optional[str] = Query(None, description="
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"일일 환율 조회 실패: {str(e)}")
 
-@router.get("/rates/latest")
-async def get_latest_rates_with_changes():
+@router.get("/rates/latest", dependencies=[Depends(daily_conditional_get)])
+async def get_latest_rates_with_changes(
+    daily_exchange_service: DailyExchangeRateService = Depends(provide_daily_exchange_service)
+):
     """최신 환율 데이터와 변동률을 조회합니다."""
     try:
-        latest_rates, is_realtime = await daily_exchange_service.get_latest_rates_with_changes()
+        latest_rates, is_realtime = await daily_exchange_service.get_latest_rates()
         
         return {
             "rates": [
@@ -146,16 +282,18 @@ async def get_latest_rates_with_changes():
             ],
             "is_realtime": is_realtime,
             "data_source": "realtime" if is_realtime else "cached",
-            "message": "실시간 환율 데이터" if is_realtime else "실시간 API 실패로 저장된 데이터 사용"
+            "message": "실시간 환율 데이터" if is_realtime else "오늘 환율이 아직 저장되지 않아 최근 저장된 데이터 사용"
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"최신 환율 조회 실패: {str(e)}")
 
-@router.get("/rates/stored", response_model=Dict)
-async def get_stored_rates():
+@router.get("/rates/stored", response_model=Dict, dependencies=[Depends(daily_conditional_get)])
+async def get_stored_rates(
+    daily_exchange_service: DailyExchangeRateService = Depends(provide_daily_exchange_service)
+):
     """데이터베이스에 저장된 최신 환율 데이터만 조회 (실시간 API 호출 없음)"""
     try:
-        rates = await daily_exchange_service.get_latest_stored_rates_only()
+        rates, _ = await daily_exchange_service.get_latest_rates()
         
         if not rates:
             return {
@@ -186,11 +324,48 @@ async def get_stored_rates():
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"저장된 환율 조회 실패: {str(e)}")
 
-@router.get("/rates/history/{from_currency}/{to_currency}", response_model=Dict)
+@router.get("/rates/history/export")
+async def export_rate_history(
+    pairs: str = Query(..., description="통화 쌍 목록 (예: USD/KRW,JPY/KRW)"),
+    start_date: str = Query(..., description="시작 날짜 (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="종료 날짜 (YYYY-MM-DD, 기본값: 오늘)"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson 또는 csv"),
+    cache_headers: Optional[Dict[str, str]] = Depends(daily_conditional_get),
+    daily_exchange_service: DailyExchangeRateService = Depends(provide_daily_exchange_service)
+):
+    """여러 통화 쌍의 기간별 환율 히스토리를 스트리밍으로 내보내기"""
+    try:
+        pair_list = []
+        for pair in pairs.split(","):
+            currency_from, currency_to = pair.strip().upper().split("/")
+            if (currency_from, currency_to) not in pair_list:
+                pair_list.append((currency_from, currency_to))
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date) if end_date else date.today()
+        if start > end:
+            raise ValueError("시작 날짜가 종료 날짜보다 늦습니다")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"환율 히스토리 내보내기 실패: {str(e)}")
+
+    rows = daily_exchange_service.iter_rate_history(pair_list, start, end)
+    if format == "csv":
+        body = csv_stream(rows, ["currency_pair", "date", "rate", "previous_rate", "change_amount", "change_percentage"])
+    else:
+        body = ndjson_stream(rows)
+    return StreamingResponse(
+        body,
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="rate_history.{format}"', **(cache_headers or {})}
+    )
+
+@router.get(
+    "/rates/history/{from_currency}/{to_currency}", response_model=Dict, dependencies=[Depends(daily_conditional_get)]
+)
 async def get_currency_pair_history(
     from_currency: str,
     to_currency: str,
-    days: int = Query(30, ge=1, le=365, description="조회할 일수 (1-365)")
+    days: int = Query(30, ge=1, le=365, description="조회할 일수 (1-365)"),
+    daily_exchange_service: DailyExchangeRateService = Depends(provide_daily_exchange_service)
 ):
     """특정 통화 쌍의 환율 히스토리 조회"""
     try:
@@ -240,77 +415,104 @@ async def get_currency_pair_history(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"환율 히스토리 조회 실패: {str(e)}")
 
+@router.get("/rates/intraday/{from_currency}/{to_currency}", response_model=Dict)
+async def get_intraday_rates(
+    from_currency: str,
+    to_currency: str,
+    hours: int = Query(
+        24, ge=1, le=24 * settings.rate_tick_retention_days,
+        description="조회할 시간 (1 이상, RATE_TICK_RETENTION_DAYS 틱 보관 기간 이내)",
+    ),
+    tick_service: RateTickService = Depends(provide_rate_tick_service)
+):
+    """특정 통화 쌍의 장중 환율 틱 조회 (업스트림 갱신마다 1건)
+
+    본문이 요청 시각 기준 구간이라 스냅샷 버전과 맞지 않으므로 ETag 는 붙이지 않습니다.
+    """
+    try:
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(hours=hours)
+        ticks = await tick_service.get_intraday(from_currency, to_currency, start, end)
+        return {
+            "currency_pair": f"{from_currency}/{to_currency}",
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "data": ticks,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"장중 환율 조회 실패: {str(e)}")
+
+@router.get("/rates/ohlc/{from_currency}/{to_currency}", response_model=Dict)
+async def get_daily_ohlc(
+    from_currency: str,
+    to_currency: str,
+    days: int = Query(30, ge=1, le=3650, description="조회할 일수 (1-3650)"),
+    tick_service: RateTickService = Depends(provide_rate_tick_service)
+):
+    """특정 통화 쌍의 일별 시가/고가/저가/종가 조회 (UTC 기준 일자, 장중 틱 조회처럼 ETag 없음)"""
+    try:
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        end_date = datetime.now(timezone.utc).date()
+        start_date = end_date - timedelta(days=days - 1)
+        candles = await tick_service.get_ohlc(from_currency, to_currency, start_date, end_date)
+        return {
+            "currency_pair": f"{from_currency}/{to_currency}",
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "data": candles,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"일별 OHLC 조회 실패: {str(e)}")
+
 @router.get("/convert", response_model=Dict)
 async def convert_currency(
     from_currency: str = Query(..., description="변환할 통화 (예: USD)"),
     to_currency: str = Query(..., description="변환 대상 통화 (예: KRW)"),
-    amount: float = Query(..., gt=0, description="변환할 금액")
+    amount: float = Query(..., gt=0, description="변환할 금액"),
+    daily_exchange_service: DailyExchangeRateService = Depends(provide_daily_exchange_service)
 ):
     """실시간 환율을 사용한 통화 변환"""
     try:
         # 최신 환율 데이터 조회
-        rates, is_realtime = await daily_exchange_service.get_latest_rates_with_changes()
+        rates, is_realtime = await daily_exchange_service.get_latest_rates()
         
         if not rates:
             raise HTTPException(status_code=404, detail="환율 데이터를 찾을 수 없습니다")
         
-        # 환율 데이터를 딕셔너리로 변환
-        rate_dict = {}
-        for rate in rates:
-            key = f"{rate.currency_from}-{rate.currency_to}"
-            rate_dict[key] = float(rate.rate)
-        
-        # 변환 로직
-        converted_amount = None
-        used_rate = None
-        
-        if from_currency == to_currency:
-            # 같은 통화면 그대로 반환
-            converted_amount = amount
-            used_rate = 1.0
-        else:
-            # 직접 환율 찾기
-            direct_key = f"{from_currency}-{to_currency}"
-            if direct_key in rate_dict:
-                used_rate = rate_dict[direct_key]
-                converted_amount = amount * used_rate
-            else:
-                # 역방향 환율 찾기
-                reverse_key = f"{to_currency}-{from_currency}"
-                if reverse_key in rate_dict:
-                    used_rate = 1.0 / rate_dict[reverse_key]
-                    converted_amount = amount * used_rate
-                else:
-                    # KRW를 중간 통화로 사용
-                    from_to_krw = f"{from_currency}-KRW"
-                    krw_to_to = f"KRW-{to_currency}"
-                    
-                    if from_to_krw in rate_dict and krw_to_to in rate_dict:
-                        krw_amount = amount * rate_dict[from_to_krw]
-                        converted_amount = krw_amount * rate_dict[krw_to_to]
-                        used_rate = rate_dict[from_to_krw] * rate_dict[krw_to_to]
-                    else:
-                        raise HTTPException(
-                            status_code=400, 
-                            detail=f"{from_currency}에서 {to_currency}로의 환율을 찾을 수 없습니다"
-                        )
+        # 저장된 환율 전체를 그래프로 보고 미리 계산한 최소 경유 경로로 변환
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        graph = daily_exchange_service.get_conversion_graph(rates)
+        try:
+            used_rate, path = graph.lookup(from_currency, to_currency)
+        except KeyError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{from_currency}에서 {to_currency}로의 환율을 찾을 수 없습니다"
+            )
+        converted_amount = convert_decimal(amount, used_rate, to_currency)
         
         return {
             "amount": amount,
             "from_currency": from_currency,
             "to_currency": to_currency,
             "rate": used_rate,
-            "converted_amount": round(converted_amount, 6),
+            "converted_amount": float(converted_amount),
+            "path": list(path),
             "is_realtime": is_realtime,
             "timestamp": datetime.now().isoformat(),
             "data_source": "realtime" if is_realtime else "stored"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"환율 변환 실패: {str(e)}")
 
 @router.post("/rates/store")
-async def store_daily_rates():
+async def store_daily_rates(
+    daily_exchange_service: DailyExchangeRateService = Depends(provide_daily_exchange_service)
+):
     """수동으로 일일 환율을 저장합니다. (테스트용)"""
     try:
         start_time = datetime.now()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,9 +8,32 @@ class Settings:
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_service_key: str = os.getenv("SUPABASE_SERVICE_KEY", "")
     exchange_rate_api_key: str = os.getenv("EXCHANGE_RATE_API_KEY", "")
+    exchange_rate_api_base_url: str = os.getenv("EXCHANGE_RATE_API_BASE_URL", "https://api.exchangerate-api.com/v4")
+    
+    # 업스트림 제공자 (우선순위 순, 비우면 EXCHANGE_RATE_API_BASE_URL 하나) / 타임아웃 / 서킷 브레이커 / 헤지 요청
+    upstream_providers: str = os.getenv("UPSTREAM_PROVIDERS", "")
+    upstream_timeout: float = float(os.getenv("UPSTREAM_TIMEOUT", "5"))
+    upstream_failure_threshold: int = int(os.getenv("UPSTREAM_FAILURE_THRESHOLD", "3"))
+    upstream_reset_timeout: float = float(os.getenv("UPSTREAM_RESET_TIMEOUT", "30"))
+    upstream_hedge_delay: float = float(os.getenv("UPSTREAM_HEDGE_DELAY", "1.0"))  # p95 표본이 모이기 전 기본값
+    upstream_hedge_min_delay: float = float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY", "0.05"))
+    
+    # 업스트림 월간 호출 예산 (0이면 무제한, RATE_REFRESH_INTERVAL 마다 갱신)
+    upstream_monthly_quota: int = int(os.getenv("UPSTREAM_MONTHLY_QUOTA", "0"))
+    upstream_alert_reserve: float = float(os.getenv("UPSTREAM_ALERT_RESERVE", "0.2"))  # 알림 근접 추가 갱신용 비율
+    alert_refresh_proximity: float = float(os.getenv("ALERT_REFRESH_PROXIMITY", "0.005"))  # 목표 환율 ±0.5% 이내
     sendgrid_api_key: str = os.getenv("SENDGRID_API_KEY", "")
     resend_api_key: str = os.getenv("RESEND_API_KEY", "")
     secret_key: str = os.getenv("SECRET_KEY", "your-secret-key-here")
+    
+    # Supabase 액세스 토큰 검증: HS256 프로젝트는 JWT 시크릿, 비대칭 키 프로젝트는 JWKS 사용
+    supabase_jwt_secret: str = os.getenv("SUPABASE_JWT_SECRET", "")
+    supabase_jwks_url: str = os.getenv("SUPABASE_JWKS_URL", "")  # 비우면 {SUPABASE_URL}/auth/v1/.well-known/jwks.json
+    jwt_audience: str = os.getenv("JWT_AUDIENCE", "authenticated")
+    jwt_verify_signature: bool = os.getenv("JWT_VERIFY_SIGNATURE", "true").lower() == "true"
+    jwt_cache_size: int = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+    jwt_cache_max_ttl: float = float(os.getenv("JWT_CACHE_MAX_TTL", "3600"))
+    jwks_refresh_interval: float = float(os.getenv("JWKS_REFRESH_INTERVAL", "600"))
     debug: bool = os.getenv("DEBUG", "false").lower() == "true"
     cors_origins: str = os.getenv("CORS_ORIGINS", "http://localhost:3000")
     
@@ -18,6 +42,51 @@ class Settings:
     host: str = os.getenv("HOST", "0.0.0.0")
     database_url: str = os.getenv("DATABASE_URL", "")
     
+    # 환율 스냅샷 설정
+    rate_refresh_interval: float = float(os.getenv("RATE_REFRESH_INTERVAL", "60"))
+    rate_snapshot_max_age: float = float(os.getenv("RATE_SNAPSHOT_MAX_AGE", "300"))
+    rate_snapshot_shm: str = os.getenv("RATE_SNAPSHOT_SHM", "")  # 멀티 워커 모드 공유 메모리 이름
+    rate_snapshot_history: int = int(os.getenv("RATE_SNAPSHOT_HISTORY", "32"))  # 차분 응답용으로 보관할 최근 스냅샷 수
+    rate_snapshot_file: str = os.getenv("RATE_SNAPSHOT_FILE", os.path.join(tempfile.gettempdir(), "exchange-rate-snapshot.bin"))
+    rate_snapshot_file_max_age: float = float(os.getenv("RATE_SNAPSHOT_FILE_MAX_AGE", "86400"))  # 이보다 오래된 파일은 무시
+    
+    # 장중 환율 틱 (스냅샷마다 exchange_rates 에 기록할 통화쌍, 비우면 기록 안 함) / 틱 보관 일수 (이후 일별 OHLC 로 롤업)
+    rate_tick_pairs: str = os.getenv("RATE_TICK_PAIRS", "USD/KRW,JPY/KRW,EUR/KRW,CNY/KRW")
+    rate_tick_retention_days: int = int(os.getenv("RATE_TICK_RETENTION_DAYS", "30"))
+    
+    # 스케줄 작업 리더 선출 (none | file | database)
+    leader_election_backend: str = os.getenv("LEADER_ELECTION_BACKEND", "none")
+    leader_lease_seconds: float = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+    leader_lock_file: str = os.getenv("LEADER_LOCK_FILE", os.path.join(tempfile.gettempdir(), "exchange-rate-scheduler.lock"))
+    
+    # 알림 평가 샤딩 (인스턴스 간: index/count, 인스턴스 내: 프로세스 수)
+    alert_shard_key: str = os.getenv("ALERT_SHARD_KEY", "alert_id")  # alert_id | user_id
+    alert_shard_index: int = int(os.getenv("ALERT_SHARD_INDEX", "0"))
+    alert_shard_count: int = int(os.getenv("ALERT_SHARD_COUNT", "1"))
+    alert_eval_processes: int = int(os.getenv("ALERT_EVAL_PROCESSES", "1"))
+    
+    # 알림 평가 주기: 스냅샷이 바뀔 때마다 교차 평가, 전체 평가는 안전망으로만 실행
+    alert_sweep_interval: int = int(os.getenv("ALERT_SWEEP_INTERVAL", "3600"))
+    alert_index_ttl: float = float(os.getenv("ALERT_INDEX_TTL", "60"))
+    alert_rearm_band: float = float(os.getenv("ALERT_REARM_BAND", "0.005"))  # 목표 대비 0.5% 되돌아오면 재무장
+    
+    # 알림 API 사용자별 캐시 (알림 설정/발송 통계, 다른 프로세스의 변경은 TTL 안에 반영)
+    alert_cache_ttl: float = float(os.getenv("ALERT_CACHE_TTL", "60"))
+    alert_cache_max_users: int = int(os.getenv("ALERT_CACHE_MAX_USERS", "10000"))
+    
+    # 알림 발송 이력/상태 변경 일괄 저장 (건수 또는 초 단위로 저장)
+    bulk_write_max_batch: int = int(os.getenv("BULK_WRITE_MAX_BATCH", "500"))
+    bulk_write_max_delay: float = float(os.getenv("BULK_WRITE_MAX_DELAY", "2"))
+    bulk_write_max_attempts: int = int(os.getenv("BULK_WRITE_MAX_ATTEMPTS", "30"))  # 일시 오류 시 행별 재시도 한도
+    
+    # 응답 압축 (이 크기(바이트) 미만의 응답은 압축하지 않음)
+    compression_minimum_size: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "500"))
+    
+    # 스냅샷 기반 응답의 Cache-Control max-age (초, CDN/브라우저 캐시)
+    http_cache_max_age: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+    # 일일 환율 ETag 용 데이터 버전을 다시 읽지 않고 재사용하는 시간 (초, 다른 인스턴스의 저장 반영 지연)
+    daily_data_version_ttl: float = float(os.getenv("DAILY_DATA_VERSION_TTL", "10"))
+    
     @property
     def cors_origins_list(self) -> list:
         """CORS origins을 리스트로 반환"""
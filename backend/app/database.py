@@ -1,7 +1,15 @@
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Optional
 from app.config import settings
 
-supabase: Client = create_client(settings.supabase_url, settings.supabase_service_key)
+if TYPE_CHECKING:
+    from supabase import Client
 
-def get_supabase() -> Client:
-    return supabase
\ No newline at end of file
+# supabase 패키지 import와 클라이언트 생성은 비용이 커서 첫 사용 시점으로 미룸
+supabase: Optional["Client"] = None
+
+def get_supabase() -> "Client":
+    global supabase
+    if supabase is None:
+        from supabase import create_client
+        supabase = create_client(settings.supabase_url, settings.supabase_service_key)
+    return supabase
@@ -1,12 +1,82 @@
+import asyncio
+import logging
 import os
-import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api import auth, exchange, alerts
+from app.services.alert_service import get_alert_service
+from app.services.bulk_writer import get_bulk_writer
+from app.services.daily_exchange_rate_service import get_daily_exchange_service
+from app.services.exchange_rate import get_exchange_service
 from app.services.monitoring_service import get_monitoring_service
+from app.services.notification import get_notification_service
+from app.services.rate_refresher import RateRefresher, near_alert_probe
+from app.services.rate_snapshot import get_snapshot_store
+from app.services.token_verifier import get_token_verifier
+from app.utils.responses import CompressionMiddleware, ORJSONResponse
 
-app = FastAPI(title="Exchange Rate Travel App", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 수명주기: 서비스 싱글톤 생성, 모니터링 시작/중지"""
+    logging.basicConfig(level=logging.INFO)
+    
+    # 서명 검증에 쓸 키가 없으면 모든 로그인이 401 이 되므로 다른 작업을 시작하기 전에 실패
+    token_verifier = get_token_verifier()
+    if settings.jwt_verify_signature:
+        await asyncio.to_thread(token_verifier.ensure_configured)
+    
+    # 서비스 싱글톤은 import 시점이 아니라 여기서 생성 (콜드 스타트 비용 절감)
+    # 업스트림 커넥션 풀은 이 루프에 두고, 모니터링 스레드의 호출도 이 루프에서 실행
+    get_exchange_service().upstream.bind_loop(asyncio.get_running_loop())
+    get_daily_exchange_service()
+    get_alert_service()
+    get_notification_service()
+    monitoring_service = get_monitoring_service()
+    
+    # 환율 스냅샷: 멀티 워커 모드에서는 전용 프로세스가 공유 메모리에 기록하므로 읽기만 함
+    refresher = None
+    snapshot_store = get_snapshot_store()
+    if snapshot_store.writer:
+        refresher = RateRefresher(
+            get_exchange_service(), snapshot_store,
+            near_alerts=near_alert_probe() if settings.upstream_monthly_quota else None,
+        )
+        # 첫 업스트림 갱신 전에도 바로 응답하도록 저장된 스냅샷으로 시작
+        refresher.warm_start()
+        refresher.start()
+    
+    # 알림 발송 이력/상태 변경 일괄 저장 (종료 시 남은 데이터 저장)
+    bulk_writer = get_bulk_writer()
+    bulk_writer.start()
+    
+    # 액세스 토큰 서명 검증용 JWKS 백그라운드 갱신
+    if settings.jwt_verify_signature:
+        token_verifier.start()
+    
+    # 앱 시작 시 모니터링 서비스 자동 시작
+    monitoring_service.start_monitoring()
+    print("🚀 모니터링 서비스가 자동으로 시작되었습니다 (매일 00:00 환율 데이터 수집)")
+    
+    yield
+    
+    if refresher is not None:
+        await refresher.stop()
+    await asyncio.to_thread(monitoring_service.stop_monitoring)
+    await asyncio.to_thread(bulk_writer.stop)
+    await asyncio.to_thread(token_verifier.stop)
+    await get_exchange_service().upstream.aclose()
+
+app = FastAPI(
+    title="Exchange Rate Travel App",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# CORS 보다 안쪽에서 압축 (CORS 헤더는 압축 여부와 무관하게 추가됨)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,19 +89,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(exchange.router, tags=["exchange"])
-app.include_router(alerts.router, tags=["alerts"])
-
-# 앱 시작 시 모니터링 서비스 자동 시작
-@app.on_event("startup")
-async def startup_event():
-    """앱 시작 시 자동으로 모니터링 서비스 시작"""
-    monitoring_service = get_monitoring_service()
-    monitoring_service.start_monitoring()
-    print("🚀 모니터링 서비스가 자동으로 시작되었습니다 (매일 00:00 환율 데이터 수집)")
+app.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
 
 @app.get("/")
 def read_root():
@@ -42,5 +105,6 @@ def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Literal
+from typing import Literal, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -11,6 +11,8 @@ class AlertSetting(BaseModel):
     target_rate: Decimal
     condition: Literal['above', 'below']
     is_active: bool = True
+    armed: bool = True  # False: 발송 후 재무장 대기 (fired)
+    last_triggered_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
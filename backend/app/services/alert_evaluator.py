@@ -0,0 +1,299 @@
+"""
+알림 조건 평가 엔진
+
+한 번의 확인 주기에서는 모든 알림을 같은 환율 스냅샷 버전으로 평가합니다.
+알림은 목표 환율을 지날 때 한 번만 발송(armed → fired)되고, 환율이 반대쪽으로
+ALERT_REARM_BAND 비율 이상 되돌아가야 다시 무장(fired → armed)됩니다.
+알림은 alert_id 또는 user_id의 해시 버킷(0..SHARD_BUCKETS-1)으로 샤드에 배정되므로
+샤드 수(프로세스 수, 인스턴스 수)와 무관하게 같은 알림이 같은 결과를 냅니다.
+버킷은 alert_settings 의 alert_bucket/user_bucket 생성 컬럼과 같은 식(md5 앞 32비트의 하위 10비트)이라
+인스턴스 샤드는 DB 에서 버킷 범위로 바로 걸러 읽습니다.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# (alert_id, user_id, currency_from, currency_to, target_rate, condition, armed)
+AlertRow = Tuple[str, str, str, str, float, str, bool]
+
+
+SHARD_BUCKETS = 1024
+
+
+def shard_bucket(key: str) -> int:
+    """알림 키의 해시 버킷 (SQL: (('x' || left(md5(key), 8))::bit(32)::int) & 1023 과 같은 값)"""
+    return int(hashlib.md5(key.encode()).hexdigest()[:8], 16) & (SHARD_BUCKETS - 1)
+
+
+def shard_bucket_range(shard_index: int, shard_count: int) -> Tuple[int, int]:
+    """shard_index 샤드가 맡는 버킷 구간 [low, high)"""
+    return (-(-shard_index * SHARD_BUCKETS // shard_count),
+            -(-(shard_index + 1) * SHARD_BUCKETS // shard_count))
+
+
+def shard_of(key: str, shard_count: int) -> int:
+    """프로세스/인스턴스 간에도 같은 값이 나오는 샤드 번호 (내장 hash()는 프로세스마다 달라 사용하지 않음)"""
+    if shard_count <= 1:
+        return 0
+    return shard_bucket(key) * shard_count // SHARD_BUCKETS
+
+
+def partition(rows: Sequence[AlertRow], shard_count: int, shard_key: str = "alert_id") -> List[List[AlertRow]]:
+    """알림 행을 샤드별로 분할"""
+    key_index = 1 if shard_key == "user_id" else 0
+    shards: List[List[AlertRow]] = [[] for _ in range(max(shard_count, 1))]
+    for row in rows:
+        shards[shard_of(row[key_index], shard_count)].append(row)
+    return shards
+
+
+def rearm_level(target_rate: float, condition: str, band: float) -> float:
+    """발송된 알림이 다시 무장되는 환율 (목표 환율에서 band 비율만큼 반대쪽)"""
+    return target_rate * (1 - band) if condition == "above" else target_rate * (1 + band)
+
+
+def is_triggered(rate: float, target_rate: float, condition: str) -> bool:
+    return rate >= target_rate if condition == "above" else rate <= target_rate
+
+
+def is_rearmed(rate: float, target_rate: float, condition: str, band: float) -> bool:
+    level = rearm_level(target_rate, condition, band)
+    return rate <= level if condition == "above" else rate >= level
+
+
+def evaluate_alerts(rows: Sequence[AlertRow], usd_rates: Dict[str, float],
+                    band: float = 0.0) -> Tuple[List[Tuple[str, float]], List[str], Dict]:
+    """무장된 알림 중 조건을 만족한 (alert_id, 현재 환율) 목록, 다시 무장할 alert_id 목록, 샤드 통계 반환
+
+    프로세스 풀에서 실행 가능한 순수 함수입니다. 발송된 알림은 조건 평가 없이 재무장 여부만 확인합니다.
+    """
+    started = time.perf_counter()
+    triggered = []
+    rearmed = []
+    skipped = 0
+    for alert_id, _, currency_from, currency_to, target_rate, condition, armed in rows:
+        from_rate = usd_rates.get(currency_from)
+        to_rate = usd_rates.get(currency_to)
+        if not from_rate or to_rate is None:
+            skipped += 1  # 지원하지 않는 통화
+            continue
+        current_rate = to_rate / from_rate
+        if armed:
+            if is_triggered(current_rate, target_rate, condition):
+                triggered.append((alert_id, current_rate))
+        elif is_rearmed(current_rate, target_rate, condition, band):
+            rearmed.append(alert_id)
+    stats = {
+        "evaluated": len(rows),
+        "triggered": len(triggered),
+        "rearmed": len(rearmed),
+        "skipped": skipped,
+        "duration_ms": (time.perf_counter() - started) * 1000,
+    }
+    return triggered, rearmed, stats
+
+
+class AlertIndex:
+    """통화쌍별 알림 인덱스 (구간 내 경계값 검색용)
+
+    무장된 알림은 목표 환율, 발송된 알림은 재무장 환율 순으로 정렬해 두고
+    상태가 바뀐 알림이 있으면 해당 통화쌍만 다시 정렬합니다.
+    """
+
+    def __init__(self, rows: Sequence[AlertRow], band: float = 0.0):
+        self.band = band
+        self.rows: Dict[str, AlertRow] = {row[0]: row for row in rows}
+        self._by_pair: Dict[Tuple[str, str], Dict[str, AlertRow]] = {}
+        for row in rows:
+            self._by_pair.setdefault((row[2], row[3]), {})[row[0]] = row
+        self.pairs: Dict[Tuple[str, str], Tuple[List[float], List[AlertRow], List[float], List[AlertRow]]] = {}
+        for pair in self._by_pair:
+            self._build_pair(pair)
+        self.built_at = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    def _build_pair(self, pair: Tuple[str, str]) -> None:
+        pair_rows = self._by_pair.get(pair)
+        if not pair_rows:
+            self.pairs.pop(pair, None)
+            return
+        armed = sorted((row for row in pair_rows.values() if row[6]), key=lambda row: row[4])
+        fired = sorted(
+            (row for row in pair_rows.values() if not row[6]),
+            key=lambda row: rearm_level(row[4], row[5], self.band),
+        )
+        self.pairs[pair] = (
+            [row[4] for row in armed], armed,
+            [rearm_level(row[4], row[5], self.band) for row in fired], fired,
+        )
+
+    def set_armed(self, alert_ids: Sequence[str], armed: bool) -> None:
+        """알림 상태 변경을 인덱스에 반영 (영향받은 통화쌍만 재정렬)"""
+        touched = set()
+        for alert_id in alert_ids:
+            row = self.rows.get(alert_id)
+            if row is None or row[6] == armed:
+                continue
+            row = row[:6] + (armed,)
+            self.rows[alert_id] = row
+            pair = (row[2], row[3])
+            self._by_pair[pair][alert_id] = row
+            touched.add(pair)
+        for pair in touched:
+            self._build_pair(pair)
+
+    def between(self, pair: Tuple[str, str], low: float, high: float) -> Tuple[List[AlertRow], List[AlertRow]]:
+        """목표 환율이 [low, high] 구간에 있는 무장 알림과, 재무장 환율이 구간에 있는 발송 알림"""
+        entry = self.pairs.get(pair)
+        if entry is None:
+            return [], []
+        targets, armed, levels, fired = entry
+        return (
+            armed[bisect.bisect_left(targets, low):bisect.bisect_right(targets, high)],
+            fired[bisect.bisect_left(levels, low):bisect.bisect_right(levels, high)],
+        )
+
+    def near(self, usd_rates: Dict[str, float], proximity: float) -> List[Tuple[str, str]]:
+        """현재 환율의 ±proximity 비율 안에 목표 환율이 있는 무장 알림의 통화쌍"""
+        pairs = []
+        for pair in self.pairs:
+            from_rate, to_rate = usd_rates.get(pair[0]), usd_rates.get(pair[1])
+            if not from_rate or to_rate is None:
+                continue
+            rate = to_rate / from_rate
+            armed_rows, _ = self.between(pair, rate * (1 - proximity), rate * (1 + proximity))
+            if armed_rows:
+                pairs.append(pair)
+        return pairs
+
+
+def evaluate_crossings(index: AlertIndex, previous_rates: Dict[str, float],
+                       current_rates: Dict[str, float]) -> Tuple[List[Tuple[str, float]], List[str], Dict]:
+    """이전/현재 스냅샷 사이에 움직인 통화쌍에서 경계값을 지나간 알림만 평가"""
+    started = time.perf_counter()
+    moved = {
+        code for code, rate in current_rates.items() if previous_rates.get(code) != rate
+    }
+    triggered = []
+    rearmed = []
+    pairs_moved = candidates = 0
+    for pair in index.pairs:
+        currency_from, currency_to = pair
+        if currency_from not in moved and currency_to not in moved:
+            continue
+        old_from, old_to = previous_rates.get(currency_from), previous_rates.get(currency_to)
+        new_from, new_to = current_rates.get(currency_from), current_rates.get(currency_to)
+        if not old_from or not new_from or old_to is None or new_to is None:
+            continue
+        old_rate, new_rate = old_to / old_from, new_to / new_from
+        pairs_moved += 1
+        armed_rows, fired_rows = index.between(pair, min(old_rate, new_rate), max(old_rate, new_rate))
+        candidates += len(armed_rows) + len(fired_rows)
+        for alert_id, _, _, _, target_rate, condition, _ in armed_rows:
+            if is_triggered(new_rate, target_rate, condition):
+                triggered.append((alert_id, new_rate))
+        for alert_id, _, _, _, target_rate, condition, _ in fired_rows:
+            if is_rearmed(new_rate, target_rate, condition, index.band):
+                rearmed.append(alert_id)
+    triggered.sort(key=lambda item: item[0])
+    rearmed.sort()
+    stats = {
+        "evaluated": candidates,
+        "triggered": len(triggered),
+        "rearmed": len(rearmed),
+        "pairs_moved": pairs_moved,
+        "indexed": index.size,
+        "duration_ms": (time.perf_counter() - started) * 1000,
+    }
+    return triggered, rearmed, stats
+
+
+class AlertEvaluator:
+    """알림 평가기: 알림 수가 많으면 프로세스 풀로 샤드를 나눠 병렬 평가"""
+
+    def __init__(self, processes: Optional[int] = None, shard_key: Optional[str] = None,
+                 band: Optional[float] = None, min_alerts_per_process: int = 20_000):
+        self.processes = processes if processes is not None else settings.alert_eval_processes
+        self.shard_key = shard_key or settings.alert_shard_key
+        self.band = band if band is not None else settings.alert_rearm_band
+        self.min_alerts_per_process = min_alerts_per_process
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.last_stats: Dict = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            import multiprocessing
+            # 모니터링 스레드가 떠 있는 프로세스에서 fork 하지 않도록 spawn 사용
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def evaluate(self, rows: Sequence[AlertRow], usd_rates: Dict[str, float],
+                       snapshot_version: int = 0) -> Tuple[List[Tuple[str, float]], List[str]]:
+        """스냅샷 하나로 전체 알림을 평가하고 alert_id 순으로 정렬된 (발송 대상, 재무장 대상) 반환"""
+        started = time.perf_counter()
+        shard_count = min(self.processes, len(rows) // self.min_alerts_per_process) if self.processes > 1 else 1
+
+        if shard_count > 1:
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            shards = partition(rows, shard_count, self.shard_key)
+            # IPC 로 보내는 양을 줄이기 위해 평가에 쓰지 않는 user_id 는 빼고, 환율도 쓰이는 통화만 보냄
+            used = {code for row in rows for code in (row[2], row[3])}
+            rates = {code: rate for code, rate in usd_rates.items() if code in used}
+            results = await asyncio.gather(*(
+                loop.run_in_executor(pool, evaluate_alerts, [row[:1] + ("",) + row[2:] for row in shard], rates, self.band)
+                for shard in shards
+            ))
+        else:
+            results = [evaluate_alerts(rows, usd_rates, self.band)]
+
+        triggered = sorted((item for shard_triggered, _, _ in results for item in shard_triggered),
+                           key=lambda item: item[0])
+        rearmed = sorted(alert_id for _, shard_rearmed, _ in results for alert_id in shard_rearmed)
+        shard_stats = [stats for _, _, stats in results]
+        self.last_stats = {
+            "mode": "full",
+            "snapshot_version": snapshot_version,
+            "shards": len(shard_stats),
+            "shard_key": self.shard_key,
+            "evaluated": sum(stats["evaluated"] for stats in shard_stats),
+            "triggered": sum(stats["triggered"] for stats in shard_stats),
+            "rearmed": len(rearmed),
+            "skipped": sum(stats["skipped"] for stats in shard_stats),
+            "duration_ms": (time.perf_counter() - started) * 1000,
+            "per_shard": shard_stats,
+        }
+        return triggered, rearmed
+
+    def evaluate_crossings(self, index: AlertIndex, previous_rates: Dict[str, float],
+                           current_rates: Dict[str, float], previous_version: int = 0,
+                           snapshot_version: int = 0) -> Tuple[List[Tuple[str, float]], List[str]]:
+        """스냅샷 변경 시 경계값을 지나간 알림만 평가"""
+        triggered, rearmed, stats = evaluate_crossings(index, previous_rates, current_rates)
+        self.last_stats = {
+            "mode": "crossing",
+            "previous_version": previous_version,
+            "snapshot_version": snapshot_version,
+            "shard_key": self.shard_key,
+            **stats,
+        }
+        return triggered, rearmed
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,17 +1,56 @@
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, List, Optional, Dict, Tuple
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+import time
 import uuid
 from ..models.alert import AlertSetting, AlertSettingCreate, AlertSettingUpdate, NotificationHistory
-from .exchange_rate import ExchangeRateService
+from .bulk_writer import get_bulk_writer
+from .alert_evaluator import AlertEvaluator, AlertIndex, AlertRow, evaluate_alerts, shard_bucket_range
+from .exchange_rate import get_exchange_service
+from .rate_snapshot import RateSnapshot
+from ..config import settings
 from ..database import get_supabase
+from ..utils.streaming import decode_cursor, encode_cursor
 
 class AlertService:
     """알림 설정 관리 서비스"""
     
     def __init__(self):
-        self.supabase = get_supabase()
-        self.exchange_service = ExchangeRateService()
+        self.exchange_service = get_exchange_service()
+        self.alert_settings: Dict[str, AlertSetting] = {}
+        self.evaluator = AlertEvaluator()
+        self._alert_index: Optional[AlertIndex] = None
+        self._near_index: Optional[AlertIndex] = None
+        self.writer = get_bulk_writer()
+        # 사용자별 알림 캐시: user_id -> (적재 시각, {alert_id: AlertSetting}), API 쓰기 시 함께 갱신
+        self._user_alerts: "OrderedDict[str, Tuple[float, Dict[str, AlertSetting]]]" = OrderedDict()
+        # 사용자별 알림 이력 카운터: user_id -> (적재 시각, 전체 건수, 마지막 발송 시각, 최근 7일 발송 시각들)
+        # 두 캐시 모두 프로세스별이라 리더(모니터링) 프로세스의 record_notification/mark_alert_fired 결과는
+        # API 워커에 ALERT_CACHE_TTL 이 지난 뒤 DB 를 다시 읽을 때 반영됨
+        self._notification_counters: Dict[str, Tuple[float, int, Optional[datetime], Deque[datetime]]] = {}
+    
+    @property
+    def supabase(self):
+        return get_supabase()
+    
+    @staticmethod
+    def _to_alert_setting(alert_data: Dict) -> AlertSetting:
+        """DB 행을 AlertSetting 으로 변환"""
+        last_triggered_at = alert_data.get("last_triggered_at")
+        return AlertSetting(
+            id=alert_data["id"],
+            user_id=alert_data["user_id"],
+            currency_from=alert_data["currency_from"],
+            currency_to=alert_data["currency_to"],
+            target_rate=Decimal(str(alert_data["target_rate"])),
+            condition=alert_data["condition"],
+            is_active=alert_data["is_active"],
+            armed=alert_data.get("armed", True),
+            last_triggered_at=datetime.fromisoformat(last_triggered_at) if last_triggered_at else None,
+            created_at=datetime.fromisoformat(alert_data["created_at"]),
+            updated_at=datetime.fromisoformat(alert_data["updated_at"])
+        )
     
     async def create_alert_setting(self, user_id: str, alert_data: AlertSettingCreate) -> AlertSetting:
         """새 알림 설정 생성"""
@@ -25,42 +64,18 @@ class AlertService:
         }
         
         response = self.supabase.table("alert_settings").insert(alert_data_dict).execute()
+        self._invalidate_alert_index()
         
         if response.data:
-            alert_data_response = response.data[0]
-            return AlertSetting(
-                id=alert_data_response["id"],
-                user_id=alert_data_response["user_id"],
-                currency_from=alert_data_response["currency_from"],
-                currency_to=alert_data_response["currency_to"],
-                target_rate=Decimal(str(alert_data_response["target_rate"])),
-                condition=alert_data_response["condition"],
-                is_active=alert_data_response["is_active"],
-                created_at=datetime.fromisoformat(alert_data_response["created_at"]),
-                updated_at=datetime.fromisoformat(alert_data_response["updated_at"])
-            )
+            alert = self._to_alert_setting(response.data[0])
+            self._cache_alert(alert)
+            return alert
         else:
             raise Exception("알림 설정 생성에 실패했습니다")
     
     async def get_user_alerts(self, user_id: str) -> List[AlertSetting]:
-        """사용자의 모든 알림 설정 조회"""
-        response = self.supabase.table("alert_settings").select("*").eq("user_id", user_id).execute()
-        
-        alerts = []
-        for alert_data in response.data:
-            alerts.append(AlertSetting(
-                id=alert_data["id"],
-                user_id=alert_data["user_id"],
-                currency_from=alert_data["currency_from"],
-                currency_to=alert_data["currency_to"],
-                target_rate=Decimal(str(alert_data["target_rate"])),
-                condition=alert_data["condition"],
-                is_active=alert_data["is_active"],
-                created_at=datetime.fromisoformat(alert_data["created_at"]),
-                updated_at=datetime.fromisoformat(alert_data["updated_at"])
-            ))
-        
-        return alerts
+        """사용자의 모든 알림 설정 조회 (캐시에 없거나 ALERT_CACHE_TTL 이 지났을 때만 DB 조회)"""
+        return list((await self._load_user_alerts(user_id)).values())
     
     async def get_alert_by_id(self, alert_id: str) -> Optional[AlertSetting]:
         """ID로 알림 설정 조회"""
@@ -68,141 +83,355 @@ class AlertService:
         
         if response.data:
             alert_data = response.data[0]
-            return AlertSetting(
-                id=alert_data["id"],
-                user_id=alert_data["user_id"],
-                currency_from=alert_data["currency_from"],
-                currency_to=alert_data["currency_to"],
-                target_rate=Decimal(str(alert_data["target_rate"])),
-                condition=alert_data["condition"],
-                is_active=alert_data["is_active"],
-                created_at=datetime.fromisoformat(alert_data["created_at"]),
-                updated_at=datetime.fromisoformat(alert_data["updated_at"])
-            )
+            return self._to_alert_setting(alert_data)
         
         return None
     
-    async def update_alert_setting(self, alert_id: str, update_data: AlertSettingUpdate) -> Optional[AlertSetting]:
-        """알림 설정 수정"""
-        alert = self.alert_settings.get(alert_id)
-        if not alert:
-            return None
-        
-        # 업데이트할 필드만 변경
+    async def get_user_alert(self, user_id: str, alert_id: str) -> Optional[AlertSetting]:
+        """사용자 소유 알림 한 건 조회 (사용자 캐시 사용)"""
+        return (await self._load_user_alerts(user_id)).get(alert_id)
+    
+    async def update_alert_setting(self, alert_id: str, update_data: AlertSettingUpdate,
+                                   user_id: str) -> Optional[AlertSetting]:
+        """알림 설정 수정 (소유자 조건을 UPDATE 에 포함하므로 사전 조회 없음, 없거나 남의 알림이면 None)"""
+        changes = {}
         if update_data.target_rate is not None:
-            alert.target_rate = update_data.target_rate
+            changes["target_rate"] = float(update_data.target_rate)
         if update_data.condition is not None:
-            alert.condition = update_data.condition
+            changes["condition"] = update_data.condition
         if update_data.is_active is not None:
-            alert.is_active = update_data.is_active
+            changes["is_active"] = update_data.is_active
+        if update_data.target_rate is not None or update_data.condition is not None:
+            changes["armed"] = True  # 조건이 바뀌면 다시 무장
+            # 이 프로세스에 쌓인 이전 상태(armed=False 등)가 나중에 저장되며 덮어쓰지 않도록 버림,
+            # 다른 프로세스의 버퍼는 apply_alert_states 가 updated_at 보다 먼저 결정된 상태를 건너뜀
+            self.writer.discard_alert_state(alert_id)
+        changes["updated_at"] = datetime.now(timezone.utc).isoformat()
+        
+        response = self.supabase.table("alert_settings").update(changes).eq(
+            "id", alert_id
+        ).eq("user_id", user_id).execute()
+        if not response.data:
+            return None
         
-        alert.updated_at = datetime.now()
-        self.alert_settings[alert_id] = alert
+        alert = self._to_alert_setting(response.data[0])
+        self._cache_alert(alert)
+        if alert_id in self.alert_settings:
+            self.alert_settings[alert_id] = alert
+        self._invalidate_alert_index()
         return alert
     
-    async def delete_alert_setting(self, alert_id: str) -> bool:
-        """알림 설정 삭제"""
-        response = self.supabase.table("alert_settings").delete().eq("id", alert_id).execute()
-        return len(response.data) > 0
+    async def delete_alert_setting(self, alert_id: str, user_id: str) -> bool:
+        """알림 설정 삭제 (소유자 조건을 DELETE 에 포함)"""
+        response = self.supabase.table("alert_settings").delete().eq("id", alert_id).eq("user_id", user_id).execute()
+        if not response.data:
+            return False
+        
+        cached = self._user_alerts.get(user_id)
+        if cached is not None:
+            cached[1].pop(alert_id, None)
+        self.alert_settings.pop(alert_id, None)
+        self._invalidate_alert_index()
+        return True
+    
+    async def _load_user_alerts(self, user_id: str) -> Dict[str, AlertSetting]:
+        cached = self._user_alerts.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < settings.alert_cache_ttl:
+            self._user_alerts.move_to_end(user_id)
+            return cached[1]
+        
+        response = self.supabase.table("alert_settings").select("*").eq("user_id", user_id).execute()
+        alerts = {row["id"]: self._to_alert_setting(row) for row in response.data}
+        self._user_alerts[user_id] = (time.monotonic(), alerts)
+        self._user_alerts.move_to_end(user_id)
+        while len(self._user_alerts) > settings.alert_cache_max_users:
+            self._user_alerts.popitem(last=False)
+        return alerts
+    
+    def _cache_alert(self, alert: AlertSetting) -> None:
+        """쓰기 결과를 사용자 캐시에 반영 (캐시에 적재된 사용자만)"""
+        cached = self._user_alerts.get(alert.user_id)
+        if cached is not None:
+            cached[1][alert.id] = alert
+    
+    async def get_active_alerts(self, shard_index: Optional[int] = None,
+                                shard_count: int = 1) -> List[AlertSetting]:
+        """활성화된 알림 설정 조회 (shard_count > 1 이면 shard_index 샤드의 버킷 범위만 DB 에서 읽음)"""
+        query = self.supabase.table("alert_settings").select("*").eq("is_active", True)
+        if shard_count > 1:
+            column = "user_bucket" if self.evaluator.shard_key == "user_id" else "alert_bucket"
+            low, high = shard_bucket_range(shard_index or 0, shard_count)
+            query = query.gte(column, low).lt(column, high)
+        response = query.execute()
+        
+        alerts = []
+        for alert_data in response.data:
+            alert = self._to_alert_setting(alert_data)
+            self.alert_settings[alert.id] = alert
+            alerts.append(alert)
+        
+        return alerts
     
-    async def get_active_alerts(self) -> List[AlertSetting]:
-        """활성화된 모든 알림 설정 조회"""
+    async def _active_alert_rows(self, shard_index: Optional[int] = None,
+                                 shard_count: Optional[int] = None) -> List[AlertRow]:
+        """평가용 활성 알림 행 (shard_count > 1 이면 shard_index 샤드에 속한 알림만)"""
+        shard_index = settings.alert_shard_index if shard_index is None else shard_index
+        shard_count = settings.alert_shard_count if shard_count is None else shard_count
+        active_alerts = await self.get_active_alerts(shard_index, shard_count)
+        
         return [
-            alert for alert in self.alert_settings.values() 
-            if alert.is_active
+            (alert.id, alert.user_id, alert.currency_from, alert.currency_to,
+             float(alert.target_rate), alert.condition, alert.armed)
+            for alert in active_alerts
         ]
     
-    async def check_alert_conditions(self) -> List[Dict]:
-        """알림 조건 확인 및 발송할 알림 목록 반환"""
-        triggered_alerts = []
-        active_alerts = await self.get_active_alerts()
-        
-        for alert in active_alerts:
-            try:
-                # 현재 환율 조회
-                current_rate = await self.exchange_service.get_conversion_rate(
-                    alert.currency_from, 
-                    alert.currency_to
-                )
-                
-                # 조건 확인
-                should_trigger = False
-                if alert.condition == 'above' and current_rate >= float(alert.target_rate):
-                    should_trigger = True
-                elif alert.condition == 'below' and current_rate <= float(alert.target_rate):
-                    should_trigger = True
-                
-                if should_trigger:
-                    # 최근에 같은 알림을 보냈는지 확인 (중복 방지)
-                    recent_notification = self._check_recent_notification(alert.id)
-                    if not recent_notification:
-                        triggered_alerts.append({
-                            'alert': alert,
-                            'current_rate': current_rate,
-                            'triggered_at': datetime.now()
-                        })
-                        
-            except Exception as e:
-                print(f"알림 확인 중 오류 ({alert.id}): {e}")
-        
-        return triggered_alerts
-    
-    def _check_recent_notification(self, alert_id: str, hours: int = 1) -> bool:
-        """최근 지정된 시간 내에 알림을 보냈는지 확인"""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        for notification in self.notification_history:
-            if (notification.alert_setting_id == alert_id and 
-                notification.sent_at > cutoff_time):
-                return True
-        return False
+    async def check_alert_conditions(self, shard_index: Optional[int] = None,
+                                     shard_count: Optional[int] = None) -> List[Dict]:
+        """현재 환율에서 발송 대상이 되는 알림 목록만 반환 (상태·인덱스는 바꾸지 않음, 수동 확인용)"""
+        _, matched, _ = await self._evaluate_active_alerts(shard_index, shard_count)
+        return self._to_triggered(matched)
+    
+    async def sweep_alerts(self, shard_index: Optional[int] = None,
+                           shard_count: Optional[int] = None) -> List[Dict]:
+        """전체 알림 평가 후 재무장 상태를 저장하고 교차 평가용 인덱스를 교체, 발송할 알림 목록 반환
+        
+        shard_count > 1 이면 shard_index 샤드에 속한 알림만 평가합니다 (인스턴스 간 분할).
+        """
+        rows, matched, rearmed = await self._evaluate_active_alerts(shard_index, shard_count)
+        # 이번 스윕에서 현재 환율로 평가한 알림들이므로 교차 평가 때 새 알림으로 다시 볼 필요 없음
+        self._alert_index = AlertIndex(rows, self.evaluator.band)
+        await self.rearm_alerts(rearmed)
+        return self._to_triggered(matched)
+    
+    async def _evaluate_active_alerts(self, shard_index: Optional[int],
+                                      shard_count: Optional[int]) -> Tuple[List[AlertRow], List, List[str]]:
+        """활성 알림 전체를 현재 스냅샷으로 평가해 (행, 트리거, 재무장) 반환"""
+        # 이번 주기의 모든 알림은 같은 스냅샷 버전으로 평가
+        snapshot = await self.exchange_service.get_snapshot()
+        rows = await self._active_alert_rows(shard_index, shard_count)
+        matched, rearmed = await self.evaluator.evaluate(rows, snapshot.usd_rates, snapshot.version)
+        self.evaluator.last_stats.update(
+            shard_index=settings.alert_shard_index if shard_index is None else shard_index,
+            shard_count=settings.alert_shard_count if shard_count is None else shard_count,
+        )
+        return rows, matched, rearmed
+    
+    async def check_crossed_alerts(self, previous: RateSnapshot, current: RateSnapshot) -> List[Dict]:
+        """스냅샷이 바뀌었을 때 목표 환율을 지나간 알림만 확인
+        
+        알림 인덱스는 ALERT_INDEX_TTL 마다 다시 읽고, 그 사이 새로 생긴 알림은 현재 환율로 한 번 평가합니다.
+        """
+        index = self._alert_index
+        new_rows: List[AlertRow] = []
+        if index is None or time.monotonic() - index.built_at > settings.alert_index_ttl:
+            rows = await self._active_alert_rows()
+            known = index.rows if index else {}
+            new_rows = [row for row in rows if row[0] not in known]
+            index = self._alert_index = AlertIndex(rows, self.evaluator.band)
+        
+        matched, rearmed = self.evaluator.evaluate_crossings(
+            index, previous.usd_rates, current.usd_rates, previous.version, current.version
+        )
+        if new_rows:
+            new_matched, new_rearmed, _ = evaluate_alerts(new_rows, current.usd_rates, self.evaluator.band)
+            matched_ids = {alert_id for alert_id, _ in matched}
+            matched = sorted(matched + [item for item in new_matched if item[0] not in matched_ids])
+            rearmed = sorted(set(rearmed) | set(new_rearmed))
+            self.evaluator.last_stats["new_alerts"] = len(new_rows)
+        await self.rearm_alerts(rearmed)
+        return self._to_triggered(matched)
+    
+    async def pairs_near_threshold(self, usd_rates: Dict[str, float], proximity: float) -> List[Tuple[str, str]]:
+        """목표 환율 근처(±proximity)에 무장 알림이 있는 통화쌍 (추가 갱신 판단용)
+        
+        평가용 인덱스가 없거나 오래되었으면 별도 인덱스를 읽어 씁니다.
+        (평가용 인덱스를 여기서 교체하면 check_crossed_alerts 가 새 알림을 놓칠 수 있음)
+        """
+        index = self._alert_index
+        if index is None or time.monotonic() - index.built_at > settings.alert_index_ttl:
+            index = self._near_index
+            if index is None or time.monotonic() - index.built_at > settings.alert_index_ttl:
+                index = self._near_index = AlertIndex(await self._active_alert_rows(), self.evaluator.band)
+        return index.near(usd_rates, proximity)
+    
+    async def mark_alert_fired(self, alert_id: str, triggered_at: Optional[datetime] = None) -> None:
+        """알림 발송 후 상태를 fired 로 저장 (환율이 재무장 구간으로 돌아올 때까지 평가 제외)"""
+        triggered_at = triggered_at or datetime.now(timezone.utc)
+        self.writer.add_alert_state(alert_id, False, triggered_at.isoformat())
+        
+        alert = self.alert_settings.get(alert_id)
+        if alert is not None:
+            alert.armed = False
+            alert.last_triggered_at = triggered_at
+            self._cache_alert(alert)
+        if self._alert_index is not None:
+            self._alert_index.set_armed([alert_id], False)
+    
+    async def rearm_alerts(self, alert_ids: List[str]) -> None:
+        """환율이 재무장 구간으로 돌아온 알림들을 armed 로 저장"""
+        for alert_id in alert_ids:
+            self.writer.add_alert_state(alert_id, True)
+            alert = self.alert_settings.get(alert_id)
+            if alert is not None:
+                alert.armed = True
+                self._cache_alert(alert)
+        if self._alert_index is not None:
+            self._alert_index.set_armed(alert_ids, True)
+    
+    def _invalidate_alert_index(self) -> None:
+        """알림이 바뀌었으므로 다음 교차 평가 때 인덱스를 다시 읽도록 표시"""
+        if self._alert_index is not None:
+            self._alert_index.built_at = float("-inf")
+    
+    def _to_triggered(self, matched) -> List[Dict]:
+        """(alert_id, 현재 환율) 목록을 발송 대상으로 변환"""
+        triggered_at = datetime.now(timezone.utc)
+        return [
+            {
+                'alert': self.alert_settings[alert_id],
+                'current_rate': current_rate,
+                'triggered_at': triggered_at
+            }
+            for alert_id, current_rate in matched
+        ]
     
     async def record_notification(self, alert_setting_id: str, triggered_rate: float, 
-                                notification_type: str = 'email') -> NotificationHistory:
-        """알림 발송 이력 기록"""
+                                notification_type: str = 'email',
+                                user_id: Optional[str] = None) -> NotificationHistory:
+        """알림 발송 이력 기록 (DB 저장은 일괄 저장기가 모아서 처리)"""
+        if user_id is None:
+            user_id = self.alert_settings[alert_setting_id].user_id
+        
         notification = NotificationHistory(
             id=str(uuid.uuid4()),
-            user_id=self.alert_settings[alert_setting_id].user_id,
+            user_id=user_id,
             alert_setting_id=alert_setting_id,
             triggered_rate=Decimal(str(triggered_rate)),
             notification_type=notification_type,
-            sent_at=datetime.now()
+            sent_at=datetime.now(timezone.utc)
         )
         
-        self.notification_history.append(notification)
+        self.writer.add_notification({
+            "id": notification.id,
+            "user_id": notification.user_id,
+            "alert_setting_id": notification.alert_setting_id,
+            "triggered_rate": float(notification.triggered_rate),
+            "notification_type": notification.notification_type,
+            "sent_at": notification.sent_at.isoformat()
+        })
+        
+        counters = self._notification_counters.get(user_id)
+        if counters is not None:
+            loaded_at, total, _, recent = counters
+            recent.append(notification.sent_at)
+            self._notification_counters[user_id] = (loaded_at, total + 1, notification.sent_at, recent)
         return notification
     
     async def get_user_notification_history(self, user_id: str, limit: int = 50) -> List[NotificationHistory]:
-        """사용자의 알림 이력 조회"""
-        user_notifications = [
-            notification for notification in self.notification_history
-            if notification.user_id == user_id
-        ]
+        """사용자의 알림 이력 조회 (최신순)"""
+        notifications, _ = await self.get_notification_page(user_id, limit)
+        return notifications
+    
+    async def get_notification_page(self, user_id: str, limit: int = 50,
+                                    cursor: Optional[str] = None) -> Tuple[List[NotificationHistory], Optional[str]]:
+        """알림 이력 한 페이지와 다음 페이지 커서 반환
+        
+        (user_id, sent_at DESC, id DESC) 인덱스를 따라 마지막 행 다음부터 읽는 키셋 방식이라
+        이력이 아무리 많아도 페이지당 비용이 일정합니다.
+        """
+        query = self.supabase.table("notification_history").select("*").eq("user_id", user_id)
+        if cursor:
+            position = decode_cursor(cursor)
+            sent_at, last_id = position["t"], position["i"]
+            query = query.or_(f"sent_at.lt.{sent_at},and(sent_at.eq.{sent_at},id.lt.{last_id})")
+        response = query.order("sent_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
         
-        # 최신순 정렬
-        user_notifications.sort(key=lambda x: x.sent_at, reverse=True)
-        return user_notifications[:limit]
+        rows = response.data
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor({"t": rows[-1]["sent_at"], "i": rows[-1]["id"]})
+        
+        notifications = [
+            NotificationHistory(
+                id=row["id"],
+                user_id=row["user_id"],
+                alert_setting_id=row["alert_setting_id"],
+                triggered_rate=Decimal(str(row["triggered_rate"])),
+                notification_type=row["notification_type"],
+                sent_at=datetime.fromisoformat(row["sent_at"])
+            )
+            for row in rows
+        ]
+        return notifications, next_cursor
+    
+    async def iter_notification_history(self, user_id: str, page_size: int = 1000) -> AsyncIterator[Dict]:
+        """내보내기용: 전체 알림 이력을 페이지 단위로 읽어 한 행씩 반환 (메모리는 한 페이지분만 사용)"""
+        cursor = None
+        while True:
+            notifications, cursor = await self.get_notification_page(user_id, page_size, cursor)
+            for notification in notifications:
+                yield {
+                    "id": notification.id,
+                    "alert_setting_id": notification.alert_setting_id,
+                    "triggered_rate": float(notification.triggered_rate),
+                    "notification_type": notification.notification_type,
+                    "sent_at": notification.sent_at.isoformat()
+                }
+            if cursor is None:
+                break
     
     async def get_alert_statistics(self, user_id: str) -> Dict:
-        """사용자 알림 통계"""
+        """사용자 알림 통계 (알림은 사용자 캐시, 발송 이력은 증분 카운터 사용)"""
         user_alerts = await self.get_user_alerts(user_id)
-        user_notifications = await self.get_user_notification_history(user_id)
+        total_notifications, last_sent_at, recent = await self._load_notification_counters(user_id)
         
         active_count = sum(1 for alert in user_alerts if alert.is_active)
         inactive_count = len(user_alerts) - active_count
         
-        # 최근 7일간 알림 수
-        week_ago = datetime.now() - timedelta(days=7)
-        recent_notifications = [
-            n for n in user_notifications 
-            if n.sent_at > week_ago
-        ]
+        # 최근 7일간 알림 수 (기간이 지난 발송 시각은 버림)
+        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
+        while recent and recent[0] <= week_ago:
+            recent.popleft()
         
         return {
             "total_alerts": len(user_alerts),
             "active_alerts": active_count,
             "inactive_alerts": inactive_count,
-            "total_notifications": len(user_notifications),
-            "recent_notifications": len(recent_notifications),
-            "last_notification": user_notifications[0].sent_at if user_notifications else None
-        }
\ No newline at end of file
+            "total_notifications": total_notifications,
+            "recent_notifications": len(recent),
+            "last_notification": last_sent_at
+        }
+    
+    async def _load_notification_counters(self, user_id: str) -> Tuple[int, Optional[datetime], Deque[datetime]]:
+        """전체 발송 건수, 마지막 발송 시각, 최근 7일 발송 시각 (적재 후에는 record_notification 이 갱신)"""
+        counters = self._notification_counters.get(user_id)
+        if counters is not None and time.monotonic() - counters[0] < settings.alert_cache_ttl:
+            return counters[1:]
+        
+        # 두 쿼리 모두 (user_id, sent_at DESC) 인덱스만 사용: 건수+마지막 1행, 최근 7일 범위
+        latest = self.supabase.table("notification_history").select(
+            "sent_at", count="exact"
+        ).eq("user_id", user_id).order("sent_at", desc=True).limit(1).execute()
+        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
+        response = self.supabase.table("notification_history").select("sent_at").eq(
+            "user_id", user_id
+        ).gt("sent_at", week_ago.isoformat()).order("sent_at").execute()
+        
+        total = latest.count or 0
+        last_sent_at = datetime.fromisoformat(latest.data[0]["sent_at"]) if latest.data else None
+        recent = deque(datetime.fromisoformat(row["sent_at"]) for row in response.data)
+        self._notification_counters[user_id] = (time.monotonic(), total, last_sent_at, recent)
+        if len(self._notification_counters) > settings.alert_cache_max_users:
+            self._notification_counters.pop(next(iter(self._notification_counters)))
+        return total, last_sent_at, recent
+
+
+_alert_service: Optional[AlertService] = None
+
+def get_alert_service() -> AlertService:
+    """알림 설정 서비스 인스턴스 반환 (최초 호출 시 생성)"""
+    global _alert_service
+    if _alert_service is None:
+        _alert_service = AlertService()
+    return _alert_service
@@ -0,0 +1,211 @@
+"""
+알림 결과 일괄 저장기
+
+모니터링 주기 동안 생긴 알림 발송 이력(notification_history)과 알림 상태 변경(alert_settings.armed)을
+모아 두었다가 한 번에 저장합니다. 발송 건수와 무관하게 주기당 DB 호출 수가 거의 일정합니다.
+- notification_history: id 기준 다중 행 UPSERT 1회 (중복은 무시하므로 재시도해도 한 번만 저장)
+- alert_settings: apply_alert_states RPC로 여러 행 UPDATE 1회
+  (상태마다 결정 시각을 함께 보내, 그 뒤에 사용자가 수정한 알림(updated_at 이 더 늦음)은 덮어쓰지 않음)
+건수(max_batch) 또는 시간(max_delay)이 차면 저장하고, 종료 시 남은 데이터를 반드시 저장합니다.
+
+행 데이터 오류(SQLSTATE 22xxx/23xxx, 예: FK 위반·잘못된 UUID)로 배치가 실패하면 반씩 나눠 다시 저장해
+문제 행만 버립니다. 연결 끊김 같은 일시 오류는 배치 전체를 다음 주기에 재시도하되,
+행마다 max_attempts 번까지만 시도합니다.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..database import get_supabase
+
+logger = logging.getLogger(__name__)
+
+
+def is_row_error(error: Exception) -> bool:
+    """재시도해도 성공할 수 없는 행 데이터 오류인지 (PostgREST APIError 의 SQLSTATE 22xxx/23xxx)"""
+    code = str(getattr(error, "code", "") or "")
+    return code[:2] in ("22", "23")
+
+
+class BulkWriter:
+    """알림 발송 이력/상태 변경 버퍼"""
+
+    def __init__(self, max_batch: Optional[int] = None, max_delay: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        self.max_batch = max_batch if max_batch is not None else settings.bulk_write_max_batch
+        self.max_delay = max_delay if max_delay is not None else settings.bulk_write_max_delay
+        self.max_attempts = max_attempts if max_attempts is not None else settings.bulk_write_max_attempts
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._notifications: List[Dict] = []
+        # alert_id -> (armed, last_triggered_at, 결정 시각)
+        self._alert_states: Dict[str, Tuple[bool, Optional[str], str]] = {}
+        # 일시 오류로 재시도 중인 행의 시도 횟수: 이력 id 또는 알림 id -> 횟수
+        self._attempts: Dict[str, int] = {}
+        # 일시 오류 직후에는 건수가 차도 바로 다시 저장하지 않고 다음 주기까지 기다림
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"flushes": 0, "notifications_written": 0, "alert_states_written": 0, "failures": 0,
+                      "dropped": 0}
+
+    @property
+    def pending(self) -> int:
+        return len(self._notifications) + len(self._alert_states)
+
+    def add_notification(self, row: Dict) -> None:
+        with self._lock:
+            self._notifications.append(row)
+        self._flush_if_full()
+
+    def add_alert_state(self, alert_id: str, armed: bool, last_triggered_at: Optional[str] = None) -> None:
+        """같은 알림의 상태가 여러 번 바뀌면 마지막 값만 저장"""
+        decided_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._alert_states[alert_id] = (armed, last_triggered_at, decided_at)
+        self._flush_if_full()
+
+    def discard_alert_state(self, alert_id: str) -> None:
+        """아직 저장하지 않은 알림 상태 변경을 버림 (사용자가 같은 알림을 직접 수정할 때)"""
+        with self._lock:
+            self._alert_states.pop(alert_id, None)
+            self._attempts.pop(alert_id, None)
+
+    def _flush_if_full(self) -> None:
+        if self.pending >= self.max_batch and time.monotonic() >= self._retry_at:
+            self.flush()
+
+    def flush(self) -> None:
+        """버퍼의 내용을 저장 (일시 오류면 다음 저장 때 다시 시도, 데이터 오류 행은 버림)"""
+        with self._flush_lock:
+            with self._lock:
+                notifications, self._notifications = self._notifications, []
+                alert_states, self._alert_states = self._alert_states, {}
+            if not notifications and not alert_states:
+                return
+
+            failed = False
+            if notifications:
+                try:
+                    rejected = self._write_isolating(notifications, self._write_notifications)
+                    self.stats["notifications_written"] += len(notifications) - len(rejected)
+                    self._settle([row["id"] for row in notifications])
+                except Exception as e:
+                    failed = True
+                    logger.error(f"알림 발송 이력 저장 실패 (다음 주기에 재시도): {e}")
+                    self._requeue_notifications(notifications)
+            if alert_states:
+                states = [
+                    {"id": alert_id, "armed": armed, "last_triggered_at": last_triggered_at, "decided_at": decided_at}
+                    for alert_id, (armed, last_triggered_at, decided_at) in alert_states.items()
+                ]
+                try:
+                    rejected = self._write_isolating(states, self._write_alert_states)
+                    self.stats["alert_states_written"] += len(states) - len(rejected)
+                    self._settle(list(alert_states))
+                except Exception as e:
+                    failed = True
+                    logger.error(f"알림 상태 저장 실패 (다음 주기에 재시도): {e}")
+                    self._requeue_alert_states(alert_states)
+            if failed:
+                self.stats["failures"] += 1
+                self._retry_at = time.monotonic() + self.max_delay
+            else:
+                self.stats["flushes"] += 1
+
+    def _write_isolating(self, rows: List[Dict], write: Callable[[List[Dict]], None]) -> List[Dict]:
+        """rows 저장, 행 데이터 오류면 반씩 나눠 다시 저장하고 끝내 실패한 행을 버린 뒤 반환 (일시 오류는 그대로 전달)"""
+        try:
+            write(rows)
+            return []
+        except Exception as e:
+            if not is_row_error(e):
+                raise
+            if len(rows) == 1:
+                self.stats["dropped"] += 1
+                logger.error(f"알림 결과 저장 불가 행 폐기 (id={rows[0].get('id')}): {e}")
+                return rows
+        middle = len(rows) // 2
+        return self._write_isolating(rows[:middle], write) + self._write_isolating(rows[middle:], write)
+
+    def _settle(self, ids: List[str]) -> None:
+        """저장(또는 폐기)이 끝난 행의 재시도 횟수 정리"""
+        if self._attempts:
+            with self._lock:
+                for row_id in ids:
+                    self._attempts.pop(row_id, None)
+
+    def _charge(self, row_id: str) -> bool:
+        """재시도 횟수 1 증가, 한도에 도달하면 False (호출 측에서 버림)"""
+        attempts = self._attempts.get(row_id, 0) + 1
+        if attempts >= self.max_attempts:
+            self._attempts.pop(row_id, None)
+            self.stats["dropped"] += 1
+            return False
+        self._attempts[row_id] = attempts
+        return True
+
+    def _requeue_notifications(self, notifications: List[Dict]) -> None:
+        with self._lock:
+            kept = [row for row in notifications if self._charge(row["id"])]
+            self._notifications[:0] = kept
+        if len(kept) < len(notifications):
+            logger.error(f"재시도 한도({self.max_attempts}회)를 넘긴 알림 발송 이력 {len(notifications) - len(kept)}건 폐기")
+
+    def _requeue_alert_states(self, alert_states: Dict[str, Tuple[bool, Optional[str], str]]) -> None:
+        dropped = 0
+        with self._lock:
+            for alert_id, state in alert_states.items():
+                if alert_id in self._alert_states:
+                    # 실패하는 동안 새 상태가 들어왔으면 새 값이 우선
+                    continue
+                if self._charge(alert_id):
+                    self._alert_states[alert_id] = state
+                else:
+                    dropped += 1
+        if dropped:
+            logger.error(f"재시도 한도({self.max_attempts}회)를 넘긴 알림 상태 {dropped}건 폐기")
+
+    def _write_notifications(self, rows: List[Dict]) -> None:
+        get_supabase().table("notification_history").upsert(
+            rows, on_conflict="id", ignore_duplicates=True
+        ).execute()
+
+    def _write_alert_states(self, states: List[Dict]) -> None:
+        get_supabase().rpc("apply_alert_states", {"p_states": states}).execute()
+
+    def start(self) -> None:
+        """max_delay 마다 저장하는 백그라운드 스레드 시작"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_flush_loop, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def stop(self) -> None:
+        """백그라운드 저장 중지 후 남은 데이터 저장"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+    def _run_flush_loop(self) -> None:
+        while not self._stop.wait(self.max_delay):
+            self.flush()
+
+
+_bulk_writer: Optional[BulkWriter] = None
+
+def get_bulk_writer() -> BulkWriter:
+    """알림 결과 일괄 저장기 인스턴스 반환"""
+    global _bulk_writer
+    if _bulk_writer is None:
+        _bulk_writer = BulkWriter()
+    return _bulk_writer
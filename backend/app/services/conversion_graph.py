@@ -0,0 +1,81 @@
+"""
+통화 변환 그래프
+
+저장된 환율(통화쌍)을 그래프의 간선으로 보고, 스냅샷마다 Floyd–Warshall 로 모든 통화쌍의
+최소 경유(hop) 경로와 변환 계수를 미리 계산합니다. 이후 변환은 딕셔너리 조회 한 번입니다.
+- 저장된 방향의 환율은 그대로, 반대 방향은 역수로 간선을 만듭니다 (저장된 방향이 우선).
+- 경유 수가 같은 경로가 여럿이면 통화 코드 순으로 먼저 찾은 경로를 사용하므로 결과가 항상 같습니다.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (변환 계수, 경로) 예: (0.00598, ("JPY", "KRW", "EUR"))
+ConversionPath = Tuple[float, Tuple[str, ...]]
+
+
+class ConversionGraph:
+    """모든 통화쌍의 변환 계수/경로 (불변, 통화 수 N 에 대해 O(N^3) 로 한 번 계산)"""
+
+    def __init__(self, rates: Iterable[Tuple[str, str, float]]):
+        edges: Dict[Tuple[str, str], float] = {}
+        for currency_from, currency_to, rate in rates:
+            if currency_from == currency_to or not rate:
+                continue
+            edges[(currency_from, currency_to)] = float(rate)
+        for (currency_from, currency_to), rate in list(edges.items()):
+            edges.setdefault((currency_to, currency_from), 1.0 / rate)
+
+        self.currencies: Tuple[str, ...] = tuple(sorted({code for pair in edges for code in pair}))
+        self.edges = edges
+        self._paths: Dict[Tuple[str, str], ConversionPath] = self._all_pairs()
+
+    def _all_pairs(self) -> Dict[Tuple[str, str], ConversionPath]:
+        codes = self.currencies
+        n = len(codes)
+        index = {code: i for i, code in enumerate(codes)}
+        unreachable = n + 1
+        hops: List[List[int]] = [[0 if i == j else unreachable for j in range(n)] for i in range(n)]
+        next_hop: List[List[Optional[int]]] = [[i if i == j else None for j in range(n)] for i in range(n)]
+        for currency_from, currency_to in self.edges:
+            i, j = index[currency_from], index[currency_to]
+            hops[i][j] = 1
+            next_hop[i][j] = j
+
+        for k in range(n):
+            hops_k = hops[k]
+            for i in range(n):
+                hops_ik = hops[i][k]
+                if hops_ik >= unreachable:
+                    continue
+                hops_i, next_i = hops[i], next_hop[i]
+                for j in range(n):
+                    candidate = hops_ik + hops_k[j]
+                    if candidate < hops_i[j]:
+                        hops_i[j] = candidate
+                        next_i[j] = next_i[k]
+
+        paths: Dict[Tuple[str, str], ConversionPath] = {}
+        for i in range(n):
+            for j in range(n):
+                if next_hop[i][j] is None:
+                    continue
+                path = [i]
+                factor = 1.0
+                while path[-1] != j:
+                    step = next_hop[path[-1]][j]
+                    factor *= self.edges[(codes[path[-1]], codes[step])]
+                    path.append(step)
+                paths[(codes[i], codes[j])] = (factor, tuple(codes[p] for p in path))
+        return paths
+
+    def lookup(self, from_currency: str, to_currency: str) -> ConversionPath:
+        """(변환 계수, 경로) 반환 (경로가 없으면 KeyError)"""
+        if from_currency == to_currency:
+            return 1.0, (from_currency,)
+        path = self._paths.get((from_currency, to_currency))
+        if path is None:
+            raise KeyError(f"{from_currency}에서 {to_currency}로의 환율을 찾을 수 없습니다")
+        return path
+
+    def __len__(self) -> int:
+        return len(self._paths)
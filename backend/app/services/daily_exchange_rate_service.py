@@ -1,20 +1,28 @@
 import asyncio
+import time
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import logging
 
+from ..config import settings
 from ..database import get_supabase
 from ..models.daily_exchange_rate import DailyExchangeRate, DailyExchangeRateCreate
-from .exchange_rate import ExchangeRateService
+from .conversion_graph import ConversionGraph
+from .exchange_rate import get_exchange_service
 
 logger = logging.getLogger(__name__)
 
 
 class DailyExchangeRateService:
     def __init__(self):
-        self.supabase = get_supabase()
-        self.exchange_service = ExchangeRateService()
+        self.exchange_service = get_exchange_service()
+        self._conversion_graph: Optional[Tuple[tuple, ConversionGraph]] = None
+        self._data_version: Optional[Tuple[float, Optional[str]]] = None  # (읽은 시각, 데이터 버전)
+    
+    @property
+    def supabase(self):
+        return get_supabase()
         
     async def store_daily_rates(self, target_date: Optional[date] = None) -> bool:
         """매일 환율을 조회하고 DB에 저장"""
@@ -23,7 +31,7 @@ class DailyExchangeRateService:
                 target_date = date.today()
             
             # 이미 해당 날짜의 데이터가 있는지 확인
-            existing_data = self.supabase.table("daily_exchange_rates").select("*").eq("date", target_date.isoformat()).execute()
+            existing_data = self.supabase.table("daily_exchange_rates").select("id").eq("date", target_date.isoformat()).limit(1).execute()
             
             if existing_data.data:
                 logger.info(f"Daily rates for {target_date} already exist")
@@ -37,8 +45,10 @@ class DailyExchangeRateService:
                 logger.error("Failed to fetch current exchange rates")
                 return False
             
-            # 전일 데이터 조회
+            # 전일 데이터 조회 (대상 통화 전체를 한 번에)
             previous_date = target_date - timedelta(days=1)
+            previous_rows = self.supabase.table("daily_exchange_rates").select("currency_from, rate").eq("currency_to", "KRW").eq("date", previous_date.isoformat()).execute()
+            previous_rates = {row['currency_from']: row['rate'] for row in previous_rows.data or []}
             
             stored_rates = []
             target_currencies = ['USD', 'JPY', 'EUR', 'CNY']
@@ -58,15 +68,12 @@ class DailyExchangeRateService:
                     else:
                         continue
                     
-                # 전일 환율 조회
-                previous_rate_data = self.supabase.table("daily_exchange_rates").select("rate").eq("currency_from", currency_from).eq("currency_to", "KRW").eq("date", previous_date.isoformat()).execute()
-                
                 previous_rate = None
                 change_amount = None
                 change_percentage = None
                 
-                if previous_rate_data.data:
-                    previous_rate = Decimal(str(previous_rate_data.data[0]['rate']))
+                if currency_from in previous_rates:
+                    previous_rate = Decimal(str(previous_rates[currency_from]))
                     change_amount = Decimal(str(rate)) - previous_rate
                     if previous_rate != 0:
                         change_percentage = (change_amount / previous_rate) * 100
@@ -84,8 +91,9 @@ class DailyExchangeRateService:
                 
                 stored_rates.append(rate_dict)
             
-            # DB에 저장
-            result = self.supabase.table("daily_exchange_rates").insert(stored_rates).execute()
+            # DB에 저장 (latest_exchange_rates 도 같은 트랜잭션에서 갱신)
+            result = self.supabase.rpc("store_daily_exchange_rates", {"p_rates": stored_rates}).execute()
+            self.invalidate_data_version()
             
             if result.data:
                 logger.info(f"Successfully stored {len(stored_rates)} daily exchange rates for {target_date}")
@@ -117,138 +125,91 @@ class DailyExchangeRateService:
             logger.error(f"Error fetching daily exchange rates: {e}")
             return []
     
-    async def get_latest_rates_with_changes(self) -> tuple[List[DailyExchangeRate], bool]:
-        """최신 환율 데이터 및 변동률 조회 (실시간 API 실패 시 저장된 데이터로 폴백)"""
+    async def get_latest_rates(self) -> Tuple[List[DailyExchangeRate], bool]:
+        """최신 일일 환율 조회 (latest_exchange_rates 한 번 읽기, 업스트림 호출/저장 없음)
+
+        오늘 환율 저장은 모니터링 스케줄러가 맡고, 반환하는 bool 은 최신 날짜가 오늘인지 여부입니다.
+        """
         try:
-            # 먼저 오늘 날짜로 실시간 데이터 저장 시도
-            today = date.today()
-            store_success = await self.store_daily_rates(today)
-            
-            # 저장 성공 여부와 관계없이 최신 데이터 조회
-            latest_date_result = self.supabase.table("daily_exchange_rates").select("date").order("date", desc=True).limit(1).execute()
-            
-            if not latest_date_result.data:
-                # 저장된 데이터가 전혀 없으면 테스트 데이터 삽입
-                await self._insert_test_data()
-                # 다시 조회
-                latest_date_result = self.supabase.table("daily_exchange_rates").select("date").order("date", desc=True).limit(1).execute()
-                if not latest_date_result.data:
-                    return [], store_success
-            
-            latest_date = latest_date_result.data[0]['date']
-            
-            # 최신 날짜의 모든 환율 데이터 조회
-            result = self.supabase.table("daily_exchange_rates").select("*").eq("date", latest_date).execute()
-            
-            if result.data:
-                rates = [DailyExchangeRate(**item) for item in result.data]
-                return rates, store_success
-            else:
-                return [], store_success
-                
+            rows = self.supabase.table("latest_exchange_rates").select("*").execute().data
+            if not rows:
+                return [], False
+            # 통화쌍마다 최신 날짜가 다를 수 있으므로 가장 최근 날짜의 환율만 사용
+            latest_date = max(row['date'] for row in rows)
+            rates = [DailyExchangeRate(**row) for row in rows if row['date'] == latest_date]
+            return rates, latest_date == date.today().isoformat()
         except Exception as e:
-            logger.error(f"Error fetching latest exchange rates with changes: {e}")
-            # 예외 발생 시에도 저장된 데이터라도 조회 시도
-            try:
-                latest_date_result = self.supabase.table("daily_exchange_rates").select("date").order("date", desc=True).limit(1).execute()
-                if latest_date_result.data:
-                    latest_date = latest_date_result.data[0]['date']
-                    result = self.supabase.table("daily_exchange_rates").select("*").eq("date", latest_date).execute()
-                    if result.data:
-                        rates = [DailyExchangeRate(**item) for item in result.data]
-                        return rates, False  # 실시간 업데이트 실패
+            logger.error(f"Error fetching latest exchange rates: {e}")
+            return [], False
+
+    def get_data_version(self) -> Optional[str]:
+        """저장된 일일 환율의 마지막 변경 시각 (DB 기반 응답의 ETag 용, 저장된 데이터가 없으면 None)"""
+        rows = self.supabase.table("daily_exchange_rates").select("updated_at").order(
+            "updated_at", desc=True
+        ).limit(1).execute().data
+        version = rows[0]["updated_at"] if rows else None
+        self._data_version = (time.monotonic(), version)
+        return version
+
+    def cached_data_version(self) -> Tuple[bool, Optional[str]]:
+        """DB 를 읽지 않고 DAILY_DATA_VERSION_TTL 안에 읽어 둔 데이터 버전 반환 ((있는지 여부, 버전))
+
+        이 프로세스에서 저장하면 바로 비우고, 다른 인스턴스의 저장은 TTL 이 지난 뒤 반영됩니다.
+        """
+        cached = self._data_version
+        if cached is None or time.monotonic() - cached[0] >= settings.daily_data_version_ttl:
+            return False, None
+        return True, cached[1]
+
+    def invalidate_data_version(self) -> None:
+        """보관한 데이터 버전 폐기 (다음 조건부 GET 에서 DB 를 다시 읽음)"""
+        self._data_version = None
+
+    def get_conversion_graph(self, rates: List[DailyExchangeRate]) -> ConversionGraph:
+        """저장된 환율 묶음의 변환 그래프 (같은 환율 묶음이면 계산해 둔 그래프 재사용)"""
+        key = tuple(sorted((rate.currency_from, rate.currency_to, str(rate.rate)) for rate in rates))
+        cached = self._conversion_graph
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        graph = ConversionGraph((rate.currency_from, rate.currency_to, float(rate.rate)) for rate in rates)
+        self._conversion_graph = (key, graph)
+        return graph
+
+    async def iter_rate_history(self, pairs: List[Tuple[str, str]], start_date: date, end_date: date,
+                                chunk_size: int = 1000) -> AsyncIterator[Dict]:
+        """내보내기용: 통화쌍별로 기간 내 환율을 날짜 키셋 단위로 읽어 한 행씩 반환 (메모리는 한 청크분만 사용)"""
+        for currency_from, currency_to in pairs:
+            last_date = None
+            while True:
+                query = self.supabase.table("daily_exchange_rates").select(
+                    "date, rate, previous_rate, change_amount, change_percentage"
+                ).eq("currency_from", currency_from).eq("currency_to", currency_to)
+                # (currency_from, currency_to, date) 인덱스를 따라 이전 청크 다음 날짜부터 읽음
+                if last_date is None:
+                    query = query.gte("date", start_date.isoformat())
                 else:
-                    # 저장된 데이터가 없으면 테스트 데이터 삽입
-                    await self._insert_test_data()
-                    latest_date_result = self.supabase.table("daily_exchange_rates").select("date").order("date", desc=True).limit(1).execute()
-                    if latest_date_result.data:
-                        latest_date = latest_date_result.data[0]['date']
-                        result = self.supabase.table("daily_exchange_rates").select("*").eq("date", latest_date).execute()
-                        if result.data:
-                            rates = [DailyExchangeRate(**item) for item in result.data]
-                            return rates, False
-                return [], False
-            except Exception as fallback_error:
-                logger.error(f"Fallback data fetch also failed: {fallback_error}")
-                return [], False
+                    query = query.gt("date", last_date)
+                result = query.lte("date", end_date.isoformat()).order("date").limit(chunk_size).execute()
+                rows = result.data or []
+                for row in rows:
+                    yield {
+                        "currency_pair": f"{currency_from}/{currency_to}",
+                        "date": row["date"],
+                        "rate": float(row["rate"]),
+                        "previous_rate": float(row["previous_rate"]) if row.get("previous_rate") is not None else None,
+                        "change_amount": float(row["change_amount"]) if row.get("change_amount") is not None else None,
+                        "change_percentage": float(row["change_percentage"]) if row.get("change_percentage") is not None else None,
+                    }
+                if len(rows) < chunk_size:
+                    break
+                last_date = rows[-1]["date"]
 
-    async def get_latest_stored_rates_only(self) -> List[DailyExchangeRate]:
-        """실시간 API 호출 없이 데이터베이스에서만 최신 환율 데이터 조회"""
-        try:
-            # 최신 날짜 조회
-            latest_date_result = self.supabase.table("daily_exchange_rates").select("date").order("date", desc=True).limit(1).execute()
-            
-            if not latest_date_result.data:
-                # 데이터가 없으면 임시 테스트 데이터 삽입
-                logger.info("No data found, inserting test data")
-                await self._insert_test_data()
-                # 다시 조회
-                latest_date_result = self.supabase.table("daily_exchange_rates").select("date").order("date", desc=True).limit(1).execute()
-                if not latest_date_result.data:
-                    return []
-            
-            latest_date = latest_date_result.data[0]['date']
-            
-            # 최신 날짜의 모든 환율 데이터 조회
-            result = self.supabase.table("daily_exchange_rates").select("*").eq("date", latest_date).execute()
-            
-            if result.data:
-                rates = [DailyExchangeRate(**item) for item in result.data]
-                return rates
-            else:
-                return []
-                
-        except Exception as e:
-            logger.error(f"Error fetching stored exchange rates: {e}")
-            return []
 
-    async def _insert_test_data(self):
-        """테스트용 환율 데이터 삽입"""
-        try:
-            from datetime import date
-            today = date.today()
-            
-            test_data = [
-                {
-                    "currency_from": "USD",
-                    "currency_to": "KRW", 
-                    "rate": 1387.70,
-                    "previous_rate": 1385.20,
-                    "change_amount": 2.50,
-                    "change_percentage": 0.18,
-                    "date": today.isoformat()
-                },
-                {
-                    "currency_from": "JPY",
-                    "currency_to": "KRW",
-                    "rate": 9.36,
-                    "previous_rate": 9.40,
-                    "change_amount": -0.04,
-                    "change_percentage": -0.43,
-                    "date": today.isoformat()
-                },
-                {
-                    "currency_from": "EUR", 
-                    "currency_to": "KRW",
-                    "rate": 1613.60,
-                    "previous_rate": 1610.10,
-                    "change_amount": 3.50,
-                    "change_percentage": 0.22,
-                    "date": today.isoformat()
-                },
-                {
-                    "currency_from": "CNY",
-                    "currency_to": "KRW",
-                    "rate": 193.27,
-                    "previous_rate": 194.50,
-                    "change_amount": -1.23,
-                    "change_percentage": -0.63,
-                    "date": today.isoformat()
-                }
-            ]
-            
-            self.supabase.table("daily_exchange_rates").insert(test_data).execute()
-            logger.info("Test data inserted successfully")
-            
-        except Exception as e:
-            logger.error(f"Error inserting test data: {e}")
\ No newline at end of file
+_daily_exchange_service: Optional[DailyExchangeRateService] = None
+
+def get_daily_exchange_service() -> DailyExchangeRateService:
+    """일일 환율 서비스 인스턴스 반환 (최초 호출 시 생성)"""
+    global _daily_exchange_service
+    if _daily_exchange_service is None:
+        _daily_exchange_service = DailyExchangeRateService()
+    return _daily_exchange_service
@@ -1,18 +1,74 @@
-import httpx
 from datetime import datetime
-from typing import Dict, Optional, List
+from decimal import Decimal
+from typing import Dict, Optional, List, Sequence
 from ..config import settings
+from ..utils.money import convert_amounts, convert_decimal, to_decimal
+from .rate_snapshot import RateSnapshot, get_snapshot_store
+from .upstream_budget import get_upstream_budget
+from .upstream_client import UpstreamBudgetExhausted, get_upstream_client
 
 class ExchangeRateService:
     def __init__(self):
-        self.base_url = "https://api.exchangerate-api.com/v4"
+        self.upstream = get_upstream_client()
+        self.budget = get_upstream_budget()
         
+    async def fetch_upstream_rates(self, base_currency: str = "USD", purpose: Optional[str] = None) -> Dict:
+        """업스트림 API에서 기준 통화의 전체 환율을 직접 가져옵니다. (서킷 브레이커/헤지/장애 조치 적용)
+
+        purpose 가 주어지면 실제로 보낸 요청마다 그 목적의 업스트림 예산을 차감합니다.
+        """
+        return await self.upstream.fetch(base_currency, purpose)
+    
+    def _servable(self, snapshot: RateSnapshot) -> bool:
+        """업스트림을 호출하지 않고 응답에 쓸 수 있는 스냅샷인지
+
+        재시작 시 파일에서 복원한 provisional 스냅샷은 첫 갱신 전까지 RATE_SNAPSHOT_FILE_MAX_AGE 동안만 사용합니다.
+        """
+        if snapshot.is_fresh(settings.rate_snapshot_max_age) or self.budget.limited:
+            return True
+        return snapshot.provisional and snapshot.age() <= settings.rate_snapshot_file_max_age
+    
     async def get_current_rates(self, base_currency: str = "USD") -> Dict:
-        """주어진 기준 통화에 대한 모든 환율 정보를 가져옵니다."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/latest/{base_currency}")
-            response.raise_for_status()
-            return response.json()
+        """주어진 기준 통화에 대한 모든 환율 정보를 가져옵니다.
+        
+        갱신기가 발행한 최신 스냅샷이 있으면 그것을 사용하고, 없거나 오래된 경우에만 업스트림을 호출합니다.
+        월간 예산(UPSTREAM_MONTHLY_QUOTA)이 설정되어 있으면 스냅샷이 있는 한 업스트림을 호출하지 않습니다.
+        """
+        store = get_snapshot_store()
+        snapshot = store.current()
+        if snapshot is not None and self._servable(snapshot):
+            try:
+                return snapshot.to_upstream_response(base_currency)
+            except KeyError:
+                if self.budget.limited:
+                    raise ValueError(f"지원하지 않는 통화: {base_currency}")
+        
+        try:
+            data = await self.fetch_upstream_rates(base_currency, "on_demand")
+        except UpstreamBudgetExhausted:
+            raise RuntimeError("이번 달 업스트림 호출 예산을 모두 사용했습니다")
+        if store.writer and base_currency == "USD":
+            store.publish(data["rates"], data.get("time_last_updated"))
+        return data
+    
+    async def get_snapshot(self) -> RateSnapshot:
+        """최신 환율 스냅샷 반환 (오래되었으면 먼저 갱신)"""
+        store = get_snapshot_store()
+        snapshot = store.current()
+        if snapshot is not None and self._servable(snapshot):
+            return snapshot
+        
+        data = await self.get_current_rates("USD")
+        snapshot = store.current()
+        if snapshot is None or not snapshot.is_fresh(settings.rate_snapshot_max_age):
+            # 공유 스냅샷을 아직 못 받은 읽기 전용 워커: 이번 응답으로 임시 스냅샷 구성 (버전 0)
+            updated_at = data.get("time_last_updated") or datetime.now().timestamp()
+            snapshot = RateSnapshot(0, datetime.now().timestamp(), updated_at, data["rates"])
+        return snapshot
+    
+    def get_snapshot_at(self, version: int, timestamp: int) -> Optional[RateSnapshot]:
+        """최근 스냅샷 링에 남아 있는 해당 버전 (차분 계산용, 없거나 timestamp 가 맞지 않으면 None)"""
+        return get_snapshot_store().snapshot_at(version, timestamp)
     
     async def get_conversion_rate(self, from_currency: str, to_currency: str) -> float:
         """두 통화 간의 환율을 가져옵니다."""
@@ -20,16 +76,32 @@ class ExchangeRateService:
         return rates_data["rates"].get(to_currency, 0.0)
     
     async def convert_amount(self, amount: float, from_currency: str, to_currency: str) -> Dict:
-        """금액을 다른 통화로 변환합니다."""
+        """금액을 다른 통화로 변환합니다. (대상 통화 소수 자릿수로 정확히 반올림)"""
         rate = await self.get_conversion_rate(from_currency, to_currency)
-        converted_amount = amount * rate
+        converted_amount = convert_decimal(amount, rate, to_currency)
         
         return {
             "amount": amount,
             "from_currency": from_currency,
             "to_currency": to_currency,
             "rate": rate,
-            "converted_amount": round(converted_amount, 2),
+            "converted_amount": float(converted_amount),
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def convert_batch(self, amounts: Sequence[Decimal], from_currency: str, to_currency: str) -> Dict:
+        """같은 통화쌍의 여러 금액을 한 번에 변환합니다. (최소 단위 금액은 정수 연산, 결과는 한 건씩 변환과 같음)"""
+        rate = await self.get_conversion_rate(from_currency, to_currency)
+        if not rate:
+            raise ValueError(f"{from_currency}에서 {to_currency}로의 환율을 찾을 수 없습니다")
+        converted = convert_amounts(amounts, rate, from_currency, to_currency)
+        
+        return {
+            "from_currency": from_currency,
+            "to_currency": to_currency,
+            "rate": rate,
+            "amounts": [to_decimal(amount) for amount in amounts],
+            "converted_amounts": converted,
             "timestamp": datetime.now().isoformat()
         }
     
@@ -51,4 +123,14 @@ class ExchangeRateService:
     async def get_supported_currencies(self) -> List[str]:
         """지원하는 모든 통화 목록을 가져옵니다."""
         rates_data = await self.get_current_rates("USD")
-        return list(rates_data["rates"].keys())
\ No newline at end of file
+        return list(rates_data["rates"].keys())
+
+
+_exchange_service: Optional[ExchangeRateService] = None
+
+def get_exchange_service() -> ExchangeRateService:
+    """환율 서비스 인스턴스 반환 (최초 호출 시 생성)"""
+    global _exchange_service
+    if _exchange_service is None:
+        _exchange_service = ExchangeRateService()
+    return _exchange_service
@@ -0,0 +1,171 @@
+"""
+스케줄 작업 리더 선출
+
+여러 인스턴스(레플리카 또는 워커) 중 리스를 가진 하나만 알림 확인과 일일 환율 저장을 실행합니다.
+- database: Supabase(Postgres)의 scheduler_leases 행을 리스로 사용 (서버 시각 기준 만료)
+- file: 같은 호스트의 워커끼리 파일 락(flock)으로 선출 (프로세스가 죽으면 OS가 즉시 해제)
+- none: 선출 없이 항상 리더 (단일 인스턴스 배포)
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+
+from ..config import settings
+from ..database import get_supabase
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElector:
+    """리스 기반 리더 선출 (갱신은 lease_seconds / 3 간격의 백그라운드 스레드)"""
+
+    backend = "none"
+
+    def __init__(self, name: str = "scheduler", lease_seconds: Optional[float] = None):
+        self.name = name
+        self.lease_seconds = lease_seconds if lease_seconds is not None else settings.leader_lease_seconds
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lease_until = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def try_acquire(self) -> bool:
+        """리스 획득 또는 연장 시도"""
+        return True
+
+    def release(self) -> None:
+        """보유 중인 리스 반납"""
+
+    def is_leader(self) -> bool:
+        # 갱신이 실패하면 다른 인스턴스가 넘겨받기 전에 스스로 리더 자격을 잃도록 로컬 만료 시각으로 판단
+        return time.monotonic() < self._lease_until
+
+    def renew(self) -> bool:
+        """리스 연장 시도
+
+        다른 인스턴스가 리스를 가져갔으면 바로 리더 자격을 내려놓고, 갱신 호출 자체가 실패한 경우
+        (DB 일시 장애 등)에는 이미 받은 리스가 만료될 때까지 리더를 유지합니다.
+        """
+        started = time.monotonic()
+        was_leader = self.is_leader()
+        try:
+            acquired = self.try_acquire()
+        except Exception as e:
+            logger.error(f"리더 리스 갱신 실패 (리스 만료까지 {max(self._lease_until - started, 0):.0f}초 유지): {e}")
+            return self.is_leader()
+
+        if acquired:
+            self._lease_until = started + self.lease_seconds
+        elif was_leader:
+            self._lease_until = 0.0
+
+        if acquired and not was_leader:
+            logger.info(f"스케줄 작업 리더가 되었습니다 ({self.backend}, {self.holder_id})")
+        elif was_leader and not acquired:
+            logger.warning(f"스케줄 작업 리더 자격을 잃었습니다 ({self.backend}, {self.holder_id})")
+        return acquired
+
+    def start(self) -> None:
+        """즉시 1회 선출을 시도한 뒤 백그라운드에서 주기적으로 갱신"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.renew()
+        self._thread = threading.Thread(target=self._run_renew_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self.is_leader():
+            try:
+                self.release()
+            except Exception as e:
+                logger.error(f"리더 리스 반납 실패: {e}")
+        self._lease_until = 0.0
+
+    def _run_renew_loop(self) -> None:
+        interval = max(self.lease_seconds / 3, 1.0)
+        while not self._stop.wait(interval):
+            self.renew()
+
+
+class FileLeaderElector(LeaderElector):
+    """같은 호스트 내 파일 락 기반 선출"""
+
+    backend = "file"
+
+    def __init__(self, path: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path or settings.leader_lock_file
+        self._file = None
+
+    def try_acquire(self) -> bool:
+        import fcntl
+        if self._file is not None:
+            return True  # 락은 파일을 닫거나 프로세스가 끝날 때까지 유지됨
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(self.holder_id)
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        import fcntl
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class DatabaseLeaderElector(LeaderElector):
+    """scheduler_leases 테이블 리스 기반 선출 (여러 호스트)"""
+
+    backend = "database"
+
+    def try_acquire(self) -> bool:
+        response = get_supabase().rpc("acquire_scheduler_lease", {
+            "p_name": self.name,
+            "p_holder": self.holder_id,
+            "p_lease_seconds": int(self.lease_seconds),
+        }).execute()
+        return response.data is True
+
+    def release(self) -> None:
+        get_supabase().rpc("release_scheduler_lease", {
+            "p_name": self.name,
+            "p_holder": self.holder_id,
+        }).execute()
+
+
+_leader_elector: Optional[LeaderElector] = None
+
+def get_leader_elector() -> LeaderElector:
+    """설정된 백엔드(LEADER_ELECTION_BACKEND)의 리더 선출기 반환"""
+    global _leader_elector
+    if _leader_elector is None:
+        backend = settings.leader_election_backend.lower()
+        # 알림 샤드마다 리더를 따로 선출
+        name = f"scheduler-{settings.alert_shard_index}" if settings.alert_shard_count > 1 else "scheduler"
+        if backend == "database":
+            _leader_elector = DatabaseLeaderElector(name=name)
+        elif backend == "file":
+            path = settings.leader_lock_file if name == "scheduler" else f"{settings.leader_lock_file}.{name}"
+            _leader_elector = FileLeaderElector(path=path, name=name)
+        else:
+            _leader_elector = LeaderElector(name=name)
+    return _leader_elector
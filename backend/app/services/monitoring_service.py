@@ -1,37 +1,52 @@
 import asyncio
 import threading
 import time
-import schedule
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
-from .alert_service import AlertService
-from .exchange_rate import ExchangeRateService
-from .notification import NotificationService
-from .daily_exchange_rate_service import DailyExchangeRateService
+from .alert_service import get_alert_service
+from .exchange_rate import get_exchange_service
+from .notification import get_notification_service
+from .daily_exchange_rate_service import get_daily_exchange_service
+from .leader_election import get_leader_elector
+from .rate_snapshot import RateSnapshot, get_snapshot_store
+from .rate_tick_service import get_rate_tick_service
+from .upstream_budget import get_upstream_budget
+from .upstream_client import get_upstream_client
+from ..config import settings
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ExchangeRateMonitoringService:
     """백그라운드 환율 모니터링 서비스"""
     
     def __init__(self):
-        self.alert_service = AlertService()
-        self.exchange_service = ExchangeRateService()
-        self.notification_service = NotificationService()
-        self.daily_exchange_service = DailyExchangeRateService()
+        self.alert_service = get_alert_service()
+        self.exchange_service = get_exchange_service()
+        self.notification_service = get_notification_service()
+        self.daily_exchange_service = get_daily_exchange_service()
+        self.leader = get_leader_elector()
         self.is_running = False
         self.monitoring_thread = None
         self.scheduler_thread = None
-        self.check_interval = 300  # 5분마다 확인
-        self._setup_daily_schedule()
+        self.check_interval = settings.alert_sweep_interval  # 전체 평가 주기 (안전망)
+        self.poll_interval = 1.0  # 스냅샷 버전 확인 주기
+        self.snapshot_store = get_snapshot_store()
+        self._daily_job = None
+        self._catch_up_job = None
+        self._rollup_job = None
     
     def _setup_daily_schedule(self):
-        """일일 환율 저장 스케줄 설정"""
-        schedule.every().day.at("00:00").do(self._store_daily_rates_job)
+        """일일 환율 저장 스케줄 설정 (모니터링 시작 시 1회)"""
+        if self._daily_job is not None:
+            return
+        import schedule
+        self._daily_job = schedule.every().day.at("00:00").do(self._store_daily_rates_job)
+        # 자정 저장이 실패했거나 자정 이후에 시작한 경우 보충 (오늘 데이터가 있으면 조회 1회로 끝남)
+        self._catch_up_job = schedule.every(10).minutes.do(self._store_daily_rates_job)
+        # 보관 기간이 지난 장중 틱을 일별 OHLC 로 롤업하고 다음 달 파티션 준비
+        self._rollup_job = schedule.every().day.at("00:10").do(self._rollup_rate_ticks_job)
         
     def start_monitoring(self):
         """모니터링 시작"""
@@ -39,6 +54,8 @@ class ExchangeRateMonitoringService:
             logger.warning("모니터링이 이미 실행 중입니다")
             return
         
+        self._setup_daily_schedule()
+        self.leader.start()
         self.is_running = True
         self.monitoring_thread = threading.Thread(target=self._run_monitoring_loop, daemon=True)
         self.scheduler_thread = threading.Thread(target=self._run_scheduler_loop, daemon=True)
@@ -53,20 +70,40 @@ class ExchangeRateMonitoringService:
             self.monitoring_thread.join(timeout=10)
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=10)
+        self.leader.stop()
+        self.alert_service.evaluator.shutdown()
         logger.info("환율 모니터링 서비스가 중지되었습니다")
     
     def _run_monitoring_loop(self):
-        """모니터링 루프 실행"""
+        """모니터링 루프 실행
+        
+        스냅샷 버전을 1초마다 확인해 바뀌었을 때만 교차 평가하고,
+        전체 평가는 시작 직후와 check_interval 마다 한 번씩만 실행합니다.
+        재시작 시 파일에서 복원한 provisional 스냅샷으로는 평가하지 않고 첫 업스트림 갱신을 기다립니다.
+        평가에 실패하면 기준 스냅샷(previous)을 그대로 두어 1분 뒤 그 구간을 다시 평가합니다.
+        """
+        previous: Optional[RateSnapshot] = None
+        last_sweep: Optional[float] = None
         while self.is_running:
             try:
-                # 비동기 함수를 동기 스레드에서 실행
-                asyncio.run(self._check_alerts())
+                latest = self.snapshot_store.current()
+                # 리더 인스턴스만 알림 확인 (비동기 함수를 동기 스레드에서 실행), provisional 스냅샷이면 첫 갱신까지 대기
+                if not self.leader.is_leader() or (latest is not None and latest.provisional):
+                    previous, last_sweep = None, None
+                elif last_sweep is None or time.monotonic() - last_sweep >= self.check_interval:
+                    if not asyncio.run(self._check_alerts()):
+                        time.sleep(60)
+                        continue
+                    last_sweep = time.monotonic()
+                    previous = latest or self.snapshot_store.current()
+                else:
+                    if previous is not None and latest is not None and latest.version != previous.version:
+                        if not asyncio.run(self._check_alerts(previous, latest)):
+                            time.sleep(60)
+                            continue
+                    previous = latest or previous
                 
-                # 다음 확인까지 대기
-                for _ in range(self.check_interval):
-                    if not self.is_running:
-                        break
-                    time.sleep(1)
+                time.sleep(self.poll_interval)
                     
             except Exception as e:
                 logger.error(f"모니터링 중 오류 발생: {e}")
@@ -74,21 +111,37 @@ class ExchangeRateMonitoringService:
     
     def _run_scheduler_loop(self):
         """스케줄러 루프 실행"""
+        import schedule
         while self.is_running:
             try:
                 schedule.run_pending()
-                time.sleep(60)  # 1분마다 스케줄 확인
+                time.sleep(1)  # 중지 요청에 바로 반응하도록 1초 단위로 확인
             except Exception as e:
                 logger.error(f"스케줄러 중 오류 발생: {e}")
                 time.sleep(60)
     
     def _store_daily_rates_job(self):
         """일일 환율 저장 작업 (스케줄러용)"""
+        if not self.leader.is_leader() or settings.alert_shard_index != 0:
+            logger.debug("리더 인스턴스가 아니므로 일일 환율 저장을 건너뜁니다")
+            return
+        latest = self.snapshot_store.current()
+        if latest is not None and latest.provisional:
+            return  # 파일에서 복원한 스냅샷을 오늘 환율로 저장하지 않도록 첫 갱신까지 대기
         try:
             asyncio.run(self._store_daily_rates())
         except Exception as e:
             logger.error(f"일일 환율 저장 중 오류: {e}")
     
+    def _rollup_rate_ticks_job(self):
+        """장중 틱 롤업/파티션 관리 작업 (스케줄러용, 리더 인스턴스만)"""
+        if not self.leader.is_leader() or settings.alert_shard_index != 0:
+            return
+        try:
+            get_rate_tick_service().rollup()
+        except Exception as e:
+            logger.error(f"환율 틱 롤업 중 오류: {e}")
+    
     async def _store_daily_rates(self):
         """일일 환율 저장"""
         try:
@@ -101,26 +154,35 @@ class ExchangeRateMonitoringService:
         except Exception as e:
             logger.error(f"일일 환율 저장 중 오류: {e}")
     
-    async def _check_alerts(self):
-        """알림 조건 확인 및 발송"""
+    async def _check_alerts(self, previous: Optional[RateSnapshot] = None,
+                            current: Optional[RateSnapshot] = None) -> bool:
+        """알림 조건 확인 및 발송 (스냅샷 두 개가 주어지면 그 사이 교차한 알림만, 오류가 나면 False)"""
         try:
-            logger.info("알림 조건 확인 시작...")
-            
             # 트리거된 알림 확인
-            triggered_alerts = await self.alert_service.check_alert_conditions()
+            if previous is not None and current is not None:
+                logger.info(f"환율 변경 감지 (v{previous.version} → v{current.version}), 교차 알림 확인...")
+                triggered_alerts = await self.alert_service.check_crossed_alerts(previous, current)
+            else:
+                logger.info("알림 조건 전체 확인 시작...")
+                triggered_alerts = await self.alert_service.sweep_alerts()
             
             if not triggered_alerts:
                 logger.info("트리거된 알림이 없습니다")
-                return
+                return True
             
             logger.info(f"{len(triggered_alerts)}개의 알림이 트리거되었습니다")
             
             # 각 알림에 대해 발송 처리
             for alert_data in triggered_alerts:
                 await self._process_triggered_alert(alert_data)
+            
+            # 이번 주기의 발송 이력/상태 변경을 한 번에 저장
+            await asyncio.to_thread(self.alert_service.writer.flush)
+            return True
                 
         except Exception as e:
             logger.error(f"알림 확인 중 오류: {e}")
+            return False
     
     async def _process_triggered_alert(self, alert_data: Dict):
         """트리거된 알림 처리"""
@@ -141,11 +203,15 @@ class ExchangeRateMonitoringService:
             )
             
             if success:
+                # 다시 무장될 때까지 같은 알림이 반복 발송되지 않도록 상태 저장
+                await self.alert_service.mark_alert_fired(alert.id, triggered_at)
+                
                 # 알림 발송 이력 기록
                 await self.alert_service.record_notification(
                     alert_setting_id=alert.id,
                     triggered_rate=current_rate,
-                    notification_type='email'
+                    notification_type='email',
+                    user_id=alert.user_id
                 )
                 
                 logger.info(f"알림 발송 완료: {alert.id}")
@@ -165,7 +231,18 @@ class ExchangeRateMonitoringService:
             "active_alerts_count": len(active_alerts),
             "last_check": datetime.now().isoformat(),
             "thread_alive": self.monitoring_thread.is_alive() if self.monitoring_thread else False,
-            "scheduler_alive": self.scheduler_thread.is_alive() if self.scheduler_thread else False
+            "scheduler_alive": self.scheduler_thread.is_alive() if self.scheduler_thread else False,
+            "is_leader": self.leader.is_leader(),
+            "leader_backend": self.leader.backend,
+            "leader_id": self.leader.holder_id,
+            "last_evaluation": self.alert_service.evaluator.last_stats,
+            "bulk_writer": {**self.alert_service.writer.stats, "pending": self.alert_service.writer.pending},
+            "rate_ticks": get_rate_tick_service().stats,
+            "upstream": {
+                "quota": get_upstream_budget().metrics(),
+                "requests": get_upstream_client().stats,
+                "providers": get_upstream_client().status(),
+            },
         }
     
     async def manual_store_daily_rates(self) -> Dict:
@@ -220,9 +297,12 @@ class ExchangeRateMonitoringService:
                 "check_time": datetime.now().isoformat()
             }
 
-# 글로벌 모니터링 서비스 인스턴스
-monitoring_service = ExchangeRateMonitoringService()
+# 글로벌 모니터링 서비스 인스턴스 (최초 호출 시 생성)
+monitoring_service: Optional[ExchangeRateMonitoringService] = None
 
 def get_monitoring_service() -> ExchangeRateMonitoringService:
     """모니터링 서비스 인스턴스 반환"""
+    global monitoring_service
+    if monitoring_service is None:
+        monitoring_service = ExchangeRateMonitoringService()
     return monitoring_service
\ No newline at end of file
@@ -3,29 +3,25 @@ from datetime import datetime
 from typing import Dict, Optional
 from ..models.alert import AlertSetting
 from ..config import settings
-import resend
 from ..database import get_supabase
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class NotificationService:
     """알림 발송 서비스"""
     
     def __init__(self):
-        # Resend API 설정
-        if settings.resend_api_key:
-            resend.api_key = settings.resend_api_key
-        
         self.sender_email = "noreply@exchangeapp.com"
-        self.supabase = get_supabase()
         
         # 개발용 기본 이메일 매핑
         self.fallback_emails = {
             "demo_user": "demo@example.com"
         }
     
+    @property
+    def supabase(self):
+        return get_supabase()
+    
     async def send_exchange_rate_alert(
         self, 
         user_id: str, 
@@ -126,6 +122,10 @@ class NotificationService:
     async def _send_email_with_resend(self, to_email: str, subject: str, html_body: str) -> bool:
         """Resend API를 사용한 이메일 발송"""
         try:
+            # resend는 실제 발송 시점에만 import
+            import resend
+            resend.api_key = settings.resend_api_key
+            
             params = {
                 "from": self.sender_email,
                 "to": [to_email],
@@ -223,4 +223,14 @@ class NotificationService:
     
     async def get_user_email(self, user_id: str) -> Optional[str]:
         """사용자 이메일 조회"""
-        return await self._get_user_email(user_id)
\ No newline at end of file
+        return await self._get_user_email(user_id)
+
+
+_notification_service: Optional[NotificationService] = None
+
+def get_notification_service() -> NotificationService:
+    """알림 발송 서비스 인스턴스 반환 (최초 호출 시 생성)"""
+    global _notification_service
+    if _notification_service is None:
+        _notification_service = NotificationService()
+    return _notification_service
@@ -0,0 +1,102 @@
+"""
+오프라인 변환용 환율 번들
+
+프론트엔드가 서버 호출 없이 직접 환산할 수 있도록 스냅샷을 작은 형태로 내보냅니다.
+임의의 두 통화 환산은 rates[to] / rates[from] 입니다 (USD 기준).
+번들을 가진 클라이언트는 버전이 바뀌면 bundle_diff 로 바뀐 통화만 받아 갱신합니다.
+
+JSON:
+    {"version": 12, "timestamp": 1760832000, "base": "USD",
+     "currencies": ["AED", ...], "rates": [3.6725, ...]}
+    rates 는 float32 정밀도(유효숫자 7자리)로 줄여 보냅니다.
+
+바이너리 (application/octet-stream, little-endian):
+    0   4s      magic        b"FXRB"
+    4   uint8   format       BUNDLE_FORMAT
+    5   uint8   reserved
+    6   uint16  count        통화 수
+    8   uint64  version      스냅샷 버전
+    16  float64 timestamp    업스트림 기준 갱신 시각 (epoch)
+    24  char[3 * count]      통화 코드 (ASCII, 3자리씩 이어붙임)
+    ..  padding              다음 위치가 4바이트 정렬되도록 0 채움
+    ..  float32[count]       currencies 순서의 USD 기준 환율
+"""
+
+import struct
+import sys
+from array import array
+from typing import Dict, List, Tuple
+
+from .rate_snapshot import RateSnapshot
+
+BUNDLE_FORMAT = 1
+BUNDLE_MAGIC = b"FXRB"
+BUNDLE_HEADER = struct.Struct("<4sBBHQd")
+
+
+def _bundle_rates(snapshot: RateSnapshot) -> Tuple[List[str], List[float]]:
+    currencies = sorted(code for code, rate in snapshot.usd_rates.items() if rate)
+    return currencies, [snapshot.usd_rates[code] for code in currencies]
+
+
+def bundle_json(snapshot: RateSnapshot) -> Dict:
+    """JSON 번들 (통화 목록 + 같은 순서의 USD 기준 환율)"""
+    currencies, rates = _bundle_rates(snapshot)
+    return {
+        "version": snapshot.version,
+        "timestamp": int(snapshot.updated_at),
+        "base": "USD",
+        "currencies": currencies,
+        "rates": [_compact(rate) for rate in rates],
+    }
+
+
+def _compact(rate: float) -> float:
+    return float(f"{rate:.7g}")
+
+
+def bundle_diff(base: RateSnapshot, current: RateSnapshot) -> Dict:
+    """base 버전 이후 바뀐 통화만 담은 차분 (changed: 새 환율, removed: 사라진 통화)"""
+    base_rates = base.usd_rates
+    return {
+        "since": base.version,
+        "version": current.version,
+        "timestamp": int(current.updated_at),
+        "full": False,
+        "changed": {
+            code: _compact(rate) for code, rate in sorted(current.usd_rates.items())
+            if rate and base_rates.get(code) != rate
+        },
+        "removed": sorted(code for code in base_rates if not current.usd_rates.get(code)),
+    }
+
+
+def bundle_binary(snapshot: RateSnapshot) -> bytes:
+    """바이너리 번들 (모듈 설명의 레이아웃)"""
+    currencies, rates = _bundle_rates(snapshot)
+    codes = "".join(currencies).encode("ascii")
+    padding = b"\0" * (-(BUNDLE_HEADER.size + len(codes)) % 4)
+    values = array("f", rates)
+    if sys.byteorder == "big":
+        values.byteswap()
+    header = BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_FORMAT, 0, len(currencies), snapshot.version, snapshot.updated_at)
+    return header + codes + padding + values.tobytes()
+
+
+def decode_bundle(data: bytes) -> Dict:
+    """바이너리 번들을 JSON 번들과 같은 형태로 복원 (검증/디버깅용)"""
+    magic, bundle_format, _, count, version, timestamp = BUNDLE_HEADER.unpack_from(data, 0)
+    if magic != BUNDLE_MAGIC or bundle_format != BUNDLE_FORMAT:
+        raise ValueError("지원하지 않는 번들 형식입니다")
+    offset = BUNDLE_HEADER.size
+    codes = data[offset:offset + 3 * count].decode("ascii")
+    offset += 3 * count
+    offset += -offset % 4
+    rates = struct.unpack_from(f"<{count}f", data, offset)
+    return {
+        "version": version,
+        "timestamp": int(timestamp),
+        "base": "USD",
+        "currencies": [codes[i:i + 3] for i in range(0, len(codes), 3)],
+        "rates": list(rates),
+    }
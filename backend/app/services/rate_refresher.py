@@ -0,0 +1,181 @@
+"""
+환율 스냅샷 갱신기
+
+업스트림에서 USD 기준 환율을 주기적으로 받아 스냅샷 저장소에 발행합니다.
+- 단일 프로세스 모드: 앱 lifespan 안에서 asyncio 태스크로 실행
+- 멀티 워커 모드: start_workers.py 가 띄운 전용 프로세스에서 공유 메모리에 기록
+
+갱신 주기는 월간 예산(UpstreamBudget)에서 정해지며, 목표 환율 근처에 무장 알림이 있으면
+알림용 예비 예산으로 정기 주기 사이에 추가 갱신합니다.
+발행한 스냅샷은 RATE_SNAPSHOT_FILE 에 저장해 두었다가 재시작 시 첫 갱신 전에 바로 사용합니다.
+업스트림 갱신 시각이 바뀐 스냅샷은 RATE_TICK_PAIRS 통화쌍의 장중 틱으로 exchange_rates 에도 기록합니다.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from dataclasses import replace
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .exchange_rate import ExchangeRateService
+from .rate_snapshot import RateSnapshot, RateSnapshotStore, SharedRateSnapshot
+from .rate_tick_service import RateTickService, get_rate_tick_service
+from .snapshot_file import load_snapshot_file, write_snapshot_file
+from .upstream_budget import UpstreamBudget, get_upstream_budget
+from .upstream_client import UpstreamBudgetExhausted
+
+logger = logging.getLogger(__name__)
+
+
+class RateRefresher:
+    """주기적으로 업스트림을 호출해 스냅샷을 발행"""
+
+    def __init__(self, exchange_service: ExchangeRateService, store: RateSnapshotStore,
+                 interval: Optional[float] = None, budget: Optional[UpstreamBudget] = None,
+                 near_alerts: Optional[Callable[[Dict[str, float]], Awaitable[List[Tuple[str, str]]]]] = None,
+                 ticks: Optional[RateTickService] = None):
+        self.exchange_service = exchange_service
+        self.store = store
+        self.interval = interval if interval is not None else settings.rate_refresh_interval  # 최소 갱신 간격
+        self.budget = budget if budget is not None else get_upstream_budget()
+        self.near_alerts = near_alerts  # 현재 환율 → 목표 환율 근처 알림이 있는 통화쌍
+        self.snapshot_file = settings.rate_snapshot_file
+        self.ticks = ticks if ticks is not None else (get_rate_tick_service() if settings.rate_tick_pairs else None)
+        self._last_attempt = float("-inf")
+        self._saved: Optional[RateSnapshot] = None  # 마지막으로 파일에 저장한 스냅샷
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = asyncio.Event()
+        self.stats = {"scheduled": 0, "alert": 0, "skipped_no_budget": 0, "near_alert_pairs": 0}
+
+    async def refresh_once(self, purpose: str = "scheduled") -> Optional[RateSnapshot]:
+        """예산이 남아 있으면 업스트림 1회 호출 후 발행 (실패 시 기존 스냅샷 유지), 예산은 실제 요청마다 클라이언트가 차감"""
+        self._last_attempt = time.monotonic()
+        try:
+            data = await self.exchange_service.fetch_upstream_rates("USD", purpose)
+        except UpstreamBudgetExhausted:
+            self.stats["skipped_no_budget"] += 1
+            logger.warning(f"업스트림 예산 소진으로 환율 갱신 생략 ({purpose})")
+            return None
+        except Exception as e:
+            self.stats[purpose] += 1
+            logger.error(f"환율 스냅샷 갱신 실패: {e}")
+            return None
+        self.stats[purpose] += 1
+        snapshot = self.store.publish(data["rates"], data.get("time_last_updated"))
+        if self.snapshot_file and self._needs_save(snapshot):
+            try:
+                await asyncio.to_thread(write_snapshot_file, self.snapshot_file, snapshot)
+                self._saved = snapshot
+            except OSError as e:
+                logger.error(f"스냅샷 파일 저장 실패 ({self.snapshot_file}): {e}")
+        if self.ticks is not None:
+            await asyncio.to_thread(self.ticks.record, snapshot)
+        return snapshot
+
+    def _needs_save(self, snapshot: RateSnapshot) -> bool:
+        """환율/업스트림 시각이 저장한 것과 같으면 파일을 다시 쓰지 않음
+
+        다만 재시작 때 RATE_SNAPSHOT_FILE_MAX_AGE 를 넘겨 버려지지 않도록 그 절반이 지나면 확인 시각을 갱신합니다.
+        """
+        saved = self._saved
+        return (saved is None or saved.version != snapshot.version or saved.updated_at != snapshot.updated_at
+                or snapshot.fetched_at - saved.fetched_at >= settings.rate_snapshot_file_max_age / 2)
+
+    def warm_start(self) -> Optional[RateSnapshot]:
+        """저장된 스냅샷 파일로 저장소를 채움 (RATE_SNAPSHOT_FILE_MAX_AGE 이내인 경우만)
+
+        파일의 스냅샷은 저장된 확인 시각을 그대로 두고 provisional 로 표시하므로, 첫 업스트림 갱신 전까지는
+        응답에만 쓰이고 최신으로 보지 않습니다 (ETag 없음, 알림 평가 대기).
+        다음 정기 갱신은 파일이 저장된 시각부터 계산합니다.
+        """
+        if not self.snapshot_file:
+            return None
+        snapshot = load_snapshot_file(self.snapshot_file, settings.rate_snapshot_file_max_age)
+        if snapshot is None:
+            return None
+        saved_age = max(time.time() - snapshot.fetched_at, 0.0)
+        snapshot = replace(snapshot, provisional=True)
+        if not self.store.warm_start(snapshot):
+            return None
+        self._last_attempt = time.monotonic() - saved_age
+        self._saved = snapshot
+        logger.info(f"스냅샷 파일에서 시작 (v{snapshot.version}, {saved_age:.0f}초 전 저장)")
+        return snapshot
+
+    async def _alerts_near(self) -> bool:
+        snapshot = self.store.current()
+        if self.near_alerts is None or snapshot is None:
+            return False
+        try:
+            pairs = await self.near_alerts(snapshot.usd_rates)
+        except Exception as e:
+            logger.error(f"알림 근접 확인 실패: {e}")
+            return False
+        self.stats["near_alert_pairs"] = len(pairs)
+        return bool(pairs)
+
+    async def run(self) -> None:
+        """중지될 때까지 예산에서 정한 주기로 갱신 (알림 근접 시 추가 갱신)"""
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            since_last = time.monotonic() - self._last_attempt
+            scheduled_wait = max(self.interval, self.budget.interval("scheduled")) - since_last
+            if scheduled_wait <= 0:
+                await self.refresh_once("scheduled")
+                scheduled_wait = max(self.interval, self.budget.interval("scheduled"))
+            elif (since_last >= max(self.interval, self.budget.interval("alert"))
+                  and self.budget.remaining("alert") != 0 and await self._alerts_near()):
+                await self.refresh_once("alert")
+                scheduled_wait = max(self.interval, self.budget.interval("scheduled"))
+            # 요청 경로의 ETag 판단이 DB 를 읽지 않도록 최신 판단 기준을 여기서 갱신
+            self.budget.snapshot_max_age()
+            # 알림 근접 여부는 정기 주기보다 자주 확인 (확인 자체는 업스트림 호출 없음)
+            wait = scheduled_wait if self.near_alerts is None else min(scheduled_wait, self.interval)
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=max(wait, 0.0))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """현재 이벤트 루프에서 백그라운드 태스크로 시작"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+def near_alert_probe() -> Callable[[Dict[str, float]], Awaitable[List[Tuple[str, str]]]]:
+    """목표 환율 근처 무장 알림이 있는 통화쌍을 찾는 함수 (예산 모드의 추가 갱신 판단용)"""
+    from .alert_service import get_alert_service
+    alert_service = get_alert_service()
+    return lambda usd_rates: alert_service.pairs_near_threshold(usd_rates, settings.alert_refresh_proximity)
+
+
+def run_shared_refresher(shm_name: str, interval: Optional[float] = None) -> None:
+    """멀티 워커 모드의 갱신 전용 프로세스 진입점"""
+    logging.basicConfig(level=logging.INFO)
+    shared = SharedRateSnapshot.attach(shm_name)
+    store = RateSnapshotStore(shared=shared, writer=True)
+    refresher = RateRefresher(
+        ExchangeRateService(), store, interval,
+        near_alerts=near_alert_probe() if settings.upstream_monthly_quota else None,
+    )
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, refresher._stopped.set)
+        await refresher.run()
+
+    refresher.warm_start()
+    logger.info(f"환율 스냅샷 갱신 프로세스 시작 (segment={shm_name}, interval={refresher.interval}s)")
+    try:
+        asyncio.run(main())
+    finally:
+        shared.close()
@@ -0,0 +1,296 @@
+"""
+환율 스냅샷 저장소
+
+업스트림에서 받은 USD 기준 전체 환율을 버전이 붙은 불변 스냅샷으로 보관합니다.
+멀티 워커 모드에서는 갱신 전용 프로세스 하나가 공유 메모리 세그먼트에 스냅샷을 쓰고,
+각 워커는 seqlock 방식의 버전 확인으로 락 없이 읽습니다.
+
+공유 메모리 레이아웃 (little-endian):
+    0   uint64  seq          쓰는 중이면 홀수, 완료되면 짝수
+    8   uint64  version      스냅샷 버전 (환율이 바뀔 때만 증가)
+    16  float64 fetched_at   마지막으로 업스트림에서 확인한 시각 (epoch)
+    24  float64 updated_at   업스트림 기준 갱신 시각 (time_last_updated)
+    32  uint64  count        환율 배열 길이
+    40  uint64  flags        bit 0: 재시작 시 파일에서 복원해 아직 업스트림으로 확인하지 않은 스냅샷 (provisional)
+    48  float64[count]       CURRENCY_CODES 순서의 USD 기준 환율 (없는 통화는 NaN)
+"""
+
+import logging
+import math
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ..config import settings
+from ..utils.currencies import CURRENCY_CODES
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<QQddQQ")
+SEQ = struct.Struct("<Q")
+
+
+@dataclass(frozen=True)
+class RateSnapshot:
+    """특정 시점의 USD 기준 전체 환율 (불변)"""
+    version: int
+    fetched_at: float
+    updated_at: float
+    usd_rates: Dict[str, float]
+    _by_base: Dict[str, Dict] = field(default_factory=dict, repr=False, compare=False)
+    # 스냅샷 파일에서 복원한 경우 미리 계산된 교차 환율 행렬 (snapshot_file.CrossRateMatrix)
+    cross_rates: Optional[Any] = field(default=None, repr=False, compare=False)
+    # 재시작 시 파일에서 복원해 첫 업스트림 갱신 전까지 임시로 쓰는 스냅샷 (최신으로 보지 않음)
+    provisional: bool = False
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (time.time() if now is None else now) - self.fetched_at
+
+    def is_fresh(self, max_age: float) -> bool:
+        return not self.provisional and self.age() <= max_age
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """from_currency 1단위의 to_currency 환산 값 (지원하지 않으면 0.0)"""
+        from_rate = self.usd_rates.get(from_currency)
+        to_rate = self.usd_rates.get(to_currency)
+        if not from_rate or to_rate is None:
+            return 0.0
+        return to_rate / from_rate
+
+    def to_upstream_response(self, base_currency: str) -> Dict:
+        """exchangerate-api.com `/latest/{base}` 형식의 응답 (기준 통화별로 1회만 계산)"""
+        response = self._by_base.get(base_currency)
+        if response is None:
+            base_rate = self.usd_rates.get(base_currency)
+            if not base_rate:
+                raise KeyError(f"지원하지 않는 통화: {base_currency}")
+            updated = datetime.fromtimestamp(self.updated_at, tz=timezone.utc)
+            if self.cross_rates is not None and base_currency in self.cross_rates.index:
+                rates = self.cross_rates.row(base_currency)
+            else:
+                rates = {code: rate / base_rate for code, rate in self.usd_rates.items()}
+            response = {
+                "base": base_currency,
+                "date": updated.date().isoformat(),
+                "time_last_updated": int(self.updated_at),
+                "rates": rates,
+            }
+            self._by_base[base_currency] = response
+        return response
+
+
+def _attach_shared_memory(name: str):
+    """기존 세그먼트에 연결 (resource_tracker가 종료 시 세그먼트를 지우지 않도록 처리)"""
+    from multiprocessing import resource_tracker, shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.12 이하: track 인자가 없으므로 등록 후 직접 해제
+        segment = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(segment._name, "shared_memory")
+        except Exception:
+            pass
+        return segment
+
+
+class SharedRateSnapshot:
+    """공유 메모리 환율 스냅샷 (쓰기 1개 프로세스, 읽기 다수 프로세스)"""
+
+    def __init__(self, segment, currencies: Sequence[str] = CURRENCY_CODES, owner: bool = False):
+        self.segment = segment
+        self.currencies = tuple(currencies)
+        self.owner = owner
+        self._values = struct.Struct(f"<{len(self.currencies)}d")
+        self._index = {code: i for i, code in enumerate(self.currencies)}
+        self._cached_seq: Optional[int] = None
+        self._cached: Optional[RateSnapshot] = None
+
+    @classmethod
+    def size_for(cls, count: int) -> int:
+        return HEADER.size + 8 * count
+
+    @classmethod
+    def create(cls, name: str, currencies: Sequence[str] = CURRENCY_CODES) -> "SharedRateSnapshot":
+        from multiprocessing import shared_memory
+        segment = shared_memory.SharedMemory(name=name, create=True, size=cls.size_for(len(currencies)))
+        HEADER.pack_into(segment.buf, 0, 0, 0, 0.0, 0.0, len(currencies), 0)
+        return cls(segment, currencies, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, currencies: Sequence[str] = CURRENCY_CODES) -> "SharedRateSnapshot":
+        segment = _attach_shared_memory(name)
+        count = HEADER.unpack_from(segment.buf, 0)[4]
+        if count != len(currencies):
+            raise ValueError(f"공유 메모리 레이아웃 불일치: {count} != {len(currencies)}")
+        return cls(segment, currencies)
+
+    def write(self, version: int, fetched_at: float, updated_at: float, usd_rates: Dict[str, float],
+              provisional: bool = False) -> None:
+        """seqlock 쓰기: seq를 홀수로 올린 뒤 본문을 쓰고 다시 짝수로 올림"""
+        buf = self.segment.buf
+        seq = SEQ.unpack_from(buf, 0)[0]
+        if seq % 2:
+            seq += 1  # 이전 쓰기 도중 프로세스가 죽은 경우 복구
+        SEQ.pack_into(buf, 0, seq + 1)
+        values = [usd_rates.get(code, math.nan) for code in self.currencies]
+        self._values.pack_into(buf, HEADER.size, *values)
+        HEADER.pack_into(buf, 0, seq + 1, version, fetched_at, updated_at, len(self.currencies), int(provisional))
+        SEQ.pack_into(buf, 0, seq + 2)
+
+    def read(self, retries: int = 100) -> Optional[RateSnapshot]:
+        """seqlock 읽기: 쓰기와 겹치면 재시도, 바뀐 것이 없으면 캐시된 스냅샷 반환"""
+        buf = self.segment.buf
+        for _ in range(retries):
+            seq = SEQ.unpack_from(buf, 0)[0]
+            if seq % 2:
+                time.sleep(0)  # 쓰는 중이면 양보 후 재시도
+                continue
+            if seq == self._cached_seq:
+                return self._cached
+            _, version, fetched_at, updated_at, _, flags = HEADER.unpack_from(buf, 0)
+            values = self._values.unpack_from(buf, HEADER.size)
+            if SEQ.unpack_from(buf, 0)[0] != seq:
+                time.sleep(0)
+                continue
+            if version == 0:
+                return None
+            usd_rates = {
+                code: value for code, value in zip(self.currencies, values) if not math.isnan(value)
+            }
+            self._cached = RateSnapshot(version, fetched_at, updated_at, usd_rates, provisional=bool(flags & 1))
+            self._cached_seq = seq
+            return self._cached
+        logger.warning("공유 스냅샷 읽기 재시도 한도 초과")
+        return self._cached
+
+    def close(self) -> None:
+        self.segment.close()
+
+    def unlink(self) -> None:
+        if self.owner:
+            # 같은 resource_tracker를 쓰는 읽기 프로세스가 등록을 해제했을 수 있으므로 다시 등록 후 삭제
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self.segment._name, "shared_memory")
+            self.segment.unlink()
+
+
+class RateSnapshotStore:
+    """현재 환율 스냅샷 보관소
+
+    writer=True 인 프로세스(단일 프로세스 모드 또는 갱신 전용 프로세스)만 publish 할 수 있고,
+    shared 가 지정된 읽기 전용 워커는 공유 메모리에서 최신 스냅샷을 읽습니다.
+    """
+
+    def __init__(self, shared: Optional[SharedRateSnapshot] = None, writer: bool = True,
+                 history_size: Optional[int] = None):
+        self.shared = shared
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._current: Optional[RateSnapshot] = None
+        self._listeners: List[Callable[[Optional[RateSnapshot], RateSnapshot], None]] = []
+        # 최근 버전 스냅샷 링 (차분 응답용, 오래된 것부터 밀려남)
+        self._history: "deque[RateSnapshot]" = deque(
+            maxlen=max(1, history_size if history_size is not None else settings.rate_snapshot_history)
+        )
+        if shared is not None and writer:
+            # 갱신 프로세스가 재시작되어도 버전이 이어지도록 기존 스냅샷을 이어받음
+            self._current = shared.read()
+            if self._current is not None:
+                self._history.append(self._current)
+
+    def current(self) -> Optional[RateSnapshot]:
+        if self.shared is not None and not self.writer:
+            snapshot = self.shared.read()
+            if snapshot is not None and (not self._history or self._history[-1].version != snapshot.version):
+                # 읽기 워커는 관찰한 버전만 보관 (요청 사이에 지나간 버전은 전체 스냅샷으로 대체됨)
+                self._history.append(snapshot)
+            return snapshot
+        return self._current
+
+    def snapshot_at(self, version: int, timestamp: int) -> Optional[RateSnapshot]:
+        """링에 남아 있는 해당 버전의 스냅샷 (없거나 timestamp 가 그 버전이 유효했던 구간 밖이면 None)
+
+        재시작으로 버전 번호가 다시 시작되면 같은 번호가 다른 환율을 가리킬 수 있으므로,
+        클라이언트가 그 버전과 함께 받은 timestamp(업스트림 갱신 시각)가 이 버전부터 다음 버전 사이인지 확인합니다.
+        """
+        history = tuple(self._history)
+        for index in range(len(history) - 1, -1, -1):
+            snapshot = history[index]
+            if snapshot.version != version:
+                continue
+            if timestamp < int(snapshot.updated_at):
+                return None
+            if index + 1 < len(history) and timestamp > int(history[index + 1].updated_at):
+                return None
+            return snapshot
+        return None
+
+    def subscribe(self, listener: Callable[[Optional[RateSnapshot], RateSnapshot], None]) -> None:
+        """새 버전이 발행될 때 (이전 스냅샷, 새 스냅샷)으로 호출될 콜백 등록"""
+        self._listeners.append(listener)
+
+    def warm_start(self, snapshot: RateSnapshot) -> bool:
+        """아직 스냅샷이 없으면 저장된 스냅샷으로 시작 (버전은 이어서 증가, 첫 publish 전까지 provisional 유지)"""
+        if not self.writer:
+            raise RuntimeError("읽기 전용 스냅샷 저장소에는 발행할 수 없습니다")
+        with self._lock:
+            if self._current is not None:
+                return False
+            self._current = snapshot
+            self._history.append(snapshot)
+            if self.shared is not None:
+                self.shared.write(snapshot.version, snapshot.fetched_at, snapshot.updated_at, snapshot.usd_rates,
+                                  snapshot.provisional)
+        return True
+
+    def publish(self, usd_rates: Dict[str, float], updated_at: Optional[float] = None) -> RateSnapshot:
+        """업스트림 결과 반영: 환율이 바뀌었으면 새 버전, 같으면 확인 시각만 갱신"""
+        if not self.writer:
+            raise RuntimeError("읽기 전용 스냅샷 저장소에는 발행할 수 없습니다")
+
+        now = time.time()
+        rates = {code: float(rate) for code, rate in usd_rates.items()}
+        with self._lock:
+            previous = self._current
+            changed = previous is None or previous.usd_rates != rates
+            version = (previous.version + 1) if changed and previous else (previous.version if previous else 1)
+            snapshot = RateSnapshot(
+                version=version,
+                fetched_at=now,
+                updated_at=updated_at or now,
+                usd_rates=rates if changed else previous.usd_rates,
+                _by_base={} if changed else previous._by_base,
+                cross_rates=None if changed else previous.cross_rates,
+            )
+            self._current = snapshot
+            if changed:
+                self._history.append(snapshot)
+            if self.shared is not None:
+                self.shared.write(snapshot.version, snapshot.fetched_at, snapshot.updated_at, snapshot.usd_rates)
+
+        if changed:
+            for listener in self._listeners:
+                try:
+                    listener(previous, snapshot)
+                except Exception as e:
+                    logger.error(f"스냅샷 리스너 오류: {e}")
+        return snapshot
+
+
+_snapshot_store: Optional[RateSnapshotStore] = None
+
+def get_snapshot_store() -> RateSnapshotStore:
+    """현재 프로세스의 스냅샷 저장소 반환 (RATE_SNAPSHOT_SHM 설정 시 공유 메모리 읽기 전용)"""
+    global _snapshot_store
+    if _snapshot_store is None:
+        if settings.rate_snapshot_shm:
+            shared = SharedRateSnapshot.attach(settings.rate_snapshot_shm)
+            _snapshot_store = RateSnapshotStore(shared=shared, writer=False)
+        else:
+            _snapshot_store = RateSnapshotStore()
+    return _snapshot_store
@@ -0,0 +1,185 @@
+"""
+장중 환율 틱 저장소
+
+갱신기가 새 스냅샷을 발행할 때마다 RATE_TICK_PAIRS 통화쌍의 환율을 exchange_rates 에 한 번의
+다중 행 INSERT 로 기록합니다. 틱 시각은 업스트림 기준 갱신 시각이라 여러 인스턴스가 같은 스냅샷을
+기록해도 (currency_from, currency_to, timestamp) 유니크 키로 한 행만 남습니다.
+exchange_rates 는 월별 파티션이며, 매일 롤업 작업이 RATE_TICK_RETENTION_DAYS 보다 오래된 틱을
+exchange_rate_ohlc_daily 의 일별 시가/고가/저가/종가로 합치고 지난 파티션을 삭제합니다.
+"""
+
+import logging
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..database import get_supabase
+from .rate_snapshot import RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def parse_pairs(spec: str) -> List[Tuple[str, str]]:
+    """"USD/KRW,JPY/KRW" → [("USD", "KRW"), ("JPY", "KRW")]"""
+    pairs = []
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        currency_from, _, currency_to = entry.strip().upper().partition("/")
+        if not currency_from or not currency_to:
+            raise ValueError(f"잘못된 통화쌍 설정: {entry}")
+        pairs.append((currency_from, currency_to))
+    return pairs
+
+
+class RateTickService:
+    """스냅샷 → exchange_rates 틱 기록, 일별 OHLC 롤업, 장중/일별 시세 조회"""
+
+    def __init__(self, pairs: Optional[List[Tuple[str, str]]] = None, retention_days: Optional[int] = None,
+                 max_pending: Optional[int] = None, page_size: int = 1000):
+        self.pairs = pairs if pairs is not None else parse_pairs(settings.rate_tick_pairs)
+        self.retention_days = retention_days if retention_days is not None else settings.rate_tick_retention_days
+        self.max_pending = max_pending if max_pending is not None else settings.bulk_write_max_batch
+        self.page_size = page_size  # PostgREST max-rows(기본 1000) 이하로 유지
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._last_updated_at = 0.0
+        self.stats = {"ticks_written": 0, "flushes": 0, "failures": 0, "dropped": 0, "rolled_up": 0}
+
+    @property
+    def supabase(self):
+        return get_supabase()
+
+    def record(self, snapshot: RateSnapshot) -> int:
+        """스냅샷의 통화쌍 환율을 틱으로 저장 (이미 기록한 업스트림 시각이면 무시), 저장한 행 수 반환"""
+        with self._lock:
+            if snapshot.updated_at <= self._last_updated_at:
+                return 0
+            self._last_updated_at = snapshot.updated_at
+            timestamp = datetime.fromtimestamp(snapshot.updated_at, tz=timezone.utc).isoformat()
+            for currency_from, currency_to in self.pairs:
+                rate = snapshot.rate(currency_from, currency_to)
+                if rate:
+                    self._pending.append({
+                        "currency_from": currency_from,
+                        "currency_to": currency_to,
+                        "rate": round(rate, 6),
+                        "timestamp": timestamp,
+                    })
+        return self.flush()
+
+    def flush(self) -> int:
+        """쌓인 틱을 다중 행 INSERT 1회로 저장 (실패하면 다음 스냅샷 때 함께 재시도)"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        try:
+            self.supabase.table("exchange_rates").upsert(
+                rows, on_conflict="currency_from,currency_to,timestamp", ignore_duplicates=True
+            ).execute()
+        except Exception as e:
+            self.stats["failures"] += 1
+            with self._lock:
+                self._pending[:0] = rows
+                overflow = len(self._pending) - self.max_pending
+                if overflow > 0:
+                    # 계속 실패하는 동안 버퍼가 무한히 커지지 않도록 오래된 틱부터 버림
+                    del self._pending[:overflow]
+                    self.stats["dropped"] += overflow
+            logger.error(f"환율 틱 저장 실패 (다음 갱신 때 재시도): {e}")
+            return 0
+        self.stats["flushes"] += 1
+        self.stats["ticks_written"] += len(rows)
+        return len(rows)
+
+    def rollup(self, today: Optional[date] = None) -> int:
+        """보관 기간이 지난 틱을 일별 OHLC 로 합치고 삭제, 다음 달 파티션 준비 (합친 일수×통화쌍 수 반환)"""
+        today = today or datetime.now(timezone.utc).date()
+        cutoff = today - timedelta(days=self.retention_days)
+        self.supabase.rpc("ensure_exchange_rate_partitions", {"p_months_ahead": 2}).execute()
+        result = self.supabase.rpc("rollup_exchange_rate_ticks", {"p_before": cutoff.isoformat()}).execute()
+        rolled_up = result.data or 0
+        self.stats["rolled_up"] += rolled_up
+        logger.info(f"환율 틱 롤업 완료 ({cutoff} 이전, {rolled_up}건)")
+        return rolled_up
+
+    def _select_pages(self, query_after: Callable[[Optional[str]], Any], key: str) -> List[Dict]:
+        """key 오름차순 키셋 페이지로 끝까지 읽음 (max-rows 에서 결과가 잘리지 않도록)
+
+        query_after(마지막 key 값 또는 None) 은 그 다음 행부터 고르는 쿼리를 반환합니다.
+        """
+        rows: List[Dict] = []
+        last = None
+        while True:
+            page = query_after(last).order(key).limit(self.page_size).execute().data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            last = page[-1][key]
+
+    async def get_intraday(self, currency_from: str, currency_to: str,
+                           start: datetime, end: Optional[datetime] = None) -> List[Dict]:
+        """기간 내 틱 (시간순), (통화쌍, timestamp) 인덱스와 월별 파티션 범위로 읽음"""
+        def query_after(last: Optional[str]):
+            query = self.supabase.table("exchange_rates").select("rate, timestamp").eq(
+                "currency_from", currency_from
+            ).eq("currency_to", currency_to)
+            # 통화쌍마다 timestamp 가 유일하므로 이전 페이지 마지막 시각 다음부터 읽음
+            query = query.gte("timestamp", start.isoformat()) if last is None else query.gt("timestamp", last)
+            return query if end is None else query.lte("timestamp", end.isoformat())
+
+        rows = self._select_pages(query_after, "timestamp")
+        return [{"timestamp": row["timestamp"], "rate": float(row["rate"])} for row in rows]
+
+    async def get_ohlc(self, currency_from: str, currency_to: str,
+                       start_date: date, end_date: date) -> List[Dict]:
+        """일별 시가/고가/저가/종가 (날짜순), 아직 롤업되지 않은 최근 날짜는 틱에서 바로 계산"""
+        def query_after(last: Optional[str]):
+            query = self.supabase.table("exchange_rate_ohlc_daily").select(
+                "date, open, high, low, close, tick_count"
+            ).eq("currency_from", currency_from).eq("currency_to", currency_to)
+            query = query.gte("date", start_date.isoformat()) if last is None else query.gt("date", last)
+            return query.lte("date", end_date.isoformat())
+
+        candles = [
+            {
+                "date": row["date"],
+                "open": float(row["open"]),
+                "high": float(row["high"]),
+                "low": float(row["low"]),
+                "close": float(row["close"]),
+                "tick_count": row["tick_count"],
+            }
+            for row in self._select_pages(query_after, "date")
+        ]
+        # 롤업된 마지막 날 다음 날부터의 틱만 읽음
+        rolled_until = candles[-1]["date"] if candles else ""
+        if rolled_until:
+            start_date = max(start_date, date.fromisoformat(rolled_until) + timedelta(days=1))
+        tick_start = datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc)
+        tick_end = datetime.combine(end_date, datetime.max.time(), tzinfo=timezone.utc)
+        by_date: Dict[str, Dict] = {}
+        for tick in await self.get_intraday(currency_from, currency_to, tick_start, tick_end):
+            day = datetime.fromisoformat(tick["timestamp"]).astimezone(timezone.utc).date().isoformat()
+            rate = tick["rate"]
+            candle = by_date.get(day)
+            if candle is None:
+                by_date[day] = {"date": day, "open": rate, "high": rate, "low": rate, "close": rate, "tick_count": 1}
+            else:
+                candle["high"] = max(candle["high"], rate)
+                candle["low"] = min(candle["low"], rate)
+                candle["close"] = rate
+                candle["tick_count"] += 1
+        return candles + list(by_date.values())
+
+
+_rate_tick_service: Optional[RateTickService] = None
+
+def get_rate_tick_service() -> RateTickService:
+    """환율 틱 서비스 인스턴스 반환 (최초 호출 시 생성)"""
+    global _rate_tick_service
+    if _rate_tick_service is None:
+        _rate_tick_service = RateTickService()
+    return _rate_tick_service
@@ -0,0 +1,132 @@
+"""
+재시작용 환율 스냅샷 파일
+
+갱신기가 스냅샷을 발행할 때마다 USD 기준 환율과 통화 간 교차 환율 행렬을 파일로 저장하고
+(임시 파일에 쓴 뒤 rename 으로 교체), 시작할 때 mmap 으로 열어 첫 업스트림 갱신 전에도 바로 응답합니다.
+
+파일 레이아웃 (little-endian):
+    0   4s      magic        b"FXSN"
+    4   uint16  format       FILE_FORMAT
+    6   uint16  count        통화 수 N
+    8   uint64  version      스냅샷 버전
+    16  float64 fetched_at   마지막으로 업스트림에서 확인한 시각 (epoch)
+    24  float64 updated_at   업스트림 기준 갱신 시각
+    32  char[3 * N]          통화 코드 (정렬, ASCII 3자리씩), 8바이트 정렬까지 0 채움
+    ..  float64[N]           USD 기준 환율
+    ..  float64[N * N]       교차 환율 행렬 (행 i = 통화 i 1단위의 각 통화 환산 값)
+"""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+
+from .rate_snapshot import RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+FILE_FORMAT = 1
+FILE_MAGIC = b"FXSN"
+FILE_HEADER = struct.Struct("<4sHHQdd")
+
+
+def _layout(count: int) -> Tuple[int, int, int]:
+    """(USD 환율 시작, 행렬 시작, 전체 크기)"""
+    codes_end = FILE_HEADER.size + 3 * count
+    rates_offset = codes_end + (-codes_end % 8)
+    matrix_offset = rates_offset + 8 * count
+    return rates_offset, matrix_offset, matrix_offset + 8 * count * count
+
+
+class CrossRateMatrix:
+    """mmap 된 파일의 교차 환율 행렬 (행 단위로 필요할 때만 읽음)"""
+
+    def __init__(self, buffer: mmap.mmap, offset: int, currencies: Tuple[str, ...]):
+        self._buffer = buffer
+        self._offset = offset
+        self.currencies = currencies
+        self.index = {code: i for i, code in enumerate(currencies)}
+        self._row = struct.Struct(f"<{len(currencies)}d")
+
+    def row(self, base_currency: str) -> Dict[str, float]:
+        """base_currency 1단위의 모든 통화 환산 값"""
+        values = self._row.unpack_from(self._buffer, self._offset + self._row.size * self.index[base_currency])
+        return dict(zip(self.currencies, values))
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        position = self._offset + 8 * (self.index[from_currency] * len(self.currencies) + self.index[to_currency])
+        return struct.unpack_from("<d", self._buffer, position)[0]
+
+
+def encode_snapshot(snapshot: RateSnapshot) -> bytes:
+    currencies = sorted(code for code, rate in snapshot.usd_rates.items() if rate)
+    count = len(currencies)
+    rates_offset, _, _ = _layout(count)
+    usd = [snapshot.usd_rates[code] for code in currencies]
+    header = FILE_HEADER.pack(FILE_MAGIC, FILE_FORMAT, count, snapshot.version,
+                              snapshot.fetched_at, snapshot.updated_at)
+    codes = "".join(currencies).encode("ascii")
+    padding = b"\0" * (rates_offset - len(header) - len(codes))
+    row = struct.Struct(f"<{count}d")
+    matrix = b"".join(row.pack(*[rate / base_rate for rate in usd]) for base_rate in usd)
+    return header + codes + padding + struct.pack(f"<{count}d", *usd) + matrix
+
+
+def write_snapshot_file(path: str, snapshot: RateSnapshot) -> None:
+    """같은 디렉터리의 임시 파일에 쓴 뒤 rename (읽는 쪽은 항상 완성된 파일만 봄)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    data = encode_snapshot(snapshot)
+    fd, temp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_snapshot_file(path: str, max_age: Optional[float] = None) -> Optional[RateSnapshot]:
+    """파일을 mmap 으로 열어 스냅샷 복원 (없거나 손상되었거나 max_age 보다 오래되었으면 None)"""
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # ValueError: 빈 파일
+        return None
+    except OSError as e:
+        logger.warning(f"스냅샷 파일 열기 실패 ({path}): {e}")
+        return None
+
+    try:
+        magic, file_format, count, version, fetched_at, updated_at = FILE_HEADER.unpack_from(buffer, 0)
+        rates_offset, matrix_offset, size = _layout(count)
+        if magic != FILE_MAGIC or file_format != FILE_FORMAT or len(buffer) != size:
+            raise ValueError("형식 또는 크기 불일치")
+        codes = buffer[FILE_HEADER.size:FILE_HEADER.size + 3 * count].decode("ascii")
+    except (struct.error, ValueError, UnicodeDecodeError) as e:
+        logger.warning(f"스냅샷 파일 무시 ({path}): {e}")
+        buffer.close()
+        return None
+
+    if max_age is not None and time.time() - fetched_at > max_age:
+        buffer.close()
+        return None
+
+    currencies = tuple(codes[i:i + 3] for i in range(0, len(codes), 3))
+    usd_rates = dict(zip(currencies, struct.unpack_from(f"<{count}d", buffer, rates_offset)))
+    return RateSnapshot(
+        version=version,
+        fetched_at=fetched_at,
+        updated_at=updated_at,
+        usd_rates=usd_rates,
+        cross_rates=CrossRateMatrix(buffer, matrix_offset, currencies),
+    )
@@ -0,0 +1,185 @@
+"""
+Supabase 액세스 토큰 검증기
+
+- HS256 토큰은 SUPABASE_JWT_SECRET, RS256/ES256 토큰은 JWKS 공개키로 서명을 검증합니다.
+  허용 알고리즘은 헤더가 아니라 키로 정합니다 (시크릿은 HS256, JWKS 키는 그 키의 alg).
+- 검증된 클레임은 토큰별로 exp 까지(최대 JWT_CACHE_MAX_TTL) 캐시하므로 같은 토큰의 반복 요청은 서명 검증을 하지 않습니다.
+- JWKS 는 백그라운드 스레드가 주기적으로 갱신하고, 모르는 kid 가 오면 즉시 1회 다시 받습니다.
+- 시크릿도 JWKS 키도 없으면 모든 로그인이 401 이 되므로 시작 시 ensure_configured() 로 바로 실패시킵니다.
+- jwt 는 앱 import 시간을 줄이기 위해 사용하는 곳에서 import 합니다.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from ..config import settings
+
+if TYPE_CHECKING:
+    import jwt
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512", "EdDSA")
+
+
+class TokenVerifier:
+    """JWT 서명 검증 + 클레임 TTL 캐시"""
+
+    def __init__(self, secret: Optional[str] = None, jwks_url: Optional[str] = None,
+                 audience: Optional[str] = None, cache_size: Optional[int] = None,
+                 max_ttl: Optional[float] = None, refresh_interval: Optional[float] = None):
+        self.secret = secret if secret is not None else settings.supabase_jwt_secret
+        default_jwks_url = f"{settings.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        self.jwks_url = jwks_url if jwks_url is not None else (settings.supabase_jwks_url or default_jwks_url)
+        self.audience = audience if audience is not None else settings.jwt_audience
+        self.cache_size = cache_size if cache_size is not None else settings.jwt_cache_size
+        self.max_ttl = max_ttl if max_ttl is not None else settings.jwt_cache_max_ttl
+        self.refresh_interval = refresh_interval if refresh_interval is not None else settings.jwks_refresh_interval
+        self._lock = threading.Lock()
+        self._claims: "OrderedDict[bytes, Tuple[float, Dict]]" = OrderedDict()
+        self._keys: Dict[str, "jwt.PyJWK"] = {}
+        self._keys_fetched_at = 0.0
+        self._jwks_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"hits": 0, "misses": 0, "rejected": 0, "jwks_refreshes": 0}
+
+    @staticmethod
+    def _cache_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def cached(self, token: str) -> Optional[Dict]:
+        """캐시에 있고 아직 만료되지 않은 토큰의 클레임 (없으면 None)"""
+        key = self._cache_key(token)
+        with self._lock:
+            entry = self._claims.get(key)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._claims[key]
+                return None
+            self._claims.move_to_end(key)
+            self.stats["hits"] += 1
+            return claims
+
+    def verify(self, token: str) -> Dict:
+        """서명과 exp/aud 를 검증한 클레임 반환 (실패 시 jwt.InvalidTokenError)"""
+        import jwt
+        claims = self.cached(token)
+        if claims is not None:
+            return claims
+
+        self.stats["misses"] += 1
+        try:
+            key, algorithm = self._signing_key(token)
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience or None,
+                options={"require": ["exp", "sub"], "verify_aud": bool(self.audience)},
+            )
+        except jwt.InvalidTokenError:
+            self.stats["rejected"] += 1
+            raise
+
+        now = time.time()
+        expires_at = min(float(claims["exp"]), now + self.max_ttl)
+        key = self._cache_key(token)
+        with self._lock:
+            self._claims[key] = (expires_at, claims)
+            self._claims.move_to_end(key)
+            while len(self._claims) > self.cache_size:
+                self._claims.popitem(last=False)
+        return claims
+
+    def _signing_key(self, token: str) -> Tuple[object, str]:
+        """(검증 키, 그 키로 허용할 알고리즘) - 헤더의 alg 는 키를 고르는 데만 쓰고 그대로 믿지 않음"""
+        import jwt
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.secret:
+                raise jwt.InvalidTokenError("SUPABASE_JWT_SECRET 이 설정되지 않았습니다")
+            return self.secret, "HS256"
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise jwt.InvalidAlgorithmError(f"지원하지 않는 서명 알고리즘: {algorithm}")
+
+        kid = header.get("kid")
+        key = self._keys.get(kid)
+        if key is None:
+            # 키 교체 직후일 수 있으므로 한 번 다시 받되, 잘못된 kid 로 JWKS 를 연속 호출하지 않도록 10초 간격 제한
+            if time.monotonic() - self._keys_fetched_at >= 10:
+                self.refresh_keys()
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"알 수 없는 서명 키: {kid}")
+        return key.key, key.algorithm_name
+
+    def refresh_keys(self) -> None:
+        """JWKS 를 다시 받아 키 목록 교체 (실패 시 기존 키 유지)"""
+        import httpx
+        import jwt
+        with self._jwks_lock:
+            self._keys_fetched_at = time.monotonic()
+            try:
+                response = httpx.get(self.jwks_url, timeout=5)
+                response.raise_for_status()
+                keys = {}
+                for jwk in response.json().get("keys", []):
+                    try:
+                        keys[jwk.get("kid")] = jwt.PyJWK(jwk)
+                    except jwt.PyJWKError as e:
+                        logger.warning(f"JWKS 키 무시 ({jwk.get('kid')}): {e}")
+            except Exception as e:
+                logger.error(f"JWKS 갱신 실패: {e}")
+                return
+            self._keys = keys
+            self.stats["jwks_refreshes"] += 1
+
+    def ensure_configured(self) -> None:
+        """HS256 시크릿이 없는데 JWKS 에도 키가 없으면 RuntimeError (서명 검증을 켠 채 시작하면 모든 토큰이 거부됨)"""
+        if self.secret:
+            return
+        if self.jwks_url.startswith("http"):
+            self.refresh_keys()
+        if not self._keys:
+            raise RuntimeError(
+                "JWT_VERIFY_SIGNATURE=true 이지만 SUPABASE_JWT_SECRET 이 비어 있고 "
+                f"JWKS({self.jwks_url})에서 받은 키도 없습니다. HS256 프로젝트는 SUPABASE_JWT_SECRET 을 설정하세요"
+            )
+
+    def start(self) -> None:
+        """JWKS 를 주기적으로 갱신하는 백그라운드 스레드 시작 (HS256 전용 설정이면 시작하지 않음)"""
+        if not self.jwks_url.startswith("http") or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_refresh_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run_refresh_loop(self) -> None:
+        if not self._keys:
+            self.refresh_keys()
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh_keys()
+
+
+_token_verifier: Optional[TokenVerifier] = None
+
+def get_token_verifier() -> TokenVerifier:
+    """토큰 검증기 인스턴스 반환 (최초 호출 시 생성)"""
+    global _token_verifier
+    if _token_verifier is None:
+        _token_verifier = TokenVerifier()
+    return _token_verifier
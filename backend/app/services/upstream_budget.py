@@ -0,0 +1,207 @@
+"""
+업스트림 호출 월간 예산
+
+UPSTREAM_MONTHLY_QUOTA 를 UTC 달력 월 단위로 나눠 씁니다.
+- scheduled: 정기 갱신. 남은 정기 예산을 이번 달 남은 시간에 고르게 나눠 갱신 주기를 정함
+- alert: 목표 환율 근처에 무장 알림이 있을 때만 쓰는 추가 갱신 (UPSTREAM_ALERT_RESERVE 비율만큼 따로 확보)
+- on_demand: 스냅샷이 아직 없을 때 요청 경로에서 직접 호출 (정기 예산에서 차감)
+따라서 호출 수는 API 트래픽과 무관하게 예산 안에서 일정합니다.
+예산은 업스트림에 실제로 보낸 HTTP 요청마다 차감합니다 (헤지/장애 조치 요청 포함).
+
+예산 모드의 사용량은 upstream_budget_usage 테이블에 두고 spend_upstream_budget RPC 로 차감하므로
+모든 인스턴스가 같은 예산을 나눠 쓰고 재시작해도 그 달 사용량이 유지됩니다.
+남은 예산 계산에는 min_interval 마다 다시 읽은 사용량을 쓰고, DB 를 쓸 수 없으면 이 프로세스의 카운터로 판단합니다.
+"""
+
+import calendar
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..database import get_supabase
+
+logger = logging.getLogger(__name__)
+
+PURPOSES = ("scheduled", "alert", "on_demand")
+
+
+def _month_bounds(now: float) -> Tuple[str, float, float]:
+    """(YYYY-MM, 월 시작 epoch, 다음 달 시작 epoch)"""
+    current = datetime.fromtimestamp(now, tz=timezone.utc)
+    start = current.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    days = calendar.monthrange(current.year, current.month)[1]
+    return start.strftime("%Y-%m"), start.timestamp(), start.timestamp() + days * 86400
+
+
+class UpstreamBudget:
+    """월간 호출 예산 (quota 0 이면 무제한, 갱신 주기는 min_interval 고정)"""
+
+    def __init__(self, monthly_quota: Optional[int] = None, alert_reserve: Optional[float] = None,
+                 min_interval: Optional[float] = None, shared: bool = True):
+        self.monthly_quota = monthly_quota if monthly_quota is not None else settings.upstream_monthly_quota
+        self.alert_reserve = alert_reserve if alert_reserve is not None else settings.upstream_alert_reserve
+        self.min_interval = min_interval if min_interval is not None else settings.rate_refresh_interval
+        self.shared = shared  # 예산 모드에서 DB 의 공유 사용량 사용
+        self._lock = threading.Lock()
+        self._month = ""
+        self._month_end = 0.0
+        self._synced_at = float("-inf")
+        self.used: Dict[str, int] = {purpose: 0 for purpose in PURPOSES}
+        self.denied = 0
+        self._snapshot_max_age: Optional[float] = None  # 갱신 루프에서 마지막으로 계산한 값 (요청 경로용)
+
+    @property
+    def limited(self) -> bool:
+        return self.monthly_quota > 0
+
+    def _roll(self, now: float) -> None:
+        month, _, month_end = _month_bounds(now)
+        if month != self._month:
+            self._month, self._month_end = month, month_end
+            self.used = {purpose: 0 for purpose in PURPOSES}
+            self.denied = 0
+            self._synced_at = float("-inf")
+            self._snapshot_max_age = None
+
+    @property
+    def _uses_db(self) -> bool:
+        return self.shared and self.limited
+
+    def _apply_usage(self, used: Dict[str, int]) -> None:
+        """DB 에서 읽은 이번 달 사용량 반영 (lock 안에서 호출)"""
+        self.used = {purpose: int(used.get(purpose, 0)) for purpose in PURPOSES}
+        self._synced_at = time.monotonic()
+
+    def _sync(self, now: float) -> None:
+        """min_interval 이 지났으면 다른 인스턴스가 쓴 사용량까지 다시 읽음"""
+        with self._lock:
+            self._roll(now)
+            if not self._uses_db or time.monotonic() - self._synced_at < self.min_interval:
+                return
+            month = self._month
+        try:
+            rows = get_supabase().table("upstream_budget_usage").select("purpose, used").eq("month", month).execute().data
+        except Exception as e:
+            logger.warning(f"업스트림 예산 사용량 조회 실패 (이 프로세스 카운터 사용): {e}")
+            with self._lock:
+                self._synced_at = time.monotonic()
+            return
+        with self._lock:
+            if month == self._month:
+                self._apply_usage({row["purpose"]: row["used"] for row in rows})
+
+    def _pool_purposes(self, purpose: str) -> List[str]:
+        return ["alert"] if purpose == "alert" else ["scheduled", "on_demand"]
+
+    def _pool(self, purpose: str) -> Tuple[int, int]:
+        """(purpose 가 속한 예산 한도, 사용량) - alert 는 예비분, 나머지는 정기 예산"""
+        reserve = int(self.monthly_quota * self.alert_reserve)
+        if purpose == "alert":
+            return reserve, self.used["alert"]
+        return self.monthly_quota - reserve, self.used["scheduled"] + self.used["on_demand"]
+
+    def remaining(self, purpose: str = "scheduled", now: Optional[float] = None) -> Optional[int]:
+        """purpose 예산의 이번 달 남은 호출 수 (무제한이면 None)"""
+        now = time.time() if now is None else now
+        self._sync(now)
+        with self._lock:
+            self._roll(now)
+            if not self.limited:
+                return None
+            limit, used = self._pool(purpose)
+            return max(limit - used, 0)
+
+    def try_spend(self, purpose: str, now: Optional[float] = None) -> bool:
+        """예산이 남아 있으면 1회 차감하고 True (예산 모드에서는 모든 인스턴스가 공유하는 DB 사용량에서 차감)"""
+        with self._lock:
+            self._roll(time.time() if now is None else now)
+            month = self._month
+            limit, _ = self._pool(purpose)
+        if self._uses_db:
+            try:
+                result = get_supabase().rpc("spend_upstream_budget", {
+                    "p_month": month, "p_purpose": purpose,
+                    "p_pool": self._pool_purposes(purpose), "p_limit": limit,
+                }).execute().data
+            except Exception as e:
+                logger.warning(f"업스트림 예산 차감 실패 (이 프로세스 카운터로 판단): {e}")
+            else:
+                with self._lock:
+                    if month == self._month:
+                        self._apply_usage(result["used"])
+                    if not result["allowed"]:
+                        self.denied += 1
+                return bool(result["allowed"])
+        with self._lock:
+            if self.limited:
+                limit, used = self._pool(purpose)
+                if used >= limit:
+                    self.denied += 1
+                    return False
+            self.used[purpose] += 1
+            return True
+
+    def _spread(self, remaining: Optional[int], now: float) -> float:
+        if remaining is None:
+            return self.min_interval
+        if remaining == 0:
+            return max(self._month_end - now, self.min_interval)  # 다음 달까지 대기
+        return max((self._month_end - now) / remaining, self.min_interval)
+
+    def interval(self, purpose: str = "scheduled", now: Optional[float] = None) -> float:
+        """남은 예산을 이번 달 남은 시간에 고르게 쓰는 호출 간격 (초, 최소 min_interval)"""
+        now = time.time() if now is None else now
+        return self._spread(self.remaining(purpose, now), now)
+
+    def snapshot_max_age(self, now: Optional[float] = None) -> float:
+        """스냅샷을 최신으로 볼 최대 나이 (예산 모드에서는 정기 갱신 주기만큼 더 허용)
+
+        예산 모드의 갱신 주기는 RATE_SNAPSHOT_MAX_AGE 보다 길 수 있으므로, 고정 값으로 판단하면
+        정상적으로 갱신되고 있는 스냅샷도 오래된 것으로 보여 ETag 가 빠집니다.
+        DB 사용량을 다시 읽을 수 있으므로 갱신 루프에서 호출하고, 요청 경로는 cached_snapshot_max_age 를 씁니다.
+        """
+        if not self.limited:
+            return settings.rate_snapshot_max_age
+        max_age = self.interval("scheduled", now) + settings.rate_snapshot_max_age
+        self._snapshot_max_age = max_age
+        return max_age
+
+    def cached_snapshot_max_age(self, now: Optional[float] = None) -> float:
+        """DB 를 읽지 않는 snapshot_max_age (갱신 루프가 계산해 둔 값, 없으면 이 프로세스의 사용량으로 추정)"""
+        if not self.limited:
+            return settings.rate_snapshot_max_age
+        if self._snapshot_max_age is not None:
+            return self._snapshot_max_age
+        now = time.time() if now is None else now
+        with self._lock:
+            self._roll(now)
+            limit, used = self._pool("scheduled")
+        return self._spread(max(limit - used, 0), now) + settings.rate_snapshot_max_age
+
+    def metrics(self) -> Dict:
+        now = time.time()
+        remaining = self.remaining("scheduled", now)  # 달이 바뀌었으면 먼저 초기화
+        return {
+            "month": self._month,
+            "monthly_quota": self.monthly_quota or None,
+            "used": sum(self.used.values()),
+            "used_by_purpose": dict(self.used),
+            "remaining": remaining,
+            "remaining_alert_reserve": self.remaining("alert", now),
+            "denied": self.denied,
+            "scheduled_interval_seconds": round(self.interval("scheduled", now), 1),
+            "alert_interval_seconds": round(self.interval("alert", now), 1),
+        }
+
+
+_upstream_budget: Optional[UpstreamBudget] = None
+
+def get_upstream_budget() -> UpstreamBudget:
+    """업스트림 예산 인스턴스 반환 (최초 호출 시 생성)"""
+    global _upstream_budget
+    if _upstream_budget is None:
+        _upstream_budget = UpstreamBudget()
+    return _upstream_budget
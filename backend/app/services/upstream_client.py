@@ -0,0 +1,314 @@
+"""
+업스트림 환율 API 클라이언트
+
+여러 환율 제공자를 우선순위대로 사용하며, 느리거나 장애가 난 제공자 때문에 요청이 묶이지 않도록 합니다.
+- 제공자별 서킷 브레이커: 연속 실패 시 열림(호출 생략), reset_timeout 후 반열림 상태에서 1건만 시험 호출
+- 헤지 요청: 첫 요청이 최근 p95 지연 안에 끝나지 않으면 다음 제공자로 한 번 더 요청 (제공자가 하나면 헤지하지 않음)
+- 장애 조치: 실패하면 다음 제공자로 넘어가고, 가장 먼저 성공한 응답을 사용
+- 호출 목적(purpose)이 주어지면 실제로 보내는 요청마다(헤지/장애 조치 포함) 업스트림 예산을 차감하고,
+  예산이 없으면 요청을 보내지 않음 (첫 요청부터 막히면 UpstreamBudgetExhausted)
+- 응답은 제공자별 정규화 함수로 exchangerate-api.com v4 형식({base, date, time_last_updated, rates})으로 맞춤
+- HTTP 클라이언트(커넥션 풀)는 기본 이벤트 루프 하나에만 두고, 다른 스레드의 루프(모니터링 스레드의 asyncio.run 등)에서
+  온 호출은 기본 루프에서 실행합니다. 기본 루프가 돌고 있지 않으면 호출마다 임시 클라이언트를 열고 닫습니다.
+
+UPSTREAM_PROVIDERS 예: "exchangerate-api-v4=https://api.exchangerate-api.com/v4/latest/{base},
+open-er-api=https://open.er-api.com/v6/latest/{base}" (URL 의 {api_key} 는 EXCHANGE_RATE_API_KEY 로 치환)
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from ..config import settings
+from .upstream_budget import UpstreamBudget, get_upstream_budget
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    """모든 제공자 호출이 실패했거나 서킷이 열려 있음"""
+
+
+class UpstreamBudgetExhausted(UpstreamUnavailable):
+    """이번 달 업스트림 호출 예산을 모두 사용해 요청을 보내지 않음"""
+
+
+def _normalized(base: str, updated_at: int, rates: Dict[str, float]) -> Dict:
+    rates = {code.upper(): float(rate) for code, rate in rates.items()}
+    rates[base] = 1.0
+    return {
+        "base": base,
+        "date": datetime.fromtimestamp(updated_at, tz=timezone.utc).date().isoformat(),
+        "time_last_updated": updated_at,
+        "rates": rates,
+    }
+
+
+def normalize_exchangerate_api_v4(data: Dict, base: str) -> Dict:
+    """exchangerate-api.com v4 (및 로컬 시뮬레이터)"""
+    return _normalized(data.get("base", base).upper(), int(data["time_last_updated"]), data["rates"])
+
+
+def normalize_exchangerate_api_v6(data: Dict, base: str) -> Dict:
+    """exchangerate-api.com v6 / open.er-api.com"""
+    if data.get("result", "success") != "success":
+        raise ValueError(f"업스트림 오류 응답: {data.get('error-type')}")
+    rates = data.get("conversion_rates") or data["rates"]
+    return _normalized(data.get("base_code", base).upper(), int(data["time_last_update_unix"]), rates)
+
+
+def normalize_frankfurter(data: Dict, base: str) -> Dict:
+    """frankfurter.app (ECB 기준, 날짜만 제공)"""
+    published = datetime.strptime(data["date"], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return _normalized(data.get("base", base).upper(), int(published.timestamp()), data["rates"])
+
+
+NORMALIZERS: Dict[str, Callable[[Dict, str], Dict]] = {
+    "exchangerate-api-v4": normalize_exchangerate_api_v4,
+    "exchangerate-api-v6": normalize_exchangerate_api_v6,
+    "open-er-api": normalize_exchangerate_api_v6,
+    "frankfurter": normalize_frankfurter,
+}
+
+
+class CircuitBreaker:
+    """연속 실패 횟수 기반 서킷 브레이커 (closed → open → half_open → closed/open)"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """지금 호출해도 되는지 (반열림 상태에서는 시험 호출 1건만 허용)"""
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"업스트림 서킷 열림 (연속 실패 {self.failures}회)")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """결과 없이 취소된 호출 (헤지에서 진 요청) - 성공/실패로 세지 않음"""
+        self._probe_in_flight = False
+
+
+@dataclass
+class UpstreamProvider:
+    """환율 제공자 (URL 템플릿 + 응답 정규화 함수 + 서킷/지연 통계)"""
+    name: str
+    url_template: str
+    normalizer: Callable[[Dict, str], Dict]
+    breaker: CircuitBreaker
+    latencies: "deque[float]" = field(default_factory=lambda: deque(maxlen=200))
+
+    def url(self, base: str) -> str:
+        return self.url_template.format(base=base, api_key=settings.exchange_rate_api_key)
+
+    def p95(self) -> Optional[float]:
+        """최근 성공 응답 지연의 p95 (표본이 적으면 None)"""
+        if len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+def parse_providers(spec: str) -> List[UpstreamProvider]:
+    """UPSTREAM_PROVIDERS 설정 파싱 (비어 있으면 EXCHANGE_RATE_API_BASE_URL 의 v4 제공자 하나)"""
+    entries = [entry.strip() for entry in spec.split(",") if entry.strip()]
+    if not entries:
+        entries = [f"exchangerate-api-v4={settings.exchange_rate_api_base_url.rstrip('/')}/latest/{{base}}"]
+    providers = []
+    for entry in entries:
+        kind, _, url_template = entry.partition("=")
+        kind = kind.strip()
+        if kind not in NORMALIZERS or not url_template:
+            raise ValueError(f"잘못된 업스트림 제공자 설정: {entry}")
+        providers.append(UpstreamProvider(
+            name=f"{kind}@{urlparse(url_template).netloc}",
+            url_template=url_template.strip(),
+            normalizer=NORMALIZERS[kind],
+            breaker=CircuitBreaker(settings.upstream_failure_threshold, settings.upstream_reset_timeout),
+        ))
+    return providers
+
+
+class UpstreamClient:
+    """서킷 브레이커/헤지 요청/장애 조치를 적용한 업스트림 호출"""
+
+    def __init__(self, providers: Optional[List[UpstreamProvider]] = None, timeout: Optional[float] = None,
+                 hedge_delay: Optional[float] = None, hedge_min_delay: Optional[float] = None,
+                 mounts: Optional[Dict] = None, budget: Optional[UpstreamBudget] = None):
+        self.providers = providers if providers is not None else parse_providers(settings.upstream_providers)
+        self.timeout = timeout if timeout is not None else settings.upstream_timeout
+        self.hedge_delay = hedge_delay if hedge_delay is not None else settings.upstream_hedge_delay
+        self.hedge_min_delay = hedge_min_delay if hedge_min_delay is not None else settings.upstream_hedge_min_delay
+        self.mounts = mounts  # 테스트/벤치마크에서 로컬 ASGI 앱(시뮬레이터)으로 연결할 때 사용
+        self.budget = budget or get_upstream_budget()
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # _client 가 속한 기본 루프
+        self.stats = {"requests": 0, "hedged": 0, "failovers": 0, "short_circuited": 0, "failures": 0,
+                      "budget_denied": 0}
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """클라이언트를 둘 기본 루프 지정 (앱 lifespan 에서 호출, 지정하지 않으면 처음 호출한 루프)"""
+        self._loop = loop
+
+    def _new_client(self):
+        import httpx
+        return httpx.AsyncClient(timeout=self.timeout, mounts=self.mounts)
+
+    async def aclose(self) -> None:
+        """기본 루프에서 호출해 클라이언트 종료"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _hedge_after(self, provider: UpstreamProvider) -> float:
+        p95 = provider.p95()
+        delay = self.hedge_delay if p95 is None else p95
+        return min(max(delay, self.hedge_min_delay), self.timeout)
+
+    async def _attempt(self, client, provider: UpstreamProvider, base: str) -> Dict:
+        import httpx
+        started = time.perf_counter()
+        try:
+            response = await client.get(provider.url(base))
+            response.raise_for_status()
+            data = provider.normalizer(response.json(), base)
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            if status >= 500 or status == 429:
+                provider.breaker.record_failure()
+            else:
+                provider.breaker.record_success()  # 4xx(지원하지 않는 통화 등)는 제공자 장애가 아님
+            raise
+        except Exception:
+            provider.breaker.record_failure()
+            raise
+        provider.breaker.record_success()
+        provider.latencies.append(time.perf_counter() - started)
+        return data
+
+    async def fetch(self, base: str = "USD", purpose: Optional[str] = None) -> Dict:
+        """기준 통화의 전체 환율 (v4 형식), 모든 제공자가 실패하면 UpstreamUnavailable
+
+        purpose(scheduled/on_demand/alert)가 주어지면 보내는 요청마다 그 목적의 예산을 차감합니다.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is None or self._loop.is_closed():
+            self._loop, self._client = loop, None
+        if self._loop is not loop:
+            if self._loop.is_running():
+                future = asyncio.run_coroutine_threadsafe(self.fetch(base, purpose), self._loop)
+                return await asyncio.wrap_future(future)
+            async with self._new_client() as client:
+                return await self._fetch(client, base, purpose)
+        if self._client is None:
+            self._client = self._new_client()
+        return await self._fetch(self._client, base, purpose)
+
+    async def _fetch(self, client, base: str, purpose: Optional[str]) -> Dict:
+        self.stats["requests"] += 1
+        remaining = iter(self.providers)
+        pending: Dict[asyncio.Task, UpstreamProvider] = {}
+        errors: List[str] = []
+        budget_denied = False
+
+        async def launch() -> Optional[UpstreamProvider]:
+            nonlocal budget_denied
+            if budget_denied:
+                return None
+            for candidate in remaining:
+                if not candidate.breaker.allow():
+                    self.stats["short_circuited"] += 1
+                    continue
+                # 예산 차감은 DB 호출이라 루프를 막지 않도록 스레드에서 실행
+                if purpose is not None and not await asyncio.to_thread(self.budget.try_spend, purpose):
+                    candidate.breaker.release()
+                    self.stats["budget_denied"] += 1
+                    budget_denied = True
+                    return None
+                pending[asyncio.ensure_future(self._attempt(client, candidate, base))] = candidate
+                return candidate
+            return None
+
+        primary = await launch()
+        if primary is None and budget_denied:
+            raise UpstreamBudgetExhausted(f"이번 달 업스트림 호출 예산({purpose})을 모두 사용했습니다")
+        hedged = primary is None
+        try:
+            while pending:
+                hedge_timeout = None if hedged else self._hedge_after(primary)
+                done, _ = await asyncio.wait(pending, timeout=hedge_timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 첫 요청이 p95 안에 끝나지 않음: 다음 제공자로 헤지 (같은 제공자에 중복 요청하지 않음)
+                    hedged = True
+                    if await launch():
+                        self.stats["hedged"] += 1
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        errors.append(f"{provider.name}: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+                if not pending and await launch():
+                    self.stats["failovers"] += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self.stats["failures"] += 1
+        raise UpstreamUnavailable("업스트림 호출 실패 - " + ("; ".join(errors) or "모든 제공자의 서킷이 열려 있음")
+                                 + (" (예산 부족으로 장애 조치 생략)" if budget_denied else ""))
+
+    def status(self) -> List[Dict]:
+        """제공자별 서킷 상태/최근 p95 (모니터링용)"""
+        return [
+            {
+                "name": provider.name,
+                "state": provider.breaker.state,
+                "consecutive_failures": provider.breaker.failures,
+                "p95_ms": round(provider.p95() * 1000, 1) if provider.p95() is not None else None,
+            }
+            for provider in self.providers
+        ]
+
+
+_upstream_client: Optional[UpstreamClient] = None
+
+def get_upstream_client() -> UpstreamClient:
+    """업스트림 클라이언트 인스턴스 반환 (최초 호출 시 생성)"""
+    global _upstream_client
+    if _upstream_client is None:
+        _upstream_client = UpstreamClient()
+    return _upstream_client
@@ -0,0 +1,108 @@
+"""
+Decimal 정밀 금액 변환
+
+금액은 통화별 소수 자릿수(minor units)에 맞춰 ROUND_HALF_UP 으로 반올림합니다.
+- convert_decimal: Decimal 금액 한 건 변환 (통화별 quantize 단위/컨텍스트 캐시)
+- convert_minor_batch: 최소 단위 정수(센트, 엔 등) 금액 여러 건을 정수 연산만으로 변환
+- convert_amounts: Decimal 금액 여러 건 변환 (최소 단위로 떨어지는 금액은 정수 연산, 아니면 convert_decimal)
+
+환율은 float 의 최단 표기(repr)를 그대로 Decimal 로 옮겨 (정수 계수, 10의 지수)로 다루므로
+두 경로는 같은 입력에 대해 항상 같은 결과를 냅니다.
+"""
+
+from decimal import ROUND_HALF_UP, Context, Decimal
+from functools import lru_cache
+from typing import List, Sequence, Tuple, Union
+
+from .currencies import minor_units
+
+# 곱셈 중에는 반올림이 일어나지 않도록 충분한 정밀도 사용 (반올림은 quantize 한 번만)
+_CONTEXT = Context(prec=60, rounding=ROUND_HALF_UP)
+
+Number = Union[Decimal, float, int, str]
+
+
+def to_decimal(value: Number) -> Decimal:
+    """float 는 최단 표기(repr) 기준으로 변환 (0.1 → Decimal('0.1'))"""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value)
+
+
+@lru_cache(maxsize=None)
+def quantum(currency: str) -> Decimal:
+    """통화의 최소 단위 (KRW 1, USD 0.01, KWD 0.001)"""
+    return Decimal(1).scaleb(-minor_units(currency))
+
+
+def quantize(amount: Number, currency: str) -> Decimal:
+    """통화의 소수 자릿수로 반올림"""
+    return to_decimal(amount).quantize(quantum(currency), context=_CONTEXT)
+
+
+def convert_decimal(amount: Number, rate: Number, to_currency: str) -> Decimal:
+    """amount × rate 를 to_currency 자릿수로 반올림한 Decimal"""
+    return _CONTEXT.multiply(to_decimal(amount), to_decimal(rate)).quantize(quantum(to_currency), context=_CONTEXT)
+
+
+@lru_cache(maxsize=4096)
+def _scaled_rate(rate: Decimal, from_units: int, to_units: int) -> Tuple[int, int]:
+    """(곱할 정수, 나눌 10의 거듭제곱) - 최소 단위 금액 × 곱 / 나눗수 = 변환된 최소 단위 금액"""
+    sign, digits, exponent = rate.as_tuple()
+    coefficient = int("".join(map(str, digits)) or "0") * (-1 if sign else 1)
+    shift = exponent + to_units - from_units
+    if shift >= 0:
+        return coefficient * 10 ** shift, 1
+    return coefficient, 10 ** -shift
+
+
+def convert_minor_batch(amounts: Sequence[int], rate: Number, from_currency: str,
+                        to_currency: str) -> List[int]:
+    """최소 단위 정수 금액들을 정수 연산만으로 변환 (ROUND_HALF_UP, convert_decimal 과 같은 결과)"""
+    multiplier, divisor = _scaled_rate(to_decimal(rate), minor_units(from_currency), minor_units(to_currency))
+    if multiplier < 0:
+        raise ValueError("환율은 음수일 수 없습니다")
+    if divisor == 1:
+        return [amount * multiplier for amount in amounts]
+    half = divisor // 2
+    # 음수 금액은 절댓값 기준으로 반올림 (ROUND_HALF_UP 은 0에서 멀어지는 방향)
+    return [
+        (amount * multiplier + half) // divisor if amount >= 0
+        else -((half - amount * multiplier) // divisor)
+        for amount in amounts
+    ]
+
+
+def convert_amounts(amounts: Sequence[Number], rate: Number, from_currency: str,
+                    to_currency: str) -> List[Decimal]:
+    """금액들을 반올림 없이 그대로 변환 (각 금액의 convert_decimal 결과와 같음)
+
+    from_currency 자릿수보다 소수점이 긴 금액은 최소 단위로 반올림하면 결과가 달라지므로
+    정수 경로 대신 convert_decimal 로 변환합니다.
+    """
+    units = minor_units(from_currency)
+    results: List[Decimal] = [Decimal(0)] * len(amounts)
+    minor_amounts: List[int] = []
+    positions: List[int] = []
+    for position, amount in enumerate(amounts):
+        scaled = to_decimal(amount).scaleb(units)
+        if scaled == scaled.to_integral_value():
+            minor_amounts.append(int(scaled))
+            positions.append(position)
+        else:
+            results[position] = convert_decimal(amount, rate, to_currency)
+    for position, converted in zip(positions, convert_minor_batch(minor_amounts, rate, from_currency, to_currency)):
+        results[position] = from_minor(converted, to_currency)
+    return results
+
+
+def to_minor(amount: Number, currency: str) -> int:
+    """금액을 최소 단위 정수로 (자릿수에 맞춰 반올림)"""
+    return int(quantize(amount, currency).scaleb(minor_units(currency)))
+
+
+def from_minor(amount: int, currency: str) -> Decimal:
+    """최소 단위 정수를 Decimal 금액으로"""
+    return Decimal(amount).scaleb(-minor_units(currency))
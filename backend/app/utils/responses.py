@@ -0,0 +1,179 @@
+"""
+응답 직렬화/압축 유틸리티
+
+- ORJSONResponse: orjson 으로 직렬화하는 기본 응답 클래스
+- CompressionMiddleware: Accept-Encoding 에 따라 br(brotli 설치 시) 또는 gzip 으로 응답 압축 (스트리밍 응답 포함)
+- SnapshotPayloadCache: 같은 스냅샷(버전, 갱신 시각) 동안 바뀌지 않는 응답을 한 번만 직렬화/압축해 재사용
+"""
+
+import zlib
+from typing import Callable, Dict, Hashable, Optional, Tuple, Union
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli 가 없으면 gzip 만 사용
+    brotli = None
+
+# 요청마다 압축하는 응답은 속도 우선, 캐시되는 응답은 한 번만 압축하므로 최대 압축률
+DYNAMIC_LEVELS = {"br": 4, "gzip": 6}
+CACHED_LEVELS = {"br": 11, "gzip": 9}
+
+# 이미 압축된 형식이나 이벤트 스트림은 압축하지 않음
+EXCLUDED_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+
+class ORJSONResponse(JSONResponse):
+    """orjson 직렬화 응답 (표준 json 대비 수 배 빠르고 바로 bytes 를 만듦)"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Accept-Encoding 에서 사용할 인코딩 선택 (br 우선, q=0 은 제외)"""
+    accepted = set()
+    for token in accept_encoding.lower().split(","):
+        name, _, params = token.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=DYNAMIC_LEVELS["br"] if level is None else level)
+    compressor = zlib.compressobj(DYNAMIC_LEVELS["gzip"] if level is None else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+class _StreamCompressor:
+    """스트리밍 응답용 점진 압축기 (청크마다 flush 하여 바로 전송 가능)"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=DYNAMIC_LEVELS["br"])
+        else:
+            self._compressor = zlib.compressobj(DYNAMIC_LEVELS["gzip"], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, body: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            data = self._compressor.process(body)
+            return data + (self._compressor.finish() if last else self._compressor.flush())
+        data = self._compressor.compress(body)
+        return data + self._compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """minimum_size 이상인 응답을 br/gzip 으로 압축 (이미 Content-Encoding 이 있는 응답은 그대로 전달)"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 206, 304)
+                    or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message  # 첫 본문을 보고 압축 여부를 정한 뒤 전송
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                else:
+                    compressor = _StreamCompressor(encoding)
+                    headers["Content-Encoding"] = encoding
+                    if more_body:
+                        del headers["Content-Length"]
+                    else:
+                        body = compress(body, encoding)
+                        headers["Content-Length"] = str(len(body))
+                        compressor = None
+                await send(start_message)
+                start_message = None
+                if compressor is None:
+                    await send({**message, "body": body})
+                    return
+            await send({**message, "body": compressor.chunk(body, last=not more_body)})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class SnapshotPayloadCache:
+    """키별로 ((스냅샷 버전, 갱신 시각), JSON 본문, 인코딩별 압축본)을 보관 (스냅샷이 바뀌면 교체)
+
+    재시작으로 버전 번호가 다시 시작되거나 같은 버전이 다시 확인되어도 본문이 섞이지 않도록 갱신 시각도 함께 비교합니다.
+    버전 0(공유 스냅샷을 아직 받지 못한 임시 스냅샷)은 캐시하지 않습니다.
+    """
+
+    def __init__(self, minimum_size: int = 500):
+        self.minimum_size = minimum_size
+        self._entries: Dict[Hashable, Tuple[Tuple[int, float], bytes, Dict[str, bytes]]] = {}
+
+    def response(self, key: Hashable, version: Tuple[int, float], build: Callable[[], Union[Dict, bytes]],
+                 accept_encoding: str = "", headers: Optional[Dict[str, str]] = None,
+                 media_type: str = "application/json") -> Response:
+        """build 가 bytes 를 반환하면 그대로 본문으로 사용 (바이너리 응답)"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version or version[0] == 0:
+            payload = build()
+            entry = (version, payload if isinstance(payload, bytes) else orjson.dumps(payload), {})
+            if version[0]:
+                self._entries[key] = entry
+        _, body, compressed = entry
+
+        headers = {"Vary": "Accept-Encoding", **(headers or {})}
+        encoding = choose_encoding(accept_encoding) if len(body) >= self.minimum_size else None
+        if encoding is not None:
+            if encoding not in compressed:
+                compressed[encoding] = compress(body, encoding, CACHED_LEVELS[encoding])
+            body = compressed[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def prune(self, version: Tuple[int, float]) -> None:
+        """version 이 아닌 항목 삭제 (키가 계속 늘어나는 캐시용)"""
+        self._entries = {key: entry for key, entry in self._entries.items() if entry[0] == version}
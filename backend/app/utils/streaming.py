@@ -0,0 +1,53 @@
+"""
+스트리밍 응답 유틸리티
+
+키셋 페이지네이션용 불투명 커서와, 행 단위 비동기 이터레이터를 NDJSON/CSV 바이트 스트림으로 바꾸는 헬퍼입니다.
+"""
+
+import base64
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, Sequence
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def encode_cursor(position: Dict) -> str:
+    """마지막 행의 정렬 키를 URL에 안전한 불투명 문자열로 변환"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """encode_cursor 의 역변환 (형식이 잘못되면 ValueError)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("잘못된 커서입니다")
+    if not isinstance(position, dict):
+        raise ValueError("잘못된 커서입니다")
+    return position
+
+
+async def ndjson_stream(rows: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    async for row in rows:
+        yield (json.dumps(row, ensure_ascii=False, default=str) + "\n").encode()
+
+
+async def csv_stream(rows: AsyncIterator[Dict], fieldnames: Sequence[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    async for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,454 @@
+"""
+벤치마크용 오프라인 픽스처
+
+- FakeSupabase: supabase-py 쿼리 빌더 중 앱이 사용하는 부분만 구현한 인메모리 DB
+- FakeUpstream: exchangerate-api.com `/v4/latest/{base}` 응답을 흉내내는 가짜 업스트림
+"""
+
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from upstream_simulator import BASE_USD_RATES, RateSimulator
+
+# USD 기준 대표 환율 (벤치마크 데이터 생성용)
+DEFAULT_USD_RATES = BASE_USD_RATES
+
+# 벤치마크/테스트 앱이 HS256 액세스 토큰 검증에 쓰는 시크릿
+FAKE_JWT_SECRET = "benchmark-jwt-secret-0123456789abcdef"
+
+
+class FakeResponse:
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+_OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+}
+
+
+def _split_terms(expression: str) -> List[str]:
+    """괄호 밖의 쉼표로 분리"""
+    terms, depth, start = [], 0, 0
+    for i, char in enumerate(expression):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            terms.append(expression[start:i])
+            start = i + 1
+    terms.append(expression[start:])
+    return terms
+
+
+def _parse_logic(expression: str, combine=any) -> Callable[[Dict], bool]:
+    """PostgREST or/and 필터 문자열 (`a.lt.1,and(b.eq.2,c.gt.3)`)을 행 판별 함수로 변환"""
+    predicates = []
+    for term in _split_terms(expression):
+        if term.startswith(("and(", "or(")):
+            inner = term[term.index("(") + 1:-1]
+            predicates.append(_parse_logic(inner, all if term.startswith("and(") else any))
+        else:
+            column, op, value = term.split(".", 2)
+            predicates.append(lambda row, c=column, o=_OPERATORS[op], v=value: o(row.get(c), v))
+    return lambda row: combine(p(row) for p in predicates)
+
+
+def _alert_buckets(row: Dict) -> Dict:
+    """alert_settings 의 alert_bucket/user_bucket 생성 컬럼"""
+    from app.services.alert_evaluator import shard_bucket
+    return {
+        "alert_bucket": shard_bucket(row["id"]),
+        "user_bucket": shard_bucket(row["user_id"]) if row.get("user_id") is not None else None,
+    }
+
+
+# 테이블별 생성 컬럼 (INSERT 시 계산)
+GENERATED_COLUMNS: Dict[str, Callable[[Dict], Dict]] = {"alert_settings": _alert_buckets}
+
+
+class FakeQuery:
+    """supabase-py의 테이블 쿼리 빌더 흉내"""
+
+    def __init__(self, rows: List[Dict], generated: Optional[Callable[[Dict], Dict]] = None):
+        self._rows = rows
+        self._generated = generated
+        self._op = "select"
+        self._columns: Optional[List[str]] = None
+        self._payload: Any = None
+        self._filters: List[Callable[[Dict], bool]] = []
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._count: Optional[str] = None
+
+    # 연산 종류
+    def select(self, columns: str = "*", count: Optional[str] = None, **kwargs) -> "FakeQuery":
+        self._op = "select"
+        self._count = count
+        if columns.strip() != "*":
+            self._columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, payload) -> "FakeQuery":
+        self._op = "insert"
+        self._payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = "id", ignore_duplicates: bool = False) -> "FakeQuery":
+        self._op = "upsert"
+        self._payload = payload
+        self._conflict = [c.strip() for c in on_conflict.split(",")]
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, payload: Dict) -> "FakeQuery":
+        self._op = "update"
+        self._payload = payload
+        return self
+
+    def delete(self) -> "FakeQuery":
+        self._op = "delete"
+        return self
+
+    # 필터
+    def eq(self, column: str, value) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column: str, value) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def gt(self, column: str, value) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def gte(self, column: str, value) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) is not None and row[column] >= value)
+        return self
+
+    def lt(self, column: str, value) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) is not None and row[column] < value)
+        return self
+
+    def lte(self, column: str, value) -> "FakeQuery":
+        self._filters.append(lambda row: row.get(column) is not None and row[column] <= value)
+        return self
+
+    def or_(self, filters: str) -> "FakeQuery":
+        """문자열 비교만 지원 (ISO 시각, UUID 커서 용도)"""
+        self._filters.append(_parse_logic(filters))
+        return self
+
+    def in_(self, column: str, values) -> "FakeQuery":
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "FakeQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> "FakeQuery":
+        self._limit = count
+        return self
+
+    def execute(self) -> FakeResponse:
+        if self._op == "insert":
+            return FakeResponse(self._insert())
+        if self._op == "upsert":
+            return FakeResponse(self._upsert())
+
+        matched = [row for row in self._rows if all(f(row) for f in self._filters)]
+
+        if self._op == "update":
+            for row in matched:
+                row.update(self._payload)
+            return FakeResponse([dict(row) for row in matched])
+
+        if self._op == "delete":
+            matched_ids = {id(row) for row in matched}
+            self._rows[:] = [row for row in self._rows if id(row) not in matched_ids]
+            return FakeResponse(matched)
+
+        count = len(matched) if self._count else None
+        for column, desc in reversed(self._order):
+            matched.sort(key=lambda row: row.get(column), reverse=desc)
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        if self._columns:
+            return FakeResponse([{c: row.get(c) for c in self._columns} for row in matched], count)
+        return FakeResponse([dict(row) for row in matched], count)
+
+    def _insert(self) -> List[Dict]:
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        now = datetime.now().isoformat()
+        inserted = []
+        for item in payload:
+            row = {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now}
+            row.update(item)
+            if self._generated is not None:
+                row.update(self._generated(row))
+            self._rows.append(row)
+            inserted.append(dict(row))
+        return inserted
+
+
+    def _upsert(self) -> List[Dict]:
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        existing = {tuple(row.get(c) for c in self._conflict): row for row in self._rows}
+        written, inserts = [], []
+        for item in payload:
+            row = existing.get(tuple(item.get(c) for c in self._conflict))
+            if row is None:
+                inserts.append(item)
+            elif not self._ignore_duplicates:
+                row.update(item)
+                written.append(dict(row))
+        self._payload = inserts
+        return written + self._insert()
+
+
+class FakeRpc:
+    """supabase-py rpc() 호출 흉내 (앱이 사용하는 함수만 구현)"""
+
+    def __init__(self, db: "FakeSupabase", name: str, params: Dict):
+        self._db = db
+        self._name = name
+        self._params = params
+
+    def execute(self) -> FakeResponse:
+        if self._name == "apply_alert_states":
+            states = {state["id"]: state for state in self._params["p_states"]}
+            updated = 0
+            for row in self._db.tables.get("alert_settings", []):
+                state = states.get(row["id"])
+                # 상태를 결정한 뒤 사용자가 수정한 알림은 건너뜀
+                if state is not None and (not row.get("updated_at") or row["updated_at"] <= state["decided_at"]):
+                    row["armed"] = state["armed"]
+                    row["last_triggered_at"] = state["last_triggered_at"] or row.get("last_triggered_at")
+                    updated += 1
+            return FakeResponse(updated)
+        if self._name == "ensure_exchange_rate_partitions":
+            return FakeResponse(None)
+        if self._name == "rollup_exchange_rate_ticks":
+            return FakeResponse(self._db.rollup_ticks(self._params["p_before"]))
+        if self._name == "store_daily_exchange_rates":
+            return FakeResponse(self._db.store_daily_rows(self._params["p_rates"]))
+        if self._name == "spend_upstream_budget":
+            return FakeResponse(self._db.spend_budget(**self._params))
+        raise NotImplementedError(self._name)
+
+
+class FakeAuthAdmin:
+    def get_user_by_id(self, user_id: str):
+        raise LookupError(f"unknown user: {user_id}")
+
+
+class FakeAuth:
+    def __init__(self):
+        self.admin = FakeAuthAdmin()
+
+
+class FakeSupabase:
+    """인메모리 Supabase 클라이언트"""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict]] = {}
+        self.auth = FakeAuth()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.tables.setdefault(name, []), GENERATED_COLUMNS.get(name))
+
+    def rpc(self, name: str, params: Dict) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+    def spend_budget(self, p_month: str, p_purpose: str, p_pool: List[str], p_limit: int) -> Dict:
+        """spend_upstream_budget 흉내: 풀 사용량이 한도 미만이면 purpose 사용량 +1"""
+        rows = self.tables.setdefault("upstream_budget_usage", [])
+        month_rows = [row for row in rows if row["month"] == p_month]
+        allowed = sum(row["used"] for row in month_rows if row["purpose"] in p_pool) < p_limit
+        if allowed:
+            row = next((row for row in month_rows if row["purpose"] == p_purpose), None)
+            if row is None:
+                row = {"month": p_month, "purpose": p_purpose, "used": 0}
+                rows.append(row)
+                month_rows.append(row)
+            row["used"] += 1
+        return {"allowed": allowed, "used": {row["purpose"]: row["used"] for row in month_rows}}
+
+    def store_daily_rows(self, payload: List[Dict]) -> List[Dict]:
+        """store_daily_exchange_rates 흉내: 일일 환율 upsert + latest_exchange_rates 갱신"""
+        rows = self.tables.setdefault("daily_exchange_rates", [])
+        stored = []
+        for item in payload:
+            key = (item["currency_from"], item["currency_to"], item["date"])
+            row = next((r for r in rows if (r["currency_from"], r["currency_to"], r["date"]) == key), None)
+            if row is None:
+                row = {"id": str(uuid.uuid4()), "created_at": datetime.now().isoformat()}
+                rows.append(row)
+            row.update(item, updated_at=datetime.now(timezone.utc).isoformat())
+            stored.append(dict(row))
+        self._refresh_latest(stored)
+        return stored
+
+    def _refresh_latest(self, rows: List[Dict]) -> None:
+        latest = {(r["currency_from"], r["currency_to"]): r for r in self.tables.setdefault("latest_exchange_rates", [])}
+        for row in rows:
+            current = latest.get((row["currency_from"], row["currency_to"]))
+            if current is None:
+                latest[(row["currency_from"], row["currency_to"])] = dict(row)
+            elif current["date"] <= row["date"]:
+                current.update(row)
+        self.tables["latest_exchange_rates"][:] = list(latest.values())
+
+    def rollup_ticks(self, before: str) -> int:
+        """rollup_exchange_rate_ticks 흉내: before(UTC 일자) 이전 틱을 일별 OHLC 로 합치고 삭제"""
+        ticks = self.tables.setdefault("exchange_rates", [])
+        ohlc = self.tables.setdefault("exchange_rate_ohlc_daily", [])
+        candles: Dict[tuple, Dict] = {}
+        kept = []
+        for tick in sorted(ticks, key=lambda row: row["timestamp"]):
+            day = datetime.fromisoformat(tick["timestamp"]).astimezone(timezone.utc).date().isoformat()
+            if day >= before:
+                kept.append(tick)
+                continue
+            key = (tick["currency_from"], tick["currency_to"], day)
+            candle = candles.get(key)
+            if candle is None:
+                candles[key] = {"currency_from": key[0], "currency_to": key[1], "date": day,
+                                "open": tick["rate"], "high": tick["rate"], "low": tick["rate"],
+                                "close": tick["rate"], "tick_count": 1}
+            else:
+                candle["high"] = max(candle["high"], tick["rate"])
+                candle["low"] = min(candle["low"], tick["rate"])
+                candle["close"] = tick["rate"]
+                candle["tick_count"] += 1
+        ohlc.extend(candles.values())
+        ticks[:] = kept
+        return len(candles)
+
+    def seed_daily_rates(self, days: int, usd_rates: Dict[str, float] = DEFAULT_USD_RATES,
+                         currencies=("USD", "JPY", "EUR", "CNY")) -> None:
+        """최근 N일치 KRW 기준 일일 환율 적재"""
+        rows = self.tables.setdefault("daily_exchange_rates", [])
+        today = date.today()
+        for offset in range(days - 1, -1, -1):
+            day = today - timedelta(days=offset)
+            drift = 1.0 + ((offset % 17) - 8) * 0.001
+            for currency in currencies:
+                rate = usd_rates["KRW"] / usd_rates[currency] * drift
+                rows.append({
+                    "id": str(uuid.uuid4()),
+                    "currency_from": currency,
+                    "currency_to": "KRW",
+                    "rate": round(rate, 6),
+                    "previous_rate": None,
+                    "change_amount": 0.0,
+                    "change_percentage": 0.0,
+                    "date": day.isoformat(),
+                    "created_at": datetime.now().isoformat(),
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                })
+        self._refresh_latest(rows)
+
+    def seed_rate_ticks(self, days: int, per_day: int = 24, usd_rates: Dict[str, float] = DEFAULT_USD_RATES,
+                        currencies=("USD", "JPY", "EUR", "CNY")) -> None:
+        """최근 N일치 KRW 기준 장중 틱 적재 (하루 per_day 건, 시간 간격 균등)"""
+        rows = self.tables.setdefault("exchange_rates", [])
+        now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        for step in range(days * per_day - 1, -1, -1):
+            moment = now - timedelta(days=1) * step / per_day
+            drift = 1.0 + ((step % 29) - 14) * 0.0002
+            for currency in currencies:
+                rows.append({
+                    "id": str(uuid.uuid4()),
+                    "currency_from": currency,
+                    "currency_to": "KRW",
+                    "rate": round(usd_rates["KRW"] / usd_rates[currency] * drift, 6),
+                    "timestamp": moment.isoformat(),
+                })
+
+    def seed_alerts(self, count: int, usd_rates: Dict[str, float] = DEFAULT_USD_RATES) -> None:
+        """N개의 활성 알림 설정 적재 (대략 1%가 트리거되도록 목표 환율 분포)"""
+        rows = self.tables.setdefault("alert_settings", [])
+        currencies = [c for c in usd_rates if c != "KRW"]
+        now = datetime.now(timezone.utc).isoformat()
+        start = len(rows)
+        for i in range(count):
+            currency_from = currencies[i % len(currencies)]
+            current = usd_rates["KRW"] / usd_rates[currency_from]
+            condition = "above" if i % 2 == 0 else "below"
+            # 0 ~ 99번째 분위에 목표를 두어 1%만 조건 충족
+            bucket = (i * 7919) % 100
+            offset = 1.0 + (bucket + 1) * 0.001 if bucket else 0.999
+            target = current * offset if condition == "above" else current / offset
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "user_id": f"user-{i % max(count // 5, 1)}",
+                "currency_from": currency_from,
+                "currency_to": "KRW",
+                "target_rate": round(target, 6),
+                "condition": condition,
+                "is_active": True,
+                "armed": True,
+                "created_at": now,
+                "updated_at": now,
+            })
+        for row in rows[start:]:
+            row.update(_alert_buckets(row))
+
+
+class FakeUpstream:
+    """exchangerate-api.com 응답 형식을 반환하는 가짜 업스트림 (시뮬레이터 기반, 수동 틱)"""
+
+    def __init__(self, seed: int = 42):
+        self.simulator = RateSimulator(seed=seed, update_interval=0)
+        self.calls = 0
+        self._responses: Dict[tuple, Dict] = {}
+
+    @property
+    def usd_rates(self) -> Dict[str, float]:
+        return self.simulator.usd_rates()
+
+    async def get_current_rates(self, base_currency: str = "USD", purpose: Optional[str] = None) -> Dict:
+        self.calls += 1
+        if base_currency not in self.simulator.currencies:
+            raise ValueError(f"unsupported currency: {base_currency}")
+        # 실제 업스트림은 틱 사이에 같은 본문을 반환하므로 (통화, 틱) 단위로 캐시
+        key = (base_currency, self.simulator.current_tick())
+        response = self._responses.get(key)
+        if response is None:
+            response = self._responses[key] = self.simulator.latest(base_currency)
+        return response
+
+    def install(self, exchange_service) -> None:
+        """ExchangeRateService 인스턴스의 업스트림 호출을 가짜로 교체"""
+        exchange_service.fetch_upstream_rates = self.get_current_rates
+
+
+def prepare_environment() -> None:
+    """앱 import 전에 외부 서비스 설정을 오프라인 값으로 고정"""
+    os.environ["SUPABASE_URL"] = "http://127.0.0.1:54321"
+    os.environ["SUPABASE_SERVICE_KEY"] = "benchmark-service-key"
+    os.environ["RESEND_API_KEY"] = ""
+    os.environ["SUPABASE_JWT_SECRET"] = FAKE_JWT_SECRET
+
+
+def auth_headers(user_id: str, secret: str = FAKE_JWT_SECRET) -> Dict[str, str]:
+    """user_id 를 sub 로 하는 HS256 액세스 토큰의 Authorization 헤더 (하루 동안 유효)"""
+    import jwt
+    token = jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "exp": int(time.time()) + 86400}, secret, algorithm="HS256"
+    )
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+asyncio 기반 부하 테스트 도구
+
+실행 중인 앱(로컬 업스트림 시뮬레이터 + 로컬 Postgres/Supabase 권장)에 대해
+환율 변환, 최신 환율, 히스토리, 알림 CRUD 호출을 설정한 비율로 섞어 보내고
+엔드포인트별 처리량, p50/p95/p99 지연 시간, 오류율을 보고합니다.
+
+사용법:
+    # 1) 업스트림 시뮬레이터와 앱 실행
+    python upstream_simulator.py --port 8001
+    EXCHANGE_RATE_API_BASE_URL=http://127.0.0.1:8001/v4 uvicorn app.main:app --port 8000 --workers 1
+
+    # 2) 고정 동시성 부하 (알림 API 토큰은 --jwt-secret 또는 SUPABASE_JWT_SECRET 으로 서명)
+    python -m benchmarks.loadtest --target http://127.0.0.1:8000 --concurrency 32 --duration 30
+
+    # 3) 단계별 부하로 워커당 포화 지점 탐색
+    python -m benchmarks.loadtest --step 8,16,32,64,128 --step-duration 20 --workers 1
+
+    # 외부 서비스 없이 인메모리 픽스처로 실행
+    python -m benchmarks.loadtest --in-process --duration 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .fakes import FAKE_JWT_SECRET, auth_headers
+
+DEFAULT_MIX = {
+    "convert": 40,
+    "rates_latest": 20,
+    "history": 15,
+    "alert_list": 10,
+    "alert_create": 5,
+    "alert_get": 4,
+    "alert_update": 3,
+    "alert_delete": 3,
+}
+
+CONVERT_PAIRS = [("USD", "KRW"), ("KRW", "USD"), ("JPY", "KRW"), ("EUR", "KRW"), ("CNY", "KRW")]
+HISTORY_CURRENCIES = ["USD", "JPY", "EUR", "CNY"]
+HISTORY_DAYS = [7, 30, 30, 90, 365]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Counter = field(default_factory=Counter)
+
+    def record(self, latency: float, status: Optional[int], ok: bool) -> None:
+        self.latencies.append(latency)
+        self.statuses[str(status) if status is not None else "exception"] += 1
+        if not ok:
+            self.errors += 1
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class Recorder:
+    """엔드포인트별 지연 시간/상태 코드 수집기"""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {}
+        total_requests = total_errors = 0
+        all_latencies: List[float] = []
+        for name, stats in sorted(self.endpoints.items()):
+            ordered = sorted(stats.latencies)
+            count = len(ordered)
+            total_requests += count
+            total_errors += stats.errors
+            all_latencies.extend(ordered)
+            endpoints[name] = {
+                "requests": count,
+                "throughput_rps": count / elapsed if elapsed else 0.0,
+                "error_rate": stats.errors / count if count else 0.0,
+                "p50_ms": percentile(ordered, 0.50) * 1000,
+                "p95_ms": percentile(ordered, 0.95) * 1000,
+                "p99_ms": percentile(ordered, 0.99) * 1000,
+                "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+                "statuses": dict(stats.statuses),
+            }
+        all_latencies.sort()
+        return {
+            "elapsed_seconds": elapsed,
+            "requests": total_requests,
+            "throughput_rps": total_requests / elapsed if elapsed else 0.0,
+            "error_rate": total_errors / total_requests if total_requests else 0.0,
+            "p50_ms": percentile(all_latencies, 0.50) * 1000,
+            "p95_ms": percentile(all_latencies, 0.95) * 1000,
+            "p99_ms": percentile(all_latencies, 0.99) * 1000,
+            "endpoints": endpoints,
+        }
+
+
+class VirtualUser:
+    """하나의 동시 사용자: 설정된 비율에 따라 요청을 반복 실행"""
+
+    def __init__(self, client, recorder: Recorder, mix: Dict[str, int], user_id: str,
+                 seed: int, think_time: float, jwt_secret: str):
+        self.client = client
+        self.recorder = recorder
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.user_id = user_id
+        self.headers = auth_headers(user_id, jwt_secret)
+        self.rng = random.Random(seed)
+        self.think_time = think_time
+        self.alert_ids: List[str] = []
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        status = None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+            return response
+        except Exception:
+            return None
+        finally:
+            ok = status is not None and status < 400
+            self.recorder.endpoints[endpoint].record(time.perf_counter() - start, status, ok)
+
+    async def run(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            await getattr(self, f"op_{operation}")()
+            if self.think_time:
+                await asyncio.sleep(self.think_time)
+
+    # 시나리오
+    async def op_convert(self):
+        from_currency, to_currency = self.rng.choice(CONVERT_PAIRS)
+        amount = self.rng.choice([10, 100, 1000, 25000])
+        await self.request("GET /exchange/convert", "GET", "/exchange/convert", params={
+            "from_currency": from_currency, "to_currency": to_currency, "amount": amount
+        })
+
+    async def op_convert_post(self):
+        from_currency, to_currency = self.rng.choice(CONVERT_PAIRS)
+        await self.request("POST /exchange/convert", "POST", "/exchange/convert", json={
+            "amount": self.rng.choice([10, 100, 1000]),
+            "from_currency": from_currency,
+            "to_currency": to_currency,
+        })
+
+    async def op_rates_latest(self):
+        await self.request("GET /exchange/rates/latest", "GET", "/exchange/rates/latest")
+
+    async def op_history(self):
+        currency = self.rng.choice(HISTORY_CURRENCIES)
+        days = self.rng.choice(HISTORY_DAYS)
+        await self.request("GET /exchange/rates/history", "GET",
+                           f"/exchange/rates/history/{currency}/KRW", params={"days": days})
+
+    async def op_alert_list(self):
+        await self.request("GET /alerts", "GET", "/alerts/", headers=self.headers)
+
+    async def op_alert_create(self):
+        currency = self.rng.choice(HISTORY_CURRENCIES)
+        response = await self.request("POST /alerts", "POST", "/alerts/", headers=self.headers, json={
+            "currency_from": currency,
+            "currency_to": "KRW",
+            "target_rate": round(self.rng.uniform(5, 2000), 2),
+            "condition": self.rng.choice(["above", "below"]),
+            "is_active": True,
+        })
+        if response is not None and response.status_code == 200:
+            self.alert_ids.append(response.json()["id"])
+
+    async def op_alert_get(self):
+        if not self.alert_ids:
+            return await self.op_alert_create()
+        alert_id = self.rng.choice(self.alert_ids)
+        await self.request("GET /alerts/{id}", "GET", f"/alerts/{alert_id}", headers=self.headers)
+
+    async def op_alert_update(self):
+        if not self.alert_ids:
+            return await self.op_alert_create()
+        alert_id = self.rng.choice(self.alert_ids)
+        await self.request("PUT /alerts/{id}", "PUT", f"/alerts/{alert_id}", headers=self.headers,
+                           json={"target_rate": round(self.rng.uniform(5, 2000), 2)})
+
+    async def op_alert_delete(self):
+        if not self.alert_ids:
+            return await self.op_alert_create()
+        alert_id = self.alert_ids.pop(self.rng.randrange(len(self.alert_ids)))
+        await self.request("DELETE /alerts/{id}", "DELETE", f"/alerts/{alert_id}", headers=self.headers)
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, int]:
+    """'convert=40,history=10' 형식의 트래픽 비율 파싱"""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if not hasattr(VirtualUser, f"op_{name}"):
+            raise ValueError(f"알 수 없는 시나리오: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def build_client(args):
+    import httpx
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if args.in_process:
+        from .run_benchmarks import BenchmarkFixture
+        fixture = BenchmarkFixture()
+        transport = httpx.ASGITransport(app=fixture.app)
+        return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+    return httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits)
+
+
+async def run_stage(client, mix: Dict[str, int], concurrency: int, duration: float,
+                    user_ids: List[str], seed: int, think_time: float, jwt_secret: str) -> Dict:
+    recorder = Recorder()
+    users = [
+        VirtualUser(client, recorder, mix, user_ids[i % len(user_ids)], seed + i, think_time, jwt_secret)
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(user.run(deadline) for user in users))
+    report = recorder.report(time.perf_counter() - start)
+    report["concurrency"] = concurrency
+    return report
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n▶ 동시성 {report['concurrency']}: {report['requests']}건, "
+          f"{report['throughput_rps']:.1f} req/s, 오류율 {report['error_rate']:.2%}, "
+          f"p50 {report['p50_ms']:.1f}ms / p95 {report['p95_ms']:.1f}ms / p99 {report['p99_ms']:.1f}ms")
+    print(f"  {'endpoint':<30} {'req':>7} {'rps':>8} {'err%':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, stats in report["endpoints"].items():
+        print(f"  {name:<30} {stats['requests']:>7} {stats['throughput_rps']:>8.1f} "
+              f"{stats['error_rate']:>7.2%} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+
+
+def find_saturation(stages: List[Dict], min_gain: float, max_error_rate: float) -> Optional[Dict]:
+    """처리량 증가가 min_gain 미만이거나 오류율이 임계치를 넘는 첫 단계 직전을 포화 지점으로 판단"""
+    best = None
+    for stage in stages:
+        if stage["error_rate"] > max_error_rate:
+            break
+        if best is not None and stage["throughput_rps"] < best["throughput_rps"] * (1 + min_gain):
+            break
+        best = stage
+    return best
+
+
+async def main_async(args) -> Dict:
+    mix = parse_mix(args.mix)
+    user_ids = args.user_id or [str(uuid.uuid4()) for _ in range(args.users)]
+    steps = [int(value) for value in args.step.split(",")] if args.step else [args.concurrency]
+    duration = args.step_duration if args.step else args.duration
+
+    stages = []
+    async with build_client(args) as client:
+        for concurrency in steps:
+            report = await run_stage(client, mix, concurrency, duration, user_ids, args.seed, args.think_ms / 1000,
+                                     FAKE_JWT_SECRET if args.in_process else args.jwt_secret)
+            print_report(report)
+            stages.append(report)
+
+    result = {
+        "meta": {
+            "target": "in-process" if args.in_process else args.target,
+            "created_at": datetime.now().isoformat(),
+            "mix": mix,
+            "workers": args.workers,
+            "seed": args.seed,
+        },
+        "stages": stages,
+    }
+    if args.step:
+        saturation = find_saturation(stages, args.min_gain, args.max_error_rate)
+        if saturation:
+            per_worker = saturation["throughput_rps"] / args.workers
+            result["saturation"] = {
+                "concurrency": saturation["concurrency"],
+                "throughput_rps": saturation["throughput_rps"],
+                "throughput_rps_per_worker": per_worker,
+                "p99_ms": saturation["p99_ms"],
+            }
+            print(f"\n📈 포화 지점: 동시성 {saturation['concurrency']} "
+                  f"({saturation['throughput_rps']:.1f} req/s, 워커당 {per_worker:.1f} req/s, "
+                  f"p99 {saturation['p99_ms']:.1f}ms)")
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="환율 앱 부하 테스트")
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="대상 앱 주소")
+    parser.add_argument("--in-process", action="store_true", help="인메모리 픽스처 앱으로 실행 (외부 서비스 불필요)")
+    parser.add_argument("--mix", help="시나리오 비율 (예: convert=40,rates_latest=20,history=15,alert_list=10)")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 가상 사용자 수")
+    parser.add_argument("--duration", type=float, default=30.0, help="측정 시간 (초)")
+    parser.add_argument("--step", help="단계별 동시성 목록 (예: 8,16,32,64)")
+    parser.add_argument("--step-duration", type=float, default=20.0, help="단계별 측정 시간 (초)")
+    parser.add_argument("--workers", type=int, default=1, help="대상 앱의 워커 수 (워커당 처리량 계산용)")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="포화 판단 기준 처리량 증가율")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="포화 판단 기준 오류율")
+    parser.add_argument("--users", type=int, default=20, help="생성할 가상 사용자 ID 수")
+    parser.add_argument("--user-id", action="append", help="알림 API에 사용할 사용자 ID (여러 번 지정 가능)")
+    parser.add_argument("--jwt-secret", default=os.getenv("SUPABASE_JWT_SECRET", ""),
+                        help="알림 API 액세스 토큰 서명용 HS256 시크릿 (대상 앱의 SUPABASE_JWT_SECRET)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="요청 사이 대기 시간 (ms)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(main_async(args))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
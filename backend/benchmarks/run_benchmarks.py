@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+오프라인 벤치마크 스위트
+
+가짜 업스트림(FakeUpstream)과 인메모리 DB(FakeSupabase)를 사용하여
+네트워크 없이 주요 핫패스를 측정하고 결과를 JSON으로 저장합니다.
+
+사용법:
+    python -m benchmarks.run_benchmarks --output benchmarks/results/current.json
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/base.json
+    python -m benchmarks.run_benchmarks -k alerts --quick
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .fakes import FakeSupabase, FakeUpstream, auth_headers, prepare_environment
+
+
+class BenchmarkFixture:
+    """가짜 DB/업스트림이 연결된 앱 인스턴스"""
+
+    def __init__(self):
+        prepare_environment()
+        logging.disable(logging.CRITICAL)
+
+        from app import database
+        self.db = FakeSupabase()
+        database.supabase = self.db
+
+        from app.main import app
+        from app.services.alert_service import get_alert_service
+        from app.services.exchange_rate import get_exchange_service
+        from app.services.monitoring_service import get_monitoring_service
+
+        self.app = app
+        self.upstream = FakeUpstream()
+        self.upstream.install(get_exchange_service())
+        self.alert_service = get_alert_service()
+        self.monitoring_service = get_monitoring_service()
+
+        self.db.seed_daily_rates(400)
+        # 장중 틱 120일치 (시간당 1건) 중 30일 이전은 일별 OHLC 로 롤업된 상태
+        self.db.seed_rate_ticks(120)
+        self.db.rollup_ticks((date.today() - timedelta(days=30)).isoformat())
+
+    def client(self):
+        import httpx
+        transport = httpx.ASGITransport(app=self.app)
+        return httpx.AsyncClient(transport=transport, base_url="http://benchmark")
+
+    def reset_alerts(self, count: int) -> None:
+        self.db.tables["alert_settings"] = []
+        self.alert_service.alert_settings.clear()
+        self.db.seed_alerts(count)
+        notification_service = self.monitoring_service.notification_service
+        for row in self.db.tables["alert_settings"]:
+            notification_service.fallback_emails[row["user_id"]] = f"{row['user_id']}@example.com"
+
+
+async def measure(func: Callable[[], Awaitable], rounds: int, warmup: int) -> List[float]:
+    """func를 warmup 후 rounds회 실행하여 각 실행 시간(초) 반환"""
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(name: str, params: Dict, samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    mean = statistics.fmean(ordered)
+    return {
+        "name": name,
+        "params": params,
+        "rounds": len(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": mean,
+        "median": statistics.median(ordered),
+        "p95": ordered[p95_index],
+        "stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "ops_per_second": 1.0 / mean if mean else None,
+    }
+
+
+def _expect_ok(response) -> None:
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.request.url} -> {response.status_code}: {response.text[:200]}")
+
+
+async def run_suite(fixture: BenchmarkFixture, keyword: Optional[str], quick: bool) -> List[Dict]:
+    scale = 0.1 if quick else 1.0
+    http_rounds = max(int(300 * scale), 10)
+    http_warmup = max(int(30 * scale), 2)
+    results = []
+
+    def selected(name: str) -> bool:
+        return keyword is None or keyword in name
+
+    async with fixture.client() as client:
+        async def bench_http(name: str, method: str, url: str, labels: Dict, **kwargs):
+            if not selected(name):
+                return
+
+            async def call():
+                _expect_ok(await client.request(method, url, **kwargs))
+
+            samples = await measure(call, http_rounds, http_warmup)
+            results.append(summarize(name, labels, samples))
+
+        await bench_http(
+            "exchange.convert.get", "GET", "/exchange/convert", {"pair": "USD/KRW"},
+            params={"from_currency": "USD", "to_currency": "KRW", "amount": 100},
+        )
+        await bench_http(
+            "exchange.convert.post", "POST", "/exchange/convert", {"pair": "USD/KRW"},
+            json={"amount": 100, "from_currency": "USD", "to_currency": "KRW"},
+        )
+        await bench_http(
+            "exchange.convert.batch.1000", "POST", "/exchange/convert/batch", {"pair": "USD/JPY", "amounts": 1_000},
+            json={"from_currency": "USD", "to_currency": "JPY", "amounts": [f"{i}.{i % 100:02d}" for i in range(1_000)]},
+        )
+        await bench_http("exchange.rates.popular", "GET", "/exchange/rates/popular", {})
+        await bench_http("exchange.rates.full", "GET", "/exchange/rates", {"base": "KRW"}, params={"base": "KRW"})
+        await bench_http("exchange.currencies", "GET", "/exchange/currencies", {})
+        await bench_http("exchange.rates.stored", "GET", "/exchange/rates/stored", {})
+        await bench_http("exchange.bundle.json", "GET", "/exchange/bundle", {"format": "json"})
+        await bench_http(
+            "exchange.bundle.binary", "GET", "/exchange/bundle", {"format": "binary"}, params={"format": "binary"}
+        )
+        if selected("exchange.rates.not_modified"):
+            etag = (await client.get("/exchange/rates", params={"base": "KRW"})).headers["ETag"]
+
+            async def not_modified():
+                response = await client.get("/exchange/rates", params={"base": "KRW"}, headers={"If-None-Match": etag})
+                if response.status_code != 304:
+                    raise RuntimeError(f"/exchange/rates -> {response.status_code} (304 예상)")
+
+            samples = await measure(not_modified, http_rounds, http_warmup)
+            results.append(summarize("exchange.rates.not_modified", {"base": "KRW"}, samples))
+        for days in (30, 365):
+            await bench_http(
+                f"exchange.history.{days}d", "GET", "/exchange/rates/history/USD/KRW",
+                {"days": days}, params={"days": days},
+            )
+        await bench_http(
+            "exchange.intraday.24h", "GET", "/exchange/rates/intraday/USD/KRW", {"hours": 24}, params={"hours": 24}
+        )
+        await bench_http(
+            "exchange.ohlc.90d", "GET", "/exchange/rates/ohlc/USD/KRW", {"days": 90}, params={"days": 90}
+        )
+        export_start = (date.today() - timedelta(days=399)).isoformat()
+        await bench_http(
+            "exchange.history_export.ndjson", "GET", "/exchange/rates/history/export",
+            {"pairs": 4, "days": 400},
+            params={"pairs": "USD/KRW,JPY/KRW,EUR/KRW,CNY/KRW", "start_date": export_start},
+        )
+
+        if selected("alerts.api.page_load"):
+            fixture.reset_alerts(1_000)
+            user_headers = auth_headers(fixture.db.tables["alert_settings"][0]["user_id"])
+
+            async def page_load():
+                # 알림 화면 진입 시 호출되는 목록 + 통계
+                _expect_ok(await client.get("/alerts/", headers=user_headers))
+                _expect_ok(await client.get("/alerts/statistics/summary", headers=user_headers))
+
+            samples = await measure(page_load, http_rounds, http_warmup)
+            results.append(summarize("alerts.api.page_load", {"alerts": 1_000}, samples))
+
+    for count, rounds in ((1_000, 10), (10_000, 5), (100_000, 2)):
+        name = f"alerts.check_conditions.{count}"
+        if not selected(name):
+            continue
+        if quick and count > 10_000:
+            continue
+        fixture.reset_alerts(count)
+        samples = await measure(fixture.alert_service.check_alert_conditions, rounds, 1)
+        results.append(summarize(name, {"alerts": count}, samples))
+
+    from app.services.rate_snapshot import RateSnapshot
+    for count in (10_000, 100_000):
+        name = f"alerts.check_crossed.{count}"
+        if not selected(name) or (quick and count > 10_000):
+            continue
+        fixture.reset_alerts(count)
+        await fixture.alert_service.sweep_alerts()  # 인덱스 구성
+        rates = fixture.upstream.usd_rates
+        previous = RateSnapshot(1, time.time(), time.time(), rates)
+        current = RateSnapshot(2, time.time(), time.time(), {**rates, "KRW": rates["KRW"] * 0.99})
+        samples = await measure(
+            lambda: fixture.alert_service.check_crossed_alerts(previous, current), 20 if not quick else 5, 1
+        )
+        results.append(summarize(name, {"alerts": count, "krw_move": "-1%"}, samples))
+
+    for count in (100, 1_000):
+        name = f"alerts.notification_fanout.{count}"
+        if not selected(name):
+            continue
+        fixture.reset_alerts(count)
+        active_alerts = await fixture.alert_service.get_active_alerts()
+        triggered = [
+            {"alert": alert, "current_rate": float(alert.target_rate), "triggered_at": datetime.now()}
+            for alert in active_alerts
+        ]
+
+        async def fanout():
+            for alert_data in triggered:
+                await fixture.monitoring_service._process_triggered_alert(alert_data)
+            fixture.alert_service.writer.flush()
+
+        samples = await measure(fanout, 5 if not quick else 2, 1)
+        results.append(summarize(name, {"triggered": count}, samples))
+
+    if selected("snapshot.warm_start"):
+        import tempfile
+        from app.services.rate_snapshot import RateSnapshot
+        from app.services.snapshot_file import load_snapshot_file, write_snapshot_file
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/snapshot.bin"
+            write_snapshot_file(path, RateSnapshot(1, time.time(), time.time(), fixture.upstream.usd_rates))
+
+            async def warm_start():
+                # 파일 mmap + 첫 교차 환율 응답까지
+                load_snapshot_file(path).to_upstream_response("KRW")
+
+            samples = await measure(warm_start, 50 if not quick else 10, 2)
+        results.append(summarize("snapshot.warm_start", {"currencies": len(fixture.upstream.usd_rates)}, samples))
+
+    if selected("upstream.fetch.slow_primary"):
+        # 첫 제공자가 300ms 로 느려진 상황: 헤지 요청으로 지연이 p95 기준으로 제한되는지 확인
+        import httpx
+        from upstream_simulator import FaultConfig, RateSimulator, create_app
+        from app.services.upstream_client import UpstreamClient, parse_providers
+        slow = create_app(RateSimulator(update_interval=0), FaultConfig(latency_ms=300))
+        healthy = create_app(RateSimulator(update_interval=0), FaultConfig(latency_ms=5))
+        upstream = UpstreamClient(
+            parse_providers("exchangerate-api-v4=http://slow/v4/latest/{base},"
+                            "exchangerate-api-v4=http://healthy/v4/latest/{base}"),
+            timeout=2, hedge_delay=0.05,
+            mounts={"http://slow": httpx.ASGITransport(app=slow), "http://healthy": httpx.ASGITransport(app=healthy)},
+        )
+        samples = await measure(lambda: upstream.fetch("USD"), 20 if not quick else 5, 1)
+        await upstream.aclose()
+        results.append(summarize("upstream.fetch.slow_primary", {"primary_latency_ms": 300}, samples))
+
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> bool:
+    """중앙값 기준으로 비교 결과를 출력하고 회귀 여부 반환"""
+    previous = {item["name"]: item for item in baseline.get("benchmarks", [])}
+    regressed = False
+    print(f"\n{'benchmark':<36} {'base(ms)':>10} {'current(ms)':>12} {'change':>9}")
+    for item in current["benchmarks"]:
+        before = previous.get(item["name"])
+        if not before:
+            print(f"{item['name']:<36} {'-':>10} {item['median'] * 1000:>12.3f} {'new':>9}")
+            continue
+        change = (item["median"] - before["median"]) / before["median"]
+        marker = " !" if change > threshold else ""
+        regressed = regressed or change > threshold
+        print(f"{item['name']:<36} {before['median'] * 1000:>10.3f} "
+              f"{item['median'] * 1000:>12.3f} {change:>+8.1%}{marker}")
+    return regressed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="오프라인 핫패스 벤치마크")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", type=Path, help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="회귀로 판단할 중앙값 증가율 (기본 0.2 = 20%%)")
+    parser.add_argument("-k", dest="keyword", help="이름에 해당 문자열이 포함된 벤치마크만 실행")
+    parser.add_argument("--quick", action="store_true", help="반복 횟수를 줄이고 10만 건 케이스 생략")
+    args = parser.parse_args(argv)
+
+    fixture = BenchmarkFixture()
+    benchmarks = asyncio.run(run_suite(fixture, args.keyword, args.quick))
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "created_at": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "benchmarks": benchmarks,
+    }
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(payload, encoding="utf-8")
+    else:
+        print(payload)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(baseline, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+콜드 스타트 시간 측정 스크립트
+
+매 회 새 인터프리터를 띄워 아래 구간을 측정합니다.
+    - interpreter: 프로세스 시작부터 측정 코드 진입까지
+    - import: `import app.main`
+    - lifespan: FastAPI lifespan 시작 (서비스 생성, 모니터링 시작)
+    - first_request: 첫 `/health` 요청
+    - total: 부모 프로세스에서 본 전체 소요 시간
+
+사용법:
+    python -m benchmarks.startup_time --runs 10
+    python -m benchmarks.startup_time --runs 5 --importtime 20 --output benchmarks/results/startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+CHILD_SCRIPT = r"""
+import asyncio, json, time
+import httpx  # 측정용 클라이언트는 측정 구간에서 제외
+entered = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def boot():
+    app_ = app.main.app
+    async with app_.router.lifespan_context(app_):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=app_)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            await client.get("/health")
+        answered = time.perf_counter()
+        print(json.dumps({
+            "entered": entered,
+            "import": imported - entered,
+            "lifespan": started - imported,
+            "first_request": answered - started,
+        }), flush=True)
+        import os
+        os._exit(0)
+
+asyncio.run(boot())
+"""
+
+
+def run_once(env: Dict[str, str]) -> Dict[str, float]:
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, timeout=120,
+    )
+    total = time.perf_counter() - start
+    lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"측정 실패 (exit {completed.returncode}):\n{completed.stderr[-2000:]}")
+    sample = json.loads(lines[-1])
+    sample["total"] = total
+    sample["interpreter"] = total - sample["import"] - sample["lifespan"] - sample["first_request"]
+    sample.pop("entered")
+    return sample
+
+
+def import_profile(env: Dict[str, str], top: int) -> List[Dict]:
+    """`python -X importtime` 결과에서 누적 시간이 큰 모듈 목록"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    modules = []
+    for line in completed.stderr.splitlines():
+        parts = line[len("import time:"):].split("|") if line.startswith("import time:") else []
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in parts)
+        if not cumulative_us.isdigit():
+            continue
+        modules.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    modules.sort(key=lambda item: item["cumulative_ms"], reverse=True)
+    return modules[:top]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="콜드 스타트 시간 측정")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="import 시간 상위 N개 모듈 출력")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    env.setdefault("SUPABASE_SERVICE_KEY", "startup-measurement")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    run_once(env)  # 바이트코드 캐시 준비
+    samples = [run_once(env) for _ in range(args.runs)]
+
+    phases = ["interpreter", "import", "lifespan", "first_request", "total"]
+    summary = {}
+    print(f"{'phase':<15} {'median(ms)':>11} {'min(ms)':>9} {'max(ms)':>9}")
+    for phase in phases:
+        values = [sample[phase] for sample in samples]
+        summary[phase] = {
+            "median_ms": statistics.median(values) * 1000,
+            "min_ms": min(values) * 1000,
+            "max_ms": max(values) * 1000,
+        }
+        print(f"{phase:<15} {summary[phase]['median_ms']:>11.1f} "
+              f"{summary[phase]['min_ms']:>9.1f} {summary[phase]['max_ms']:>9.1f}")
+
+    result = {"runs": args.runs, "phases": summary, "samples": samples}
+    if args.importtime:
+        result["slowest_imports"] = import_profile(env, args.importtime)
+        print(f"\n{'module':<50} {'cumulative(ms)':>15}")
+        for item in result["slowest_imports"]:
+            print(f"{item['module']:<50} {item['cumulative_ms']:>15.1f}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 import uvicorn
 
+from upstream_simulator import RateSimulator
+
 app = FastAPI(title="Exchange Rate Travel App (Simple)", version="1.0.0")
 
 # CORS 설정
@@ -19,36 +21,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 목업 환율 데이터
-MOCK_RATES = {
-    "USD": {
-        "KRW": 1340.5,
-        "JPY": 150.0,
-        "EUR": 0.85,
-        "GBP": 0.79,
-        "CNY": 7.24,
-        "AUD": 1.52,
-        "CAD": 1.35
-    },
-    "KRW": {
-        "USD": 1/1340.5,
-        "JPY": 150.0/1340.5,
-        "EUR": 0.85/1340.5,
-        "GBP": 0.79/1340.5,
-        "CNY": 7.24/1340.5,
-        "AUD": 1.52/1340.5,
-        "CAD": 1.35/1340.5
-    },
-    "EUR": {
-        "USD": 1/0.85,
-        "KRW": 1340.5/0.85,
-        "JPY": 150.0/0.85,
-        "GBP": 0.79/0.85,
-        "CNY": 7.24/0.85,
-        "AUD": 1.52/0.85,
-        "CAD": 1.35/0.85
-    }
-}
+# 시뮬레이터 기반 목업 환율 데이터 (USD 경유로 교차 환율 일관성 보장)
+simulator = RateSimulator(seed=42, update_interval=60.0)
 
 @app.get("/")
 def read_root():
@@ -59,12 +33,13 @@ def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 @app.get("/exchange/rates")
-def get_exchange_rates():
+def get_exchange_rates(base: str = "USD"):
     """환율 정보 조회"""
+    data = simulator.latest(base.upper())
     return {
-        "base": "USD",
-        "rates": MOCK_RATES["USD"],
-        "timestamp": datetime.now().isoformat()
+        "base": data["base"],
+        "rates": data["rates"],
+        "timestamp": datetime.fromtimestamp(data["time_last_updated"]).isoformat()
     }
 
 @app.get("/exchange/convert")
@@ -75,17 +50,8 @@ def convert_currency(
 ):
     """환율 변환"""
     try:
-        # 기본 USD 기준으로 변환
-        if from_currency == "USD":
-            rate = MOCK_RATES["USD"].get(to_currency, 1.0)
-        elif to_currency == "USD":
-            rate = MOCK_RATES[from_currency].get("USD", 1.0) if from_currency in MOCK_RATES else 1.0
-        else:
-            # USD를 경유한 변환
-            usd_from_rate = MOCK_RATES[from_currency].get("USD", 1.0) if from_currency in MOCK_RATES else 1.0
-            usd_to_rate = MOCK_RATES["USD"].get(to_currency, 1.0)
-            rate = usd_from_rate * usd_to_rate
-        
+        usd_rates = simulator.usd_rates()
+        rate = usd_rates[to_currency.upper()] / usd_rates[from_currency.upper()]
         converted_amount = amount * rate
         
         return {
@@ -102,7 +68,7 @@ def convert_currency(
 @app.get("/exchange/currencies")
 def get_supported_currencies():
     """지원 통화 목록"""
-    currencies = ["USD", "KRW", "JPY", "EUR", "GBP", "CNY", "AUD", "CAD"]
+    currencies = simulator.currencies
     return {
         "currencies": currencies,
         "count": len(currencies)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+멀티 워커 실행 스크립트
+
+공유 메모리 세그먼트를 만들고 환율 갱신 전용 프로세스 1개를 띄운 뒤,
+uvicorn 워커들이 RATE_SNAPSHOT_SHM 으로 같은 세그먼트를 읽도록 실행합니다.
+업스트림 호출은 워커 수와 무관하게 갱신 주기마다 1회입니다.
+
+사용법:
+    python start_workers.py --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+
+from app.config import settings
+from app.services.rate_refresher import run_shared_refresher
+from app.services.rate_snapshot import SharedRateSnapshot
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="공유 환율 스냅샷 멀티 워커 실행")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--interval", type=float, default=settings.rate_refresh_interval)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    shm_name = f"fx_snapshot_{os.getpid()}"
+    shared = SharedRateSnapshot.create(shm_name)
+    refresher = multiprocessing.Process(
+        target=run_shared_refresher, args=(shm_name, args.interval), name="rate-refresher", daemon=True
+    )
+    try:
+        refresher.start()
+        # 워커 프로세스는 이 환경변수를 보고 읽기 전용 스냅샷 저장소를 사용
+        os.environ["RATE_SNAPSHOT_SHM"] = shm_name
+        # 워커마다 모니터링이 돌지 않도록 별도 설정이 없으면 파일 락으로 리더 선출
+        if settings.leader_election_backend == "none":
+            os.environ["LEADER_ELECTION_BACKEND"] = "file"
+        print(f"🚀 환율 갱신 프로세스 시작 (segment={shm_name}), 워커 {args.workers}개 실행")
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        refresher.terminate()
+        refresher.join(timeout=10)
+        shared.close()
+        shared.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
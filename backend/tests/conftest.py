@@ -0,0 +1,38 @@
+"""공용 픽스처: 앱 모듈 import 전에 외부 서비스 설정을 오프라인 값으로 고정"""
+
+import pytest
+
+from benchmarks.fakes import FakeSupabase, FakeUpstream, prepare_environment
+
+prepare_environment()
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """인메모리 DB 를 get_supabase() 대상으로 연결"""
+    from app import database
+    db = FakeSupabase()
+    monkeypatch.setattr(database, "supabase", db)
+    return db
+
+
+@pytest.fixture
+def alert_service(fake_db):
+    """가짜 DB/업스트림에 연결된 새 AlertService (대기 중인 일괄 쓰기는 테스트마다 비움)"""
+    from app.services.alert_service import AlertService
+    from app.services.exchange_rate import get_exchange_service
+    FakeUpstream().install(get_exchange_service())
+    service = AlertService()
+    service.writer.flush()
+    yield service
+    service.writer.flush()
+
+
+@pytest.fixture
+def client(fake_db):
+    """가짜 DB 에 연결된 앱의 HTTP 클라이언트 (lifespan 없이 라우트만)"""
+    import httpx
+    from app.main import app
+    from app.services.daily_exchange_rate_service import get_daily_exchange_service
+    get_daily_exchange_service().invalidate_data_version()  # 이전 테스트 DB 의 버전을 쓰지 않도록
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
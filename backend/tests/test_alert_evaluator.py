@@ -0,0 +1,118 @@
+"""알림 평가: 목표 환율 경계, 재무장 밴드, 교차 평가, 인덱스 구간 검색"""
+
+import pytest
+
+from app.services.alert_evaluator import (
+    AlertIndex,
+    evaluate_alerts,
+    evaluate_crossings,
+    is_rearmed,
+    is_triggered,
+    rearm_level,
+)
+
+BAND = 0.01
+
+
+def row(alert_id, target, condition, armed=True, pair=("USD", "KRW")):
+    return (alert_id, "user", pair[0], pair[1], target, condition, armed)
+
+
+def rates(krw):
+    """USD/KRW = krw 인 USD 기준 환율"""
+    return {"USD": 1.0, "KRW": krw}
+
+
+@pytest.mark.parametrize("rate, expected", [(999.0, False), (1000.0, True), (1001.0, True)])
+def test_above_triggers_at_or_over_target(rate, expected):
+    assert is_triggered(rate, 1000.0, "above") is expected
+
+
+@pytest.mark.parametrize("rate, expected", [(1001.0, False), (1000.0, True), (999.0, True)])
+def test_below_triggers_at_or_under_target(rate, expected):
+    assert is_triggered(rate, 1000.0, "below") is expected
+
+
+def test_rearm_level_is_on_the_opposite_side():
+    assert rearm_level(1000.0, "above", BAND) == pytest.approx(990.0)
+    assert rearm_level(1000.0, "below", BAND) == pytest.approx(1010.0)
+
+
+@pytest.mark.parametrize("condition, rate, expected", [
+    ("above", 995.0, False),   # 밴드 안: 아직 무장하지 않음
+    ("above", 1000.0 * (1 - BAND), True),  # 경계값 포함
+    ("above", 980.0, True),
+    ("below", 1005.0, False),
+    ("below", 1000.0 * (1 + BAND), True),
+    ("below", 1020.0, True),
+])
+def test_rearm_band_boundaries(condition, rate, expected):
+    assert is_rearmed(rate, 1000.0, condition, BAND) is expected
+
+
+def test_full_evaluation_fires_armed_and_rearms_fired():
+    rows = [
+        row("a", 1000.0, "above"),                # 목표와 같음 → 발송
+        row("b", 1000.0, "below"),                # 목표와 같음 → 발송
+        row("c", 1001.0, "above"),                # 미달
+        row("d", 1020.0, "above", armed=False),   # 재무장 수준(1009.8) 아래 → 재무장
+        row("e", 1000.0, "above", armed=False),   # 밴드 안 → 그대로
+        row("f", 1000.0, "above", pair=("XXX", "KRW")),  # 지원하지 않는 통화
+    ]
+    triggered, rearmed, stats = evaluate_alerts(rows, rates(1000.0), BAND)
+    assert sorted(alert_id for alert_id, _ in triggered) == ["a", "b"]
+    assert all(rate == pytest.approx(1000.0) for _, rate in triggered)
+    assert rearmed == ["d"]
+    assert stats["skipped"] == 1
+
+
+def test_fired_alert_is_not_triggered_again():
+    triggered, rearmed, _ = evaluate_alerts([row("a", 1000.0, "above", armed=False)], rates(1050.0), BAND)
+    assert triggered == [] and rearmed == []
+
+
+@pytest.mark.parametrize("condition, old, new, expected", [
+    ("above", 990.0, 1010.0, True),    # 상향 돌파
+    ("above", 990.0, 1000.0, True),    # 목표에 정확히 도달
+    ("above", 1001.0, 1005.0, False),  # 목표를 지나지 않음
+    ("above", 1010.0, 990.0, False),   # 반대 방향 이동
+    ("below", 1010.0, 990.0, True),    # 하향 돌파
+    ("below", 1010.0, 1000.0, True),   # 목표에 정확히 도달
+    ("below", 999.0, 995.0, False),
+    ("below", 990.0, 1010.0, False),
+])
+def test_crossings_in_both_directions(condition, old, new, expected):
+    index = AlertIndex([row("a", 1000.0, condition)], BAND)
+    triggered, _, _ = evaluate_crossings(index, rates(old), rates(new))
+    assert [alert_id for alert_id, _ in triggered] == (["a"] if expected else [])
+
+
+def test_crossing_rearms_fired_alert_past_band_only():
+    index = AlertIndex([row("a", 1000.0, "above", armed=False)], BAND)
+    _, rearmed, _ = evaluate_crossings(index, rates(1005.0), rates(995.0))
+    assert rearmed == []  # 밴드 안에서만 움직임
+    _, rearmed, _ = evaluate_crossings(index, rates(1005.0), rates(990.0))
+    assert rearmed == ["a"]  # 재무장 경계에 정확히 도달
+
+
+def test_unmoved_pairs_are_skipped():
+    index = AlertIndex([row("a", 1000.0, "above")], BAND)
+    triggered, _, stats = evaluate_crossings(index, rates(1000.0), rates(1000.0))
+    assert triggered == [] and stats["pairs_moved"] == 0
+
+
+def test_index_between_includes_both_bounds():
+    index = AlertIndex([row(str(t), float(t), "above") for t in (990, 1000, 1010, 1020)], BAND)
+    armed, fired = index.between(("USD", "KRW"), 1000.0, 1010.0)
+    assert [r[0] for r in armed] == ["1000", "1010"] and fired == []
+    assert index.between(("EUR", "KRW"), 0.0, 1e9) == ([], [])
+
+
+def test_index_set_armed_moves_alert_to_rearm_levels():
+    index = AlertIndex([row("a", 1000.0, "above")], BAND)
+    index.set_armed(["a"], False)
+    armed, fired = index.between(("USD", "KRW"), 989.0, 991.0)
+    assert armed == [] and [r[0] for r in fired] == ["a"]
+    index.set_armed(["a"], True)
+    armed, _ = index.between(("USD", "KRW"), 1000.0, 1000.0)
+    assert [r[0] for r in armed] == ["a"]
@@ -0,0 +1,88 @@
+"""수동 알림 확인과 스윕의 상태 변경 범위, 사용자 수정과 일괄 저장 상태의 순서, 모니터링 루프의 실패 구간 재평가"""
+
+import asyncio
+from datetime import timezone
+from decimal import Decimal
+
+from app.models.alert import AlertSettingUpdate
+from app.services.bulk_writer import BulkWriter
+
+
+def test_check_alert_conditions_is_read_only(fake_db, alert_service):
+    fake_db.seed_alerts(200)
+    for row in fake_db.tables["alert_settings"][:20]:
+        row["armed"] = False
+
+    triggered = asyncio.run(alert_service.check_alert_conditions())
+
+    assert triggered
+    assert alert_service._alert_index is None
+    assert not alert_service.writer._alert_states
+    assert all(item["triggered_at"].tzinfo is timezone.utc for item in triggered)
+
+
+def test_sweep_alerts_builds_index_and_rearms(fake_db, alert_service):
+    fake_db.seed_alerts(200)
+    for row in fake_db.tables["alert_settings"][:20]:
+        row["armed"] = False
+
+    triggered = asyncio.run(alert_service.sweep_alerts())
+
+    assert len(triggered) == len(asyncio.run(alert_service.check_alert_conditions()))
+    assert len(alert_service._alert_index.rows) == 200
+    assert alert_service.writer._alert_states
+
+
+def fire_then_edit(fake_db, alert_service, leader_writer):
+    fake_db.seed_alerts(1)
+    row = fake_db.tables["alert_settings"][0]
+    asyncio.run(alert_service.mark_alert_fired(row["id"]))
+    if leader_writer is not None:
+        # 다른 프로세스(리더)의 버퍼에 남은 상태라고 보고 이 프로세스 버퍼에서 옮김
+        leader_writer._alert_states, alert_service.writer._alert_states = alert_service.writer._alert_states, {}
+    update = AlertSettingUpdate(target_rate=Decimal(str(row["target_rate"] * 1.01)))
+    asyncio.run(alert_service.update_alert_setting(row["id"], update, row["user_id"]))
+    alert_service.writer.flush()
+    if leader_writer is not None:
+        leader_writer.flush()
+    return row
+
+
+def test_edit_discards_pending_fired_state(fake_db, alert_service):
+    assert fire_then_edit(fake_db, alert_service, None)["armed"] is True
+
+
+def test_stale_state_from_other_process_does_not_disarm_edited_alert(fake_db, alert_service):
+    assert fire_then_edit(fake_db, alert_service, BulkWriter())["armed"] is True
+
+
+def test_monitoring_loop_keeps_previous_snapshot_after_failed_check(fake_db, alert_service, monkeypatch):
+    from app.services import monitoring_service
+    from app.services.rate_snapshot import RateSnapshotStore
+
+    service = monitoring_service.ExchangeRateMonitoringService()
+    store = RateSnapshotStore()
+    v1 = store.publish({"USD": 1, "KRW": 1400})
+    service.snapshot_store = store
+    service.leader = type("Leader", (), {"is_leader": lambda self: True})()
+    checks = []
+
+    async def check_alerts(previous=None, current=None):
+        checks.append(None if previous is None else (previous.version, current.version))
+        return len(checks) != 2  # 첫 교차 평가만 실패
+
+    published = iter([{"USD": 1, "KRW": 1401}, {"USD": 1, "KRW": 1402}, None])
+
+    def sleep(seconds):
+        rates = next(published)
+        if rates is None:
+            service.is_running = False
+        else:
+            store.publish(rates)
+
+    monkeypatch.setattr(service, "_check_alerts", check_alerts)
+    monkeypatch.setattr(monitoring_service.time, "sleep", sleep)
+    service.is_running = True
+    service._run_monitoring_loop()
+    # 실패한 v1 → v2 구간은 다음 확인에서 v1 → v3 로 다시 평가
+    assert checks == [None, (v1.version, 2), (v1.version, 3)]
@@ -0,0 +1,70 @@
+"""일괄 저장기의 재시도·문제 행 분리"""
+
+import uuid
+
+import pytest
+
+from app.services.bulk_writer import BulkWriter
+
+
+class RowError(Exception):
+    """PostgREST APIError 처럼 SQLSTATE code 를 가진 오류"""
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+def notification(user_id: str = "user-1") -> dict:
+    return {"id": str(uuid.uuid4()), "user_id": user_id, "alert_setting_id": str(uuid.uuid4()),
+            "triggered_rate": 1400.0, "notification_type": "email", "sent_at": "2026-10-19T00:00:00+00:00"}
+
+
+@pytest.fixture
+def writer(fake_db):
+    return BulkWriter(max_batch=1000, max_delay=60, max_attempts=3)
+
+
+def test_retried_notifications_are_written_once(fake_db, writer):
+    rows = [notification() for _ in range(5)]
+    for row in rows:
+        writer.add_notification(row)
+    writer.flush()
+    for row in rows:
+        writer.add_notification(dict(row))
+    writer.flush()
+    assert len(fake_db.tables["notification_history"]) == 5
+
+
+def test_bad_row_is_dropped_and_good_rows_are_written(fake_db, writer, monkeypatch):
+    write = writer._write_notifications
+
+    def reject_bad_user(rows):
+        if any(row["user_id"] == "missing" for row in rows):
+            raise RowError("23503")
+        write(rows)
+
+    monkeypatch.setattr(writer, "_write_notifications", reject_bad_user)
+    rows = [notification() for _ in range(7)] + [notification("missing")] + [notification() for _ in range(4)]
+    for row in rows:
+        writer.add_notification(row)
+    writer.flush()
+
+    written = {row["id"] for row in fake_db.tables["notification_history"]}
+    assert written == {row["id"] for row in rows if row["user_id"] != "missing"}
+    assert writer.stats["dropped"] == 1
+    assert writer.pending == 0
+
+
+def test_transient_failure_retries_up_to_cap(fake_db, writer, monkeypatch):
+    def unavailable(rows):
+        raise ConnectionError("db down")
+
+    monkeypatch.setattr(writer, "_write_notifications", unavailable)
+    writer.add_notification(notification())
+    writer.flush()
+    writer.flush()
+    assert writer.pending == 1
+    writer.flush()
+    assert writer.pending == 0
+    assert writer.stats["dropped"] == 1
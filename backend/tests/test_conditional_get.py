@@ -0,0 +1,55 @@
+"""DB 기반 환율 응답의 ETag 와 304"""
+
+import asyncio
+from datetime import date
+
+from app.config import settings
+
+STORED = "/exchange/rates/stored"
+
+
+def get(client, path, **headers):
+    async def request():
+        return await client.get(path, headers=headers)
+    return asyncio.run(request())
+
+
+def store_today(fake_db):
+    fake_db.store_daily_rows([{
+        "currency_from": "USD", "currency_to": "KRW", "rate": 1500.0, "previous_rate": None,
+        "change_amount": 0.0, "change_percentage": 0.0, "date": date.today().isoformat(),
+    }])
+
+
+def test_daily_etag_follows_stored_rows(fake_db, client, monkeypatch):
+    monkeypatch.setattr(settings, "daily_data_version_ttl", 0)
+    fake_db.seed_daily_rates(3)
+    etag = get(client, STORED).headers["etag"]
+
+    # 스냅샷과 무관한 수동 저장(다른 인스턴스)으로 오늘 환율이 바뀜
+    store_today(fake_db)
+    response = get(client, STORED, **{"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_daily_version_is_reused_within_ttl(fake_db, client, monkeypatch):
+    monkeypatch.setattr(settings, "daily_data_version_ttl", 60)
+    fake_db.seed_daily_rates(3)
+    etag = get(client, STORED).headers["etag"]
+    store_today(fake_db)
+    # TTL 안에서는 DB 버전을 다시 읽지 않고 304
+    assert get(client, STORED, **{"If-None-Match": etag}).status_code == 304
+
+    from app.services.daily_exchange_rate_service import get_daily_exchange_service
+    get_daily_exchange_service().invalidate_data_version()  # 이 프로세스의 저장은 바로 반영
+    assert get(client, STORED, **{"If-None-Match": etag}).status_code == 200
+
+
+def test_not_modified_keeps_vary(fake_db, client):
+    fake_db.seed_daily_rates(3)
+    ok = get(client, STORED, **{"Accept-Encoding": "gzip"})
+    response = get(client, STORED, **{"Accept-Encoding": "gzip", "If-None-Match": ok.headers["etag"]})
+    assert response.status_code == 304
+    assert response.headers["etag"] == ok.headers["etag"]
+    assert "Accept-Encoding" in response.headers["vary"]
@@ -0,0 +1,36 @@
+"""최신 일일 환율 조회는 저장된 데이터만 읽음 (요청 경로에서 저장/업스트림 호출 없음)"""
+
+import asyncio
+from datetime import date, timedelta
+
+LATEST = "/exchange/rates/latest"
+
+
+def get(client, path, **params):
+    async def request():
+        return await client.get(path, params=params)
+    return asyncio.run(request())
+
+
+def test_latest_rates_read_stored_rows_only(fake_db, client):
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    fake_db.store_daily_rows([
+        {"currency_from": currency, "currency_to": "KRW", "rate": rate, "previous_rate": None,
+         "change_amount": 0.0, "change_percentage": 0.0, "date": yesterday}
+        for currency, rate in (("USD", 1400.0), ("JPY", 9.4))
+    ])
+    stored = len(fake_db.tables["daily_exchange_rates"])
+
+    body = get(client, LATEST).json()
+    assert {rate["currency_pair"] for rate in body["rates"]} == {"USD/KRW", "JPY/KRW"}
+    assert body["is_realtime"] is False  # 어제 데이터뿐 (오늘 저장은 스케줄러 몫)
+    assert len(fake_db.tables["daily_exchange_rates"]) == stored
+
+    converted = get(client, "/exchange/convert", from_currency="USD", to_currency="KRW", amount=10).json()
+    assert converted["data_source"] == "stored"
+    assert len(fake_db.tables["daily_exchange_rates"]) == stored
+
+
+def test_empty_database_returns_no_rates(fake_db, client):
+    assert get(client, LATEST).json()["rates"] == []
+    assert fake_db.tables.get("daily_exchange_rates", []) == []
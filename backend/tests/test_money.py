@@ -0,0 +1,26 @@
+"""일괄 변환과 한 건 변환의 결과 일치"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.utils.money import convert_amounts, convert_decimal
+
+PAIRS = [("USD", "KRW", 1388.52), ("KRW", "JPY", 0.10873), ("JPY", "USD", 0.006734), ("KRW", "KWD", 0.000221)]
+
+
+@pytest.mark.parametrize("from_currency,to_currency,rate", PAIRS)
+def test_batch_matches_single_conversion(from_currency, to_currency, rate):
+    rng = random.Random(7)
+    amounts = [Decimal(rng.randint(-10**7, 10**7)).scaleb(-rng.randint(0, 5)) for _ in range(500)]
+    amounts += [Decimal("10.005"), Decimal("0.125"), Decimal("-2.675"), Decimal("1234.5")]
+
+    converted = convert_amounts(amounts, rate, from_currency, to_currency)
+
+    assert converted == [convert_decimal(amount, rate, to_currency) for amount in amounts]
+
+
+def test_extra_decimals_are_not_rounded_before_conversion():
+    # 10.004 USD 를 센트로 먼저 반올림하면 10.00 USD → 13885 KRW 가 되어 한 건 변환(13891)과 달라짐
+    assert convert_amounts([Decimal("10.004")], 1388.52, "USD", "KRW") == [Decimal("13891")]
@@ -0,0 +1,124 @@
+"""공유 메모리 스냅샷 seqlock 과 발행 버전"""
+
+import uuid
+
+import pytest
+
+from app.services.rate_snapshot import SEQ, RateSnapshotStore, SharedRateSnapshot
+
+CURRENCIES = ("USD", "KRW", "JPY")
+
+
+@pytest.fixture
+def shared():
+    writer = SharedRateSnapshot.create(f"fx-test-{uuid.uuid4().hex[:8]}", CURRENCIES)
+    reader = SharedRateSnapshot.attach(writer.segment.name, CURRENCIES)
+    yield writer, reader
+    reader.close()
+    writer.close()
+    writer.unlink()
+
+
+def test_reader_sees_nothing_before_first_write(shared):
+    _, reader = shared
+    assert reader.read() is None
+
+
+def test_reader_sees_written_snapshot(shared):
+    writer, reader = shared
+    writer.write(3, 100.0, 90.0, {"USD": 1.0, "KRW": 1400.0})
+    snapshot = reader.read()
+    assert (snapshot.version, snapshot.fetched_at, snapshot.updated_at) == (3, 100.0, 90.0)
+    assert snapshot.usd_rates == {"USD": 1.0, "KRW": 1400.0}  # 없는 통화(JPY)는 빠짐
+    assert reader.read() is snapshot  # 바뀐 것이 없으면 캐시 재사용
+
+
+def test_reader_keeps_last_snapshot_while_write_in_progress(shared):
+    writer, reader = shared
+    writer.write(1, 100.0, 100.0, {"USD": 1.0, "KRW": 1400.0})
+    first = reader.read()
+    seq = SEQ.unpack_from(writer.segment.buf, 0)[0]
+    SEQ.pack_into(writer.segment.buf, 0, seq + 1)  # 쓰기 도중(홀수)인 상태
+    assert reader.read(retries=3) is first
+    writer.write(2, 101.0, 101.0, {"USD": 1.0, "KRW": 1500.0})  # 중단된 쓰기 복구
+    assert reader.read().version == 2
+
+
+def test_publish_bumps_version_only_when_rates_change():
+    store = RateSnapshotStore(history_size=4)
+    first = store.publish({"USD": 1, "KRW": 1400})
+    same = store.publish({"USD": 1, "KRW": 1400})
+    changed = store.publish({"USD": 1, "KRW": 1401})
+    assert (first.version, same.version, changed.version) == (1, 1, 2)
+    assert store.snapshot_at(1, int(first.updated_at)) is first
+    assert store.snapshot_at(2, int(changed.updated_at)) is changed
+
+
+def test_snapshot_at_rejects_versions_from_another_run():
+    store = RateSnapshotStore(history_size=4)
+    first = store.publish({"USD": 1, "KRW": 1400}, updated_at=1000.0)
+    store.publish({"USD": 1, "KRW": 1400}, updated_at=1060.0)  # 같은 환율 재확인 (버전 유지)
+    store.publish({"USD": 1, "KRW": 1401}, updated_at=1120.0)
+    assert store.snapshot_at(1, 1060) is first
+    assert store.snapshot_at(1, 1180) is None  # 다음 버전이 나온 뒤의 timestamp
+    # 재시작 전 프로세스의 v2 (이 링의 v2 보다 이전 시각)
+    assert store.snapshot_at(2, 900) is None
+
+
+def test_provisional_flag_is_shared_with_readers(shared):
+    writer, reader = shared
+    writer.write(1, 100.0, 90.0, {"USD": 1.0, "KRW": 1400.0}, provisional=True)
+    assert reader.read().provisional
+    writer.write(1, 101.0, 90.0, {"USD": 1.0, "KRW": 1400.0})
+    assert not reader.read().provisional
+
+
+def test_warm_start_keeps_saved_time_until_first_refresh(tmp_path):
+    from app.api.dependencies import snapshot_cache_headers
+    from app.services.rate_refresher import RateRefresher
+    from app.services.snapshot_file import write_snapshot_file
+    from app.services.upstream_budget import UpstreamBudget
+
+    saved = RateSnapshotStore().publish({"USD": 1.0, "KRW": 1400.0})
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot_file(path, saved)
+
+    store = RateSnapshotStore()
+    refresher = RateRefresher(object(), store, budget=UpstreamBudget(monthly_quota=0))
+    refresher.snapshot_file = path
+    warm = refresher.warm_start()
+    assert warm.provisional and warm.fetched_at == saved.fetched_at
+    assert not warm.is_fresh(3600)
+    assert snapshot_cache_headers(warm) is None  # 확인 전 스냅샷에는 ETag 없음
+
+    refreshed = store.publish({"USD": 1.0, "KRW": 1400.0})
+    assert not refreshed.provisional and refreshed.version == saved.version
+    assert snapshot_cache_headers(refreshed) is not None
+
+
+def test_snapshot_file_is_rewritten_only_when_rates_change(tmp_path, monkeypatch):
+    import asyncio
+
+    from app.services import rate_refresher
+    from app.services.upstream_budget import UpstreamBudget
+
+    class Upstream:
+        rates = {"USD": 1.0, "KRW": 1400.0}
+
+        async def fetch_upstream_rates(self, base_currency="USD", purpose=None):
+            return {"rates": dict(self.rates), "time_last_updated": 1_700_000_000}
+
+    writes = []
+    monkeypatch.setattr(rate_refresher, "write_snapshot_file", lambda path, snapshot: writes.append(snapshot.version))
+    upstream = Upstream()
+    refresher = rate_refresher.RateRefresher(upstream, RateSnapshotStore(), budget=UpstreamBudget(monthly_quota=0))
+    refresher.snapshot_file, refresher.ticks = str(tmp_path / "snapshot.bin"), None
+
+    async def refresh_three_times():
+        await refresher.refresh_once()
+        await refresher.refresh_once()
+        upstream.rates = {"USD": 1.0, "KRW": 1401.0}
+        await refresher.refresh_once()
+
+    asyncio.run(refresh_three_times())
+    assert writes == [1, 2]
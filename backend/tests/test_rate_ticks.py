@@ -0,0 +1,38 @@
+"""장중 틱/일별 OHLC 조회의 페이지 읽기와 조회 기간 제한"""
+
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from app.config import settings
+from app.services.rate_tick_service import RateTickService
+
+
+def test_intraday_reads_every_page(fake_db):
+    fake_db.seed_rate_ticks(2, per_day=24, currencies=("USD",))
+    service = RateTickService(pairs=[("USD", "KRW")], page_size=5)
+    start = datetime.now(timezone.utc) - timedelta(days=3)
+    ticks = asyncio.run(service.get_intraday("USD", "KRW", start))
+    assert len(ticks) == 48
+    assert [tick["timestamp"] for tick in ticks] == sorted(tick["timestamp"] for tick in ticks)
+
+
+def test_ohlc_reads_every_rolled_up_page(fake_db):
+    today = date.today()
+    fake_db.tables["exchange_rate_ohlc_daily"] = [
+        {"currency_from": "USD", "currency_to": "KRW", "date": (today - timedelta(days=offset)).isoformat(),
+         "open": 1400.0, "high": 1410.0, "low": 1390.0, "close": 1405.0, "tick_count": 24}
+        for offset in range(1, 8)
+    ]
+    service = RateTickService(pairs=[("USD", "KRW")], page_size=3)
+    candles = asyncio.run(service.get_ohlc("USD", "KRW", today - timedelta(days=10), today))
+    assert [candle["date"] for candle in candles] == [
+        (today - timedelta(days=offset)).isoformat() for offset in range(7, 0, -1)
+    ]
+
+
+def test_intraday_hours_are_capped_at_retention(client):
+    async def request(hours):
+        return await client.get("/exchange/rates/intraday/USD/KRW", params={"hours": hours})
+
+    assert asyncio.run(request(24 * settings.rate_tick_retention_days)).status_code == 200
+    assert asyncio.run(request(24 * settings.rate_tick_retention_days + 1)).status_code == 422
@@ -0,0 +1,21 @@
+"""스냅샷 응답 캐시"""
+
+from app.utils.responses import SnapshotPayloadCache
+
+
+def test_payload_cache_keys_on_version_and_update_time():
+    cache = SnapshotPayloadCache()
+    builds = []
+
+    def build(body):
+        def run():
+            builds.append(body)
+            return {"body": body}
+        return run
+
+    assert cache.response("bundle", (1, 1000.0), build("a")).body == b'{"body":"a"}'
+    assert cache.response("bundle", (1, 1000.0), build("b")).body == b'{"body":"a"}'
+    # 재시작 후 다시 시작된 버전 1, 임시 스냅샷(버전 0)은 캐시된 본문을 쓰지 않음
+    assert cache.response("bundle", (1, 2000.0), build("c")).body == b'{"body":"c"}'
+    assert cache.response("bundle", (0, 2000.0), build("d")).body == b'{"body":"d"}'
+    assert builds == ["a", "c", "d"]
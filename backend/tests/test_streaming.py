@@ -0,0 +1,18 @@
+"""키셋 페이지네이션 커서"""
+
+import pytest
+
+from app.utils.streaming import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    position = {"sent_at": "2026-10-19T00:00:00+00:00", "id": "abc"}
+    cursor = encode_cursor(position)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == position
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor({"a": 1})[:-3] + "!!!", "WzFd"])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
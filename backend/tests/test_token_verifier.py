@@ -0,0 +1,56 @@
+"""액세스 토큰 검증 설정과 알림 API 인증"""
+
+import asyncio
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.services.token_verifier import TokenVerifier
+from benchmarks.fakes import auth_headers
+
+SECRET = "test-jwt-secret-0123456789abcdef"
+
+
+def test_missing_secret_and_jwks_keys_fails_fast(monkeypatch):
+    verifier = TokenVerifier(secret="", jwks_url="http://127.0.0.1:9/jwks.json")
+    monkeypatch.setattr(verifier, "refresh_keys", lambda: None)
+    with pytest.raises(RuntimeError):
+        verifier.ensure_configured()
+
+
+def test_secret_is_enough_configuration():
+    TokenVerifier(secret=SECRET, jwks_url="").ensure_configured()
+
+
+def test_verify_hs256_token():
+    token = auth_headers("user-1", SECRET)["Authorization"].split(" ")[1]
+    assert TokenVerifier(secret=SECRET, jwks_url="").verify(token)["sub"] == "user-1"
+
+
+def test_algorithm_comes_from_the_key_not_the_header():
+    es_key, other_key = ec.generate_private_key(ec.SECP256R1()), ec.generate_private_key(ec.SECP384R1())
+    verifier = TokenVerifier(secret="", jwks_url="", audience="")
+    verifier._keys = {
+        "es256": jwt.PyJWK(jwt.algorithms.ECAlgorithm.to_jwk(es_key.public_key(), as_dict=True)),
+        "es384": jwt.PyJWK(jwt.algorithms.ECAlgorithm.to_jwk(other_key.public_key(), as_dict=True)),
+    }
+    claims = {"sub": "user-1", "exp": int(time.time()) + 60}
+    assert verifier.verify(jwt.encode(claims, es_key, "ES256", headers={"kid": "es256"}))["sub"] == "user-1"
+    # P-384 키로 서명하고 ES256 키를 가리키는 토큰, ES256 으로 선언했지만 ES384 키를 가리키는 토큰 모두 거부
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(jwt.encode(claims, other_key, "ES384", headers={"kid": "es256"}))
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(jwt.encode(claims, es_key, "ES256", headers={"kid": "es384"}))
+
+
+def test_alert_routes_require_bearer_token(fake_db, client):
+    async def requests():
+        anonymous = await client.get("/alerts/", headers={"X-User-ID": "user-1"})
+        signed = await client.get("/alerts/", headers=auth_headers("user-1"))
+        return anonymous, signed
+
+    anonymous, signed = asyncio.run(requests())
+    assert anonymous.status_code == 401
+    assert signed.status_code == 200
@@ -0,0 +1,46 @@
+"""월간 예산의 갱신 주기, 스냅샷 최신 판단과 인스턴스 간 공유 사용량"""
+
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.services.upstream_budget import UpstreamBudget
+
+MID_MONTH = datetime(2026, 10, 16, tzinfo=timezone.utc).timestamp()
+
+
+def test_unlimited_budget_uses_configured_max_age():
+    assert UpstreamBudget(monthly_quota=0).snapshot_max_age(MID_MONTH) == settings.rate_snapshot_max_age
+
+
+def test_budget_mode_freshness_follows_scheduled_interval(fake_db):
+    budget = UpstreamBudget(monthly_quota=1000, alert_reserve=0.2, min_interval=60)
+    interval = budget.interval("scheduled", MID_MONTH)
+    assert interval > settings.rate_snapshot_max_age
+    assert budget.snapshot_max_age(MID_MONTH) == interval + settings.rate_snapshot_max_age
+
+
+def test_cached_max_age_does_not_read_usage(fake_db, monkeypatch):
+    budget = UpstreamBudget(monthly_quota=1000, alert_reserve=0.2, min_interval=60)
+    # 갱신 루프가 계산하기 전에는 이 프로세스의 사용량으로 추정
+    estimated = budget.cached_snapshot_max_age(MID_MONTH)
+    assert estimated > settings.rate_snapshot_max_age
+    computed = budget.snapshot_max_age(MID_MONTH + 3600)
+
+    from app.services import upstream_budget
+    def no_db():
+        raise AssertionError("요청 경로에서 DB 조회")
+    monkeypatch.setattr(upstream_budget, "get_supabase", no_db)
+    assert budget.cached_snapshot_max_age(MID_MONTH) == computed
+
+
+def test_usage_is_shared_across_instances(fake_db):
+    first = UpstreamBudget(monthly_quota=10, alert_reserve=0.2, min_interval=0)
+    assert all(first.try_spend("scheduled", MID_MONTH) for _ in range(5))
+    # 다른 인스턴스(또는 재시작한 프로세스)도 DB 의 사용량을 이어서 씀
+    second = UpstreamBudget(monthly_quota=10, alert_reserve=0.2, min_interval=0)
+    assert second.remaining("scheduled", MID_MONTH) == 3
+    assert all(second.try_spend("on_demand", MID_MONTH) for _ in range(3))
+    assert not first.try_spend("scheduled", MID_MONTH)
+    assert first.try_spend("alert", MID_MONTH)  # 알림 예비분은 따로 남음
+    assert first.used == {"scheduled": 5, "on_demand": 3, "alert": 1}
+    assert first.denied == 1
@@ -0,0 +1,180 @@
+"""업스트림 서킷 브레이커 상태 전이, 헤지 요청, 요청별 예산 차감과 이벤트 루프별 호출"""
+
+import asyncio
+
+import pytest
+
+from app.services.upstream_budget import UpstreamBudget
+from app.services.upstream_client import CircuitBreaker, UpstreamBudgetExhausted, UpstreamClient, parse_providers
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()           # reset_timeout 경과 → 반열림, 시험 호출 1건
+    assert breaker.state == "half_open"
+    assert not breaker.allow()       # 시험 호출 진행 중에는 추가 호출 없음
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0)
+    breaker.state = "open"
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_released_probe_can_be_retried():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release()  # 헤지에서 취소된 시험 호출
+    assert breaker.allow()
+
+
+def v4_provider_client(handler, providers="exchangerate-api-v4=http://primary/v4/latest/{base}", **kwargs):
+    import httpx
+    return UpstreamClient(
+        parse_providers(providers), timeout=2, hedge_delay=0.01, hedge_min_delay=0.01,
+        mounts={"http://primary": httpx.MockTransport(handler), "http://secondary": httpx.MockTransport(handler)},
+        **kwargs,
+    )
+
+
+def v4_response(request):
+    import httpx
+    return httpx.Response(200, json={"base": "USD", "time_last_updated": 1_700_000_000, "rates": {"KRW": 1400.0}})
+
+
+def test_single_provider_is_not_hedged():
+    calls = []
+
+    async def slow(request):
+        calls.append(request.url.host)
+        await asyncio.sleep(0.05)
+        return v4_response(request)
+
+    upstream = v4_provider_client(slow)
+
+    async def run():
+        try:
+            return await upstream.fetch("USD")
+        finally:
+            await upstream.aclose()
+
+    assert asyncio.run(run())["rates"]["KRW"] == 1400.0
+    assert calls == ["primary"]
+    assert upstream.stats["hedged"] == 0
+
+
+def test_slow_primary_is_hedged_to_next_provider():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.host)
+        if request.url.host == "primary":
+            await asyncio.sleep(0.5)
+        return v4_response(request)
+
+    upstream = v4_provider_client(
+        handler, "exchangerate-api-v4=http://primary/v4/latest/{base},exchangerate-api-v4=http://secondary/v4/latest/{base}"
+    )
+
+    async def run():
+        try:
+            return await upstream.fetch("USD")
+        finally:
+            await upstream.aclose()
+
+    asyncio.run(run())
+    assert calls == ["primary", "secondary"]
+    assert upstream.stats["hedged"] == 1
+
+
+def test_calls_from_other_loops_run_on_the_bound_loop():
+    loops = []
+
+    async def handler(request):
+        loops.append(asyncio.get_running_loop())
+        return v4_response(request)
+
+    upstream = v4_provider_client(handler)
+
+    async def main():
+        upstream.bind_loop(asyncio.get_running_loop())
+        # 모니터링 스레드처럼 별도 스레드에서 asyncio.run 으로 호출
+        await asyncio.to_thread(asyncio.run, upstream.fetch("USD"))
+        await upstream.fetch("USD")
+        client = upstream._client
+        await upstream.aclose()
+        return asyncio.get_running_loop(), client
+
+    main_loop, client = asyncio.run(main())
+    assert loops == [main_loop, main_loop]
+    assert client.is_closed
+
+
+TWO_PROVIDERS = "exchangerate-api-v4=http://primary/v4/latest/{base},exchangerate-api-v4=http://secondary/v4/latest/{base}"
+
+
+def test_hedge_request_is_charged_to_budget(fake_db):
+    async def handler(request):
+        if request.url.host == "primary":
+            await asyncio.sleep(0.5)
+        return v4_response(request)
+
+    budget = UpstreamBudget(monthly_quota=100, alert_reserve=0.2, min_interval=0)
+    upstream = v4_provider_client(handler, TWO_PROVIDERS, budget=budget)
+
+    async def run():
+        try:
+            return await upstream.fetch("USD", "scheduled")
+        finally:
+            await upstream.aclose()
+
+    asyncio.run(run())
+    assert upstream.stats["hedged"] == 1
+    assert budget.used["scheduled"] == 2
+
+
+def test_exhausted_budget_sends_no_request(fake_db):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        return v4_response(request)
+
+    budget = UpstreamBudget(monthly_quota=5, alert_reserve=0.2, min_interval=0)
+    while budget.try_spend("scheduled"):
+        pass
+    upstream = v4_provider_client(handler, TWO_PROVIDERS, budget=budget)
+
+    async def run():
+        try:
+            return await upstream.fetch("USD", "on_demand")
+        finally:
+            await upstream.aclose()
+
+    with pytest.raises(UpstreamBudgetExhausted):
+        asyncio.run(run())
+    assert calls == []
+    assert upstream.stats["budget_denied"] == 1
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+exchangerate-api.com 로컬 시뮬레이터
+
+약 160개 통화에 대해 시드 기반 랜덤 워크로 환율을 생성하고
+`/v4/latest/{base}` 응답 형식을 그대로 제공합니다.
+지연/오류율/장애 주입을 지원하여 캐싱, 폴백, 알림 폭주를 오프라인으로 부하 테스트할 수 있습니다.
+
+사용법:
+    python upstream_simulator.py --port 8001 --seed 42 --interval 60
+    EXCHANGE_RATE_API_BASE_URL=http://127.0.0.1:8001/v4 python start_local.py
+
+제어 엔드포인트:
+    GET  /_simulator/state              현재 틱, 장애 설정 조회
+    POST /_simulator/faults             지연/오류율 설정 변경 (JSON 일부 필드만 전달 가능)
+    POST /_simulator/outage?seconds=30  지정 시간 동안 전체 장애
+    POST /_simulator/shock              특정 통화 급변 {"currency": "KRW", "percent": 2.5}
+    POST /_simulator/tick?count=1       수동 틱 진행 (--interval 0 일 때 유용)
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+# USD 기준 초기 환율 (exchangerate-api v4 통화 목록 기준)
+BASE_USD_RATES: Dict[str, float] = {
+    "USD": 1.0, "AED": 3.6725, "AFN": 68.0, "ALL": 83.5, "AMD": 383.0, "ANG": 1.79,
+    "AOA": 920.0, "ARS": 1450.0, "AUD": 1.53, "AWG": 1.79, "AZN": 1.7, "BAM": 1.68,
+    "BBD": 2.0, "BDT": 122.0, "BGN": 1.68, "BHD": 0.376, "BIF": 2960.0, "BMD": 1.0,
+    "BND": 1.29, "BOB": 6.91, "BRL": 5.41, "BSD": 1.0, "BTN": 87.9, "BWP": 14.2,
+    "BYN": 3.1, "BZD": 2.0, "CAD": 1.37, "CDF": 2600.0, "CHF": 0.80, "CLP": 960.0,
+    "CNY": 7.13, "COP": 3880.0, "CRC": 503.0, "CUP": 24.0, "CVE": 94.6, "CZK": 20.9,
+    "DJF": 177.721, "DKK": 6.41, "DOP": 63.5, "DZD": 130.0, "EGP": 47.7, "ERN": 15.0,
+    "ETB": 150.0, "EUR": 0.86, "FJD": 2.28, "FKP": 0.745, "FOK": 6.41, "GBP": 0.745,
+    "GEL": 2.71, "GGP": 0.745, "GHS": 11.6, "GIP": 0.745, "GMD": 73.0, "GNF": 8680.0,
+    "GTQ": 7.66, "GYD": 209.0, "HKD": 7.78, "HNL": 26.3, "HRK": 6.47, "HTG": 131.0,
+    "HUF": 336.0, "IDR": 16600.0, "ILS": 3.3, "IMP": 0.745, "INR": 87.9, "IQD": 1310.0,
+    "IRR": 42000.0, "ISK": 122.0, "JEP": 0.745, "JMD": 160.0, "JOD": 0.709, "JPY": 150.5,
+    "KES": 129.2, "KGS": 87.4, "KHR": 4010.0, "KID": 1.53, "KMF": 423.0, "KRW": 1420.0,
+    "KWD": 0.306, "KYD": 0.833, "KZT": 538.0, "LAK": 21700.0, "LBP": 89500.0, "LKR": 302.0,
+    "LRD": 183.0, "LSL": 17.3, "LYD": 5.42, "MAD": 9.15, "MDL": 16.9, "MGA": 4450.0,
+    "MKD": 52.9, "MMK": 2100.0, "MNT": 3590.0, "MOP": 8.01, "MRU": 39.9, "MUR": 45.5,
+    "MVR": 15.4, "MWK": 1740.0, "MXN": 18.4, "MYR": 4.22, "MZN": 63.9, "NAD": 17.3,
+    "NGN": 1470.0, "NIO": 36.8, "NOK": 10.0, "NPR": 140.6, "NZD": 1.74, "OMR": 0.3845,
+    "PAB": 1.0, "PEN": 3.42, "PGK": 4.2, "PHP": 58.2, "PKR": 281.0, "PLN": 3.65,
+    "PYG": 7100.0, "QAR": 3.64, "RON": 4.37, "RSD": 100.8, "RUB": 81.0, "RWF": 1450.0,
+    "SAR": 3.75, "SBD": 8.2, "SCR": 14.5, "SDG": 510.0, "SEK": 9.45, "SGD": 1.30,
+    "SHP": 0.745, "SLE": 23.2, "SLL": 23200.0, "SOS": 571.0, "SRD": 38.5, "SSP": 4600.0,
+    "STN": 21.1, "SYP": 12900.0, "SZL": 17.3, "THB": 32.7, "TJS": 9.3, "TMT": 3.5,
+    "TND": 2.93, "TOP": 2.38, "TRY": 41.8, "TTD": 6.77, "TVD": 1.53, "TWD": 30.6,
+    "TZS": 2450.0, "UAH": 41.5, "UGX": 3450.0, "UYU": 39.9, "UZS": 12000.0, "VES": 190.0,
+    "VND": 26350.0, "VUV": 120.0, "WST": 2.76, "XAF": 564.0, "XCD": 2.7, "XCG": 1.79,
+    "XDR": 0.73, "XOF": 564.0, "XPF": 102.6, "YER": 239.0, "ZAR": 17.3, "ZMW": 23.2,
+    "ZWL": 26.8,
+}
+
+# 고정 환율(페그) 통화: 통화 -> 기준 통화 (비율은 초기 환율에서 계산)
+PEGS: Dict[str, str] = {
+    "AED": "USD", "SAR": "USD", "BHD": "USD", "OMR": "USD", "QAR": "USD", "JOD": "USD",
+    "PAB": "USD", "BSD": "USD", "BMD": "USD", "KYD": "USD", "BBD": "USD", "BZD": "USD",
+    "DJF": "USD", "ANG": "USD", "AWG": "USD", "XCD": "USD", "XCG": "USD", "ERN": "USD",
+    "CUP": "USD", "TMT": "USD",
+    "BGN": "EUR", "BAM": "EUR", "XAF": "EUR", "XOF": "EUR", "KMF": "EUR", "CVE": "EUR",
+    "XPF": "EUR", "DKK": "EUR", "HRK": "EUR", "STN": "EUR",
+    "FKP": "GBP", "GGP": "GBP", "GIP": "GBP", "IMP": "GBP", "JEP": "GBP", "SHP": "GBP",
+    "FOK": "DKK", "KID": "AUD", "TVD": "AUD", "BTN": "INR", "NPR": "INR",
+    "LSL": "ZAR", "NAD": "ZAR", "SZL": "ZAR", "MOP": "HKD", "SLL": "SLE", "BND": "SGD",
+}
+
+# 변동성이 큰 통화 (일 변동성 배수)
+HIGH_VOLATILITY = {
+    "ARS", "VES", "TRY", "NGN", "EGP", "LBP", "SSP", "SDG", "ZWL", "IRR", "SYP",
+    "GHS", "MWK", "UZS", "AOA", "ETB", "SLE", "CDF", "YER", "LAK", "MMK",
+}
+MAJORS = {"EUR", "JPY", "GBP", "CHF", "CAD", "AUD", "NZD", "SEK", "NOK", "CNY", "HKD", "SGD", "KRW"}
+
+
+class RateSimulator:
+    """시드 기반 기하 랜덤 워크 환율 생성기
+
+    같은 seed와 틱 번호에 대해서는 항상 같은 환율을 반환합니다.
+    """
+
+    def __init__(self, seed: int = 42, update_interval: float = 60.0,
+                 daily_volatility: float = 0.005, start_time: Optional[float] = None):
+        self.seed = seed
+        self.update_interval = update_interval
+        self.daily_volatility = daily_volatility
+        now = time.time()
+        if start_time is None:
+            start_time = now - (now % update_interval) if update_interval > 0 else now
+        self.start_time = start_time
+        self.currencies: List[str] = sorted(BASE_USD_RATES)
+        self._floating = [c for c in self.currencies if c not in PEGS and c != "USD"]
+        self._peg_ratios = {
+            code: BASE_USD_RATES[code] / BASE_USD_RATES[anchor] for code, anchor in PEGS.items()
+        }
+        self._sigma = {code: self._tick_sigma(code) for code in self._floating}
+        self._manual_ticks = 0
+        self._shocks: Dict[str, float] = {}
+        self._reset()
+
+    def _tick_sigma(self, code: str) -> float:
+        interval_days = (self.update_interval or 60.0) / 86400
+        multiplier = 1.0 if code in MAJORS else 3.0 if code in HIGH_VOLATILITY else 1.5
+        return self.daily_volatility * multiplier * math.sqrt(interval_days)
+
+    def _reset(self) -> None:
+        self._rng = random.Random(self.seed)
+        self._tick = 0
+        self._log_rates = {code: math.log(BASE_USD_RATES[code]) for code in self._floating}
+
+    def current_tick(self, now: Optional[float] = None) -> int:
+        """현재 시각에 해당하는 틱 번호"""
+        if self.update_interval <= 0:
+            return self._manual_ticks
+        now = time.time() if now is None else now
+        elapsed = max(now - self.start_time, 0.0)
+        return int(elapsed // self.update_interval) + self._manual_ticks
+
+    def advance(self, count: int = 1) -> int:
+        """수동으로 틱 진행"""
+        self._manual_ticks += count
+        return self.current_tick()
+
+    def shock(self, currency: str, percent: float) -> None:
+        """특정 통화(USD 대비 환율)를 percent% 만큼 급변시킴"""
+        if currency not in BASE_USD_RATES or currency == "USD":
+            raise KeyError(currency)
+        self._shocks[currency] = self._shocks.get(currency, 1.0) * (1 + percent / 100)
+
+    def _walk_to(self, tick: int) -> None:
+        if tick < self._tick:
+            self._reset()
+        gauss = self._rng.gauss
+        while self._tick < tick:
+            for code in self._floating:
+                self._log_rates[code] += self._sigma[code] * gauss(0.0, 1.0)
+            self._tick += 1
+
+    def usd_rates(self, tick: Optional[int] = None) -> Dict[str, float]:
+        """틱 시점의 USD 기준 전체 환율"""
+        self._walk_to(self.current_tick() if tick is None else tick)
+        rates = {"USD": 1.0}
+        for code in self._floating:
+            rates[code] = math.exp(self._log_rates[code])
+
+        def resolve(code: str) -> float:
+            if code in rates:
+                return rates[code]
+            anchor = PEGS[code]
+            rates[code] = resolve(anchor) * self._peg_ratios[code]
+            return rates[code]
+
+        for code in PEGS:
+            resolve(code)
+        for code, factor in self._shocks.items():
+            rates[code] *= factor
+        return rates
+
+    def tick_timestamp(self, tick: int) -> int:
+        if self.update_interval <= 0:
+            return int(self.start_time)
+        return int(self.start_time + (tick - self._manual_ticks) * self.update_interval)
+
+    def latest(self, base: str, now: Optional[float] = None) -> Dict:
+        """exchangerate-api.com `/v4/latest/{base}` 응답 본문"""
+        tick = self.current_tick(now)
+        usd_rates = self.usd_rates(tick)
+        base_rate = usd_rates[base]
+        updated = self.tick_timestamp(tick)
+        rates = {code: round(usd_rates[code] / base_rate, 6) for code in self.currencies}
+        rates[base] = 1
+        return {
+            "provider": "https://www.exchangerate-api.com",
+            "WARNING_UPGRADE_TO_V6": "https://www.exchangerate-api.com/docs/free",
+            "terms": "https://www.exchangerate-api.com/terms",
+            "base": base,
+            "date": datetime.fromtimestamp(updated, tz=timezone.utc).date().isoformat(),
+            "time_last_updated": updated,
+            "rates": rates,
+        }
+
+
+@dataclass
+class FaultConfig:
+    """업스트림 장애 주입 설정"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    outage_every: float = 0.0      # 초 단위 주기 (0이면 주기적 장애 없음)
+    outage_duration: float = 0.0   # 주기적 장애 지속 시간 (초)
+    outage_until: float = 0.0      # 수동 장애 종료 시각 (epoch)
+    seed: int = 42
+    _rng: random.Random = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed + 1)
+
+    def in_outage(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        if now < self.outage_until:
+            return True
+        if self.outage_every > 0 and self.outage_duration > 0:
+            return (now % self.outage_every) < self.outage_duration
+        return False
+
+    def delay_seconds(self) -> float:
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(delay, 0.0) / 1000
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def as_dict(self) -> Dict:
+        data = asdict(self)
+        data.pop("_rng", None)
+        data["in_outage"] = self.in_outage()
+        return data
+
+
+def create_app(simulator: RateSimulator, faults: FaultConfig):
+    from fastapi import Body, FastAPI, HTTPException, Query
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI(title="ExchangeRate-API Simulator", version="1.0.0")
+    stats = {"requests": 0, "errors": 0, "outage_rejections": 0}
+
+    @app.get("/v4/latest/{base}")
+    async def latest(base: str):
+        stats["requests"] += 1
+        delay = faults.delay_seconds()
+        if delay:
+            await asyncio.sleep(delay)
+        if faults.in_outage():
+            stats["outage_rejections"] += 1
+            return JSONResponse(status_code=503, content={"result": "error", "error-type": "service-unavailable"})
+        if faults.should_fail():
+            stats["errors"] += 1
+            return JSONResponse(status_code=faults.error_status, content={"result": "error", "error-type": "injected-fault"})
+        base = base.upper()
+        if base not in BASE_USD_RATES:
+            return JSONResponse(status_code=404, content={"result": "error", "error-type": "unsupported-code"})
+        return simulator.latest(base)
+
+    @app.get("/_simulator/state")
+    async def state():
+        return {
+            "seed": simulator.seed,
+            "update_interval": simulator.update_interval,
+            "tick": simulator.current_tick(),
+            "currency_count": len(simulator.currencies),
+            "faults": faults.as_dict(),
+            "stats": stats,
+        }
+
+    @app.post("/_simulator/faults")
+    async def update_faults(changes: Dict = Body(...)):
+        for key, value in changes.items():
+            if key.startswith("_") or not hasattr(faults, key):
+                raise HTTPException(status_code=400, detail=f"알 수 없는 설정: {key}")
+            setattr(faults, key, type(getattr(faults, key))(value))
+        return faults.as_dict()
+
+    @app.post("/_simulator/outage")
+    async def outage(seconds: float = Query(30.0, ge=0)):
+        faults.outage_until = time.time() + seconds
+        return faults.as_dict()
+
+    @app.post("/_simulator/shock")
+    async def shock(currency: str = Body(...), percent: float = Body(...)):
+        try:
+            simulator.shock(currency.upper(), percent)
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"지원하지 않는 통화: {currency}")
+        return {"currency": currency.upper(), "usd_rate": simulator.usd_rates()[currency.upper()]}
+
+    @app.post("/_simulator/tick")
+    async def tick(count: int = Query(1, ge=1)):
+        return {"tick": simulator.advance(count)}
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="exchangerate-api.com 로컬 시뮬레이터")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--interval", type=float, default=60.0, help="환율 갱신 주기 (초, 0이면 수동 틱)")
+    parser.add_argument("--volatility", type=float, default=0.005, help="주요 통화 일 변동성 (기본 0.5%%)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="실패 응답 비율 (0.0 ~ 1.0)")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--outage-every", type=float, default=0.0, help="주기적 장애 간격 (초)")
+    parser.add_argument("--outage-duration", type=float, default=0.0, help="주기적 장애 지속 시간 (초)")
+    args = parser.parse_args(argv)
+
+    simulator = RateSimulator(seed=args.seed, update_interval=args.interval, daily_volatility=args.volatility)
+    faults = FaultConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        outage_every=args.outage_every,
+        outage_duration=args.outage_duration,
+        seed=args.seed,
+    )
+
+    import uvicorn
+    print(f"🧪 업스트림 시뮬레이터 시작: http://{args.host}:{args.port}/v4/latest/USD")
+    print(f"   통화 {len(simulator.currencies)}개, seed={args.seed}, 갱신 주기={args.interval}s")
+    uvicorn.run(create_app(simulator, faults), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+-- Existing deployments: scheduler leader lease used by LEADER_ELECTION_BACKEND=database
+-- (fresh installs get this from supabase_schema.sql)
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    name VARCHAR(50) PRIMARY KEY,
+    holder VARCHAR(200) NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Acquire or renew a lease; succeeds if free, expired, or already held by p_holder
+CREATE OR REPLACE FUNCTION acquire_scheduler_lease(p_name TEXT, p_holder TEXT, p_lease_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+    acquired BOOLEAN;
+BEGIN
+    INSERT INTO scheduler_leases (name, holder, expires_at)
+    VALUES (p_name, p_holder, NOW() + make_interval(secs => p_lease_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+        WHERE scheduler_leases.holder = EXCLUDED.holder OR scheduler_leases.expires_at < NOW()
+    RETURNING true INTO acquired;
+    RETURN COALESCE(acquired, false);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION release_scheduler_lease(p_name TEXT, p_holder TEXT)
+RETURNS VOID AS $$
+    DELETE FROM scheduler_leases WHERE name = p_name AND holder = p_holder;
+$$ LANGUAGE sql;
+
+ALTER TABLE scheduler_leases ENABLE ROW LEVEL SECURITY;  -- service key only
@@ -0,0 +1,8 @@
+-- Existing deployments: alert fire/re-arm state and the index used to find armed alerts near a rate
+-- (fresh installs get this from supabase_schema.sql). Run before 20261020000004, which updates these columns.
+ALTER TABLE alert_settings
+    ADD COLUMN IF NOT EXISTS armed BOOLEAN NOT NULL DEFAULT true,  -- false = fired, waiting for the rate to move back past the re-arm band
+    ADD COLUMN IF NOT EXISTS last_triggered_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_alert_settings_armed_pair ON alert_settings(currency_from, currency_to, target_rate)
+    WHERE is_active = true AND armed = true;
@@ -0,0 +1,3 @@
+-- Existing deployments: index behind the keyset-paginated notification history, (sent_at, id) descending per user
+-- (fresh installs get this from supabase_schema.sql)
+CREATE INDEX IF NOT EXISTS idx_notification_history_user_sent ON notification_history(user_id, sent_at DESC, id DESC);
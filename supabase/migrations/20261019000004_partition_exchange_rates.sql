@@ -0,0 +1,195 @@
+-- Existing deployments: range-partition exchange_rates (monthly) and daily_exchange_rates (yearly),
+-- key ticks by (currency_from, currency_to, timestamp), and add the daily OHLC rollup table and the
+-- partition maintenance functions (fresh installs get all of this from supabase_schema.sql).
+-- Both tables are rebuilt in place: the old table is renamed, its rows are copied into the new
+-- partitioned table under the original name, and the old table is dropped, all in this migration's
+-- transaction. Run it before the 20261020* migrations, which build on the partitioned daily_exchange_rates.
+
+-- 1. Move the unpartitioned tables aside (constraint names are renamed too so the new tables can reuse them)
+LOCK TABLE exchange_rates, daily_exchange_rates IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE exchange_rates RENAME TO exchange_rates_unpartitioned;
+ALTER TABLE exchange_rates_unpartitioned RENAME CONSTRAINT exchange_rates_pkey TO exchange_rates_unpartitioned_pkey;
+DROP INDEX IF EXISTS idx_exchange_rates_currency_pair;
+DROP INDEX IF EXISTS idx_exchange_rates_timestamp;
+ALTER TABLE daily_exchange_rates RENAME TO daily_exchange_rates_unpartitioned;
+ALTER TABLE daily_exchange_rates_unpartitioned
+    RENAME CONSTRAINT daily_exchange_rates_pkey TO daily_exchange_rates_unpartitioned_pkey;
+ALTER TABLE daily_exchange_rates_unpartitioned
+    RENAME CONSTRAINT daily_exchange_rates_currency_from_currency_to_date_key TO daily_exchange_rates_unpartitioned_key;
+DROP INDEX IF EXISTS idx_daily_exchange_rates_currency_pair;
+DROP INDEX IF EXISTS idx_daily_exchange_rates_date;
+DROP INDEX IF EXISTS idx_daily_exchange_rates_lookup;
+
+-- 2. Partitioned tables under the original names
+CREATE TABLE exchange_rates (
+    id UUID DEFAULT gen_random_uuid(),
+    currency_from VARCHAR(3) NOT NULL,
+    currency_to VARCHAR(3) NOT NULL,
+    rate DECIMAL(15,6) NOT NULL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),  -- upstream update time of the tick
+    PRIMARY KEY (id, timestamp),
+    UNIQUE (currency_from, currency_to, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE exchange_rates_default PARTITION OF exchange_rates DEFAULT;
+
+CREATE TABLE daily_exchange_rates (
+    id UUID DEFAULT gen_random_uuid(),
+    currency_from VARCHAR(3) NOT NULL,
+    currency_to VARCHAR(3) NOT NULL,
+    rate DECIMAL(15,6) NOT NULL,
+    previous_rate DECIMAL(15,6),
+    change_amount DECIMAL(15,6),
+    change_percentage DECIMAL(8,4),
+    date DATE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (id, date),
+    UNIQUE(currency_from, currency_to, date)
+) PARTITION BY RANGE (date);
+
+CREATE TABLE daily_exchange_rates_default PARTITION OF daily_exchange_rates DEFAULT;
+
+-- Daily open/high/low/close of intraday ticks rolled up by rollup_exchange_rate_ticks
+CREATE TABLE IF NOT EXISTS exchange_rate_ohlc_daily (
+    currency_from VARCHAR(3) NOT NULL,
+    currency_to VARCHAR(3) NOT NULL,
+    date DATE NOT NULL,  -- UTC day
+    open DECIMAL(15,6) NOT NULL,
+    high DECIMAL(15,6) NOT NULL,
+    low DECIMAL(15,6) NOT NULL,
+    close DECIMAL(15,6) NOT NULL,
+    open_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    close_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    tick_count INTEGER NOT NULL,
+    PRIMARY KEY (currency_from, currency_to, date)
+);
+
+-- Create the current and upcoming partitions (monthly ticks, yearly daily rates); run daily by the rollup job
+CREATE OR REPLACE FUNCTION ensure_exchange_rate_partitions(p_months_ahead INTEGER DEFAULT 2)
+RETURNS VOID AS $$
+DECLARE
+    month_start DATE;
+    year_start DATE;
+BEGIN
+    FOR i IN 0..p_months_ahead LOOP
+        month_start := (date_trunc('month', NOW() AT TIME ZONE 'UTC') + make_interval(months => i))::DATE;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF exchange_rates FOR VALUES FROM (%L) TO (%L)',
+            'exchange_rates_' || to_char(month_start, 'YYYYMM'),
+            month_start::TIMESTAMP AT TIME ZONE 'UTC',
+            (month_start + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+    FOR i IN 0..1 LOOP
+        year_start := (date_trunc('year', NOW() AT TIME ZONE 'UTC') + make_interval(years => i))::DATE;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF daily_exchange_rates FOR VALUES FROM (%L) TO (%L)',
+            'daily_exchange_rates_' || to_char(year_start, 'YYYY'),
+            year_start,
+            (year_start + INTERVAL '1 year')::DATE
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Compact ticks before p_before (UTC day) into daily OHLC rows, then drop/delete them
+CREATE OR REPLACE FUNCTION rollup_exchange_rate_ticks(p_before DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff TIMESTAMP WITH TIME ZONE := p_before::TIMESTAMP AT TIME ZONE 'UTC';
+    rolled INTEGER;
+    partition_name TEXT;
+BEGIN
+    INSERT INTO exchange_rate_ohlc_daily AS o
+        (currency_from, currency_to, date, open, high, low, close, open_at, close_at, tick_count)
+    SELECT currency_from, currency_to, (timestamp AT TIME ZONE 'UTC')::DATE,
+           (array_agg(rate ORDER BY timestamp))[1], MAX(rate), MIN(rate),
+           (array_agg(rate ORDER BY timestamp DESC))[1], MIN(timestamp), MAX(timestamp), COUNT(*)
+    FROM exchange_rates
+    WHERE timestamp < cutoff
+    GROUP BY currency_from, currency_to, (timestamp AT TIME ZONE 'UTC')::DATE
+    ON CONFLICT (currency_from, currency_to, date) DO UPDATE  -- late ticks for an already rolled-up day
+    SET open = CASE WHEN EXCLUDED.open_at < o.open_at THEN EXCLUDED.open ELSE o.open END,
+        close = CASE WHEN EXCLUDED.close_at > o.close_at THEN EXCLUDED.close ELSE o.close END,
+        high = GREATEST(o.high, EXCLUDED.high),
+        low = LEAST(o.low, EXCLUDED.low),
+        open_at = LEAST(o.open_at, EXCLUDED.open_at),
+        close_at = GREATEST(o.close_at, EXCLUDED.close_at),
+        tick_count = o.tick_count + EXCLUDED.tick_count;
+    GET DIAGNOSTICS rolled = ROW_COUNT;
+
+    -- Whole months before the cutoff are dropped instead of deleted row by row
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'exchange_rates'::regclass
+          AND c.relname ~ '^exchange_rates_[0-9]{6}$'
+          AND to_date(right(c.relname, 6), 'YYYYMM') + INTERVAL '1 month' <= p_before
+    LOOP
+        EXECUTE format('DROP TABLE %I', partition_name);
+    END LOOP;
+    DELETE FROM exchange_rates WHERE timestamp < cutoff;
+
+    RETURN rolled;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Partition maintenance runs with the owner's rights, so only the service key may call it
+REVOKE EXECUTE ON FUNCTION ensure_exchange_rate_partitions(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rollup_exchange_rate_ticks(DATE) FROM PUBLIC, anon, authenticated;
+
+-- 3. Partitions for every month/year that already has rows (so they don't pile up in the default partitions),
+--    plus the current and upcoming ones
+DO $$
+DECLARE
+    month_start DATE;
+    year_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT d::DATE FROM generate_series(
+            (SELECT date_trunc('month', MIN(timestamp) AT TIME ZONE 'UTC') FROM exchange_rates_unpartitioned),
+            date_trunc('month', NOW() AT TIME ZONE 'UTC'), INTERVAL '1 month') AS d
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF exchange_rates FOR VALUES FROM (%L) TO (%L)',
+            'exchange_rates_' || to_char(month_start, 'YYYYMM'),
+            month_start::TIMESTAMP AT TIME ZONE 'UTC',
+            (month_start + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+    FOR year_start IN
+        SELECT d::DATE FROM generate_series(
+            (SELECT date_trunc('year', MIN(date)) FROM daily_exchange_rates_unpartitioned),
+            date_trunc('year', NOW() AT TIME ZONE 'UTC'), INTERVAL '1 year') AS d
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF daily_exchange_rates FOR VALUES FROM (%L) TO (%L)',
+            'daily_exchange_rates_' || to_char(year_start, 'YYYY'),
+            year_start,
+            (year_start + INTERVAL '1 year')::DATE
+        );
+    END LOOP;
+END;
+$$;
+
+SELECT ensure_exchange_rate_partitions(2);
+
+-- 4. Copy the rows across (ticks without a timestamp cannot be placed; duplicate ticks of a pair keep the first)
+INSERT INTO exchange_rates (id, currency_from, currency_to, rate, timestamp)
+SELECT id, currency_from, currency_to, rate, timestamp
+FROM exchange_rates_unpartitioned
+WHERE timestamp IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO daily_exchange_rates (id, currency_from, currency_to, rate, previous_rate, change_amount, change_percentage, date, created_at)
+SELECT id, currency_from, currency_to, rate, previous_rate, change_amount, change_percentage, date, created_at
+FROM daily_exchange_rates_unpartitioned;
+
+DROP TABLE exchange_rates_unpartitioned;
+DROP TABLE daily_exchange_rates_unpartitioned;
+
+-- 5. Indexes
+CREATE INDEX IF NOT EXISTS idx_exchange_rates_timestamp ON exchange_rates(timestamp);
+CREATE INDEX IF NOT EXISTS idx_daily_exchange_rates_currency_pair ON daily_exchange_rates(currency_from, currency_to);
+CREATE INDEX IF NOT EXISTS idx_daily_exchange_rates_date ON daily_exchange_rates(date);
+CREATE INDEX IF NOT EXISTS idx_daily_exchange_rates_lookup ON daily_exchange_rates(currency_from, currency_to, date);
@@ -0,0 +1,10 @@
+-- Existing deployments: add the shard bucket columns used to split alert evaluation across instances
+-- (fresh installs get them from supabase_schema.sql)
+ALTER TABLE alert_settings
+    ADD COLUMN IF NOT EXISTS alert_bucket SMALLINT
+        GENERATED ALWAYS AS (((('x' || left(md5(id::text), 8))::bit(32)::int) & 1023)) STORED,
+    ADD COLUMN IF NOT EXISTS user_bucket SMALLINT
+        GENERATED ALWAYS AS (((('x' || left(md5(user_id::text), 8))::bit(32)::int) & 1023)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_alert_settings_alert_bucket ON alert_settings(alert_bucket) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS idx_alert_settings_user_bucket ON alert_settings(user_bucket) WHERE is_active = true;
@@ -0,0 +1,63 @@
+-- Existing deployments: create latest_exchange_rates (one row per currency pair, kept current by
+-- store_daily_exchange_rates) and fill it from the daily rows already stored, so the latest-rate
+-- endpoints keep answering right after the upgrade (fresh installs get the table from supabase_schema.sql).
+-- Run this before 20261020000003, which adds daily_exchange_rates.updated_at and replaces the function again.
+CREATE TABLE IF NOT EXISTS latest_exchange_rates (
+    currency_from VARCHAR(3) NOT NULL,
+    currency_to VARCHAR(3) NOT NULL,
+    id UUID NOT NULL,  -- daily_exchange_rates.id of the latest row
+    rate DECIMAL(15,6) NOT NULL,
+    previous_rate DECIMAL(15,6),
+    change_amount DECIMAL(15,6),
+    change_percentage DECIMAL(8,4),
+    date DATE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (currency_from, currency_to)
+);
+
+-- Upsert one day's rates and move latest_exchange_rates forward in the same statement (same transaction)
+CREATE OR REPLACE FUNCTION store_daily_exchange_rates(p_rates JSONB)
+RETURNS SETOF daily_exchange_rates AS $$
+    WITH upserted AS (
+        INSERT INTO daily_exchange_rates (currency_from, currency_to, rate, previous_rate, change_amount, change_percentage, date)
+        SELECT r.currency_from, r.currency_to, r.rate, r.previous_rate, r.change_amount, r.change_percentage, r.date
+        FROM jsonb_to_recordset(p_rates) AS r(currency_from VARCHAR(3), currency_to VARCHAR(3), rate DECIMAL(15,6),
+            previous_rate DECIMAL(15,6), change_amount DECIMAL(15,6), change_percentage DECIMAL(8,4), date DATE)
+        ON CONFLICT (currency_from, currency_to, date) DO UPDATE
+        SET rate = EXCLUDED.rate,
+            previous_rate = EXCLUDED.previous_rate,
+            change_amount = EXCLUDED.change_amount,
+            change_percentage = EXCLUDED.change_percentage
+        RETURNING *
+    ), latest AS (
+        INSERT INTO latest_exchange_rates (currency_from, currency_to, id, rate, previous_rate, change_amount, change_percentage, date, created_at)
+        SELECT currency_from, currency_to, id, rate, previous_rate, change_amount, change_percentage, date, created_at
+        FROM upserted
+        ON CONFLICT (currency_from, currency_to) DO UPDATE
+        SET id = EXCLUDED.id,
+            rate = EXCLUDED.rate,
+            previous_rate = EXCLUDED.previous_rate,
+            change_amount = EXCLUDED.change_amount,
+            change_percentage = EXCLUDED.change_percentage,
+            date = EXCLUDED.date,
+            created_at = EXCLUDED.created_at
+        WHERE latest_exchange_rates.date <= EXCLUDED.date  -- backfilling an older day never moves latest back
+    )
+    SELECT * FROM upserted;
+$$ LANGUAGE sql;
+
+-- Backfill the latest stored day of every pair (a day stored concurrently by the new function wins if newer)
+INSERT INTO latest_exchange_rates (currency_from, currency_to, id, rate, previous_rate, change_amount, change_percentage, date, created_at)
+SELECT DISTINCT ON (currency_from, currency_to)
+    currency_from, currency_to, id, rate, previous_rate, change_amount, change_percentage, date, created_at
+FROM daily_exchange_rates
+ORDER BY currency_from, currency_to, date DESC
+ON CONFLICT (currency_from, currency_to) DO UPDATE
+SET id = EXCLUDED.id,
+    rate = EXCLUDED.rate,
+    previous_rate = EXCLUDED.previous_rate,
+    change_amount = EXCLUDED.change_amount,
+    change_percentage = EXCLUDED.change_percentage,
+    date = EXCLUDED.date,
+    created_at = EXCLUDED.created_at
+WHERE latest_exchange_rates.date < EXCLUDED.date;
@@ -0,0 +1,39 @@
+-- Existing deployments: track when each daily rate row last changed, so the ETags of the
+-- DB-backed rate endpoints follow the stored data (fresh installs get this from supabase_schema.sql).
+-- store_daily_exchange_rates also writes latest_exchange_rates, so run this after the migration that creates it.
+ALTER TABLE daily_exchange_rates
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+CREATE INDEX IF NOT EXISTS idx_daily_exchange_rates_updated_at ON daily_exchange_rates(updated_at DESC);
+
+-- Upsert one day's rates and move latest_exchange_rates forward in the same statement (same transaction)
+CREATE OR REPLACE FUNCTION store_daily_exchange_rates(p_rates JSONB)
+RETURNS SETOF daily_exchange_rates AS $$
+    WITH upserted AS (
+        INSERT INTO daily_exchange_rates (currency_from, currency_to, rate, previous_rate, change_amount, change_percentage, date)
+        SELECT r.currency_from, r.currency_to, r.rate, r.previous_rate, r.change_amount, r.change_percentage, r.date
+        FROM jsonb_to_recordset(p_rates) AS r(currency_from VARCHAR(3), currency_to VARCHAR(3), rate DECIMAL(15,6),
+            previous_rate DECIMAL(15,6), change_amount DECIMAL(15,6), change_percentage DECIMAL(8,4), date DATE)
+        ON CONFLICT (currency_from, currency_to, date) DO UPDATE
+        SET rate = EXCLUDED.rate,
+            previous_rate = EXCLUDED.previous_rate,
+            change_amount = EXCLUDED.change_amount,
+            change_percentage = EXCLUDED.change_percentage,
+            updated_at = NOW()
+        RETURNING *
+    ), latest AS (
+        INSERT INTO latest_exchange_rates (currency_from, currency_to, id, rate, previous_rate, change_amount, change_percentage, date, created_at)
+        SELECT currency_from, currency_to, id, rate, previous_rate, change_amount, change_percentage, date, created_at
+        FROM upserted
+        ON CONFLICT (currency_from, currency_to) DO UPDATE
+        SET id = EXCLUDED.id,
+            rate = EXCLUDED.rate,
+            previous_rate = EXCLUDED.previous_rate,
+            change_amount = EXCLUDED.change_amount,
+            change_percentage = EXCLUDED.change_percentage,
+            date = EXCLUDED.date,
+            created_at = EXCLUDED.created_at
+        WHERE latest_exchange_rates.date <= EXCLUDED.date  -- backfilling an older day never moves latest back
+    )
+    SELECT * FROM upserted;
+$$ LANGUAGE sql;
@@ -0,0 +1,16 @@
+-- Existing deployments: buffered alert state changes no longer overwrite a later user edit
+-- (fresh installs get this from supabase_schema.sql)
+CREATE OR REPLACE FUNCTION apply_alert_states(p_states JSONB)
+RETURNS INTEGER AS $$
+    WITH updated AS (
+        UPDATE alert_settings a
+        SET armed = s.armed,
+            last_triggered_at = COALESCE(s.last_triggered_at, a.last_triggered_at)
+        FROM jsonb_to_recordset(p_states) AS s(id UUID, armed BOOLEAN, last_triggered_at TIMESTAMP WITH TIME ZONE,
+            decided_at TIMESTAMP WITH TIME ZONE)
+        WHERE a.id = s.id
+          AND (s.decided_at IS NULL OR a.updated_at IS NULL OR a.updated_at <= s.decided_at)
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM updated;
+$$ LANGUAGE sql;
@@ -0,0 +1,35 @@
+-- Existing deployments: share the upstream call budget across instances and restarts
+-- (fresh installs get this from supabase_schema.sql)
+-- Upstream API calls per UTC month and purpose, shared by all instances and restarts (UpstreamBudget)
+CREATE TABLE IF NOT EXISTS upstream_budget_usage (
+    month CHAR(7) NOT NULL,  -- YYYY-MM
+    purpose VARCHAR(20) NOT NULL,  -- scheduled / alert / on_demand
+    used INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, purpose)
+);
+
+-- Spend one call if the purposes in p_pool have used fewer than p_limit calls this month;
+-- returns {"allowed": ..., "used": {purpose: count}} with the month's usage after the attempt
+CREATE OR REPLACE FUNCTION spend_upstream_budget(p_month TEXT, p_purpose TEXT, p_pool TEXT[], p_limit INTEGER)
+RETURNS JSONB AS $$
+DECLARE
+    pool_used INTEGER;
+    allowed BOOLEAN;
+BEGIN
+    -- Serialize spenders of the same month so concurrent instances cannot overshoot the limit
+    PERFORM pg_advisory_xact_lock(hashtext('upstream_budget:' || p_month));
+    SELECT COALESCE(SUM(used), 0) INTO pool_used
+    FROM upstream_budget_usage WHERE month = p_month AND purpose = ANY(p_pool);
+    allowed := pool_used < p_limit;
+    IF allowed THEN
+        INSERT INTO upstream_budget_usage (month, purpose, used) VALUES (p_month, p_purpose, 1)
+        ON CONFLICT (month, purpose) DO UPDATE SET used = upstream_budget_usage.used + 1;
+    END IF;
+    RETURN jsonb_build_object(
+        'allowed', allowed,
+        'used', COALESCE((SELECT jsonb_object_agg(purpose, used) FROM upstream_budget_usage WHERE month = p_month), '{}'::jsonb)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE upstream_budget_usage ENABLE ROW LEVEL SECURITY;  -- service key only
@@ -19,22 +19,32 @@ CREATE TABLE alert_settings (
     target_rate DECIMAL(15,6) NOT NULL,
     condition VARCHAR(10) CHECK (condition IN ('above', 'below')) NOT NULL,
     is_active BOOLEAN DEFAULT true,
+    armed BOOLEAN NOT NULL DEFAULT true,  -- false = fired, waiting for the rate to move back past the re-arm band
+    last_triggered_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    -- Shard buckets (0..1023) for ALERT_SHARD_COUNT instances; must match alert_evaluator.shard_bucket
+    alert_bucket SMALLINT GENERATED ALWAYS AS (((('x' || left(md5(id::text), 8))::bit(32)::int) & 1023)) STORED,
+    user_bucket SMALLINT GENERATED ALWAYS AS (((('x' || left(md5(user_id::text), 8))::bit(32)::int) & 1023)) STORED
 );
 
--- Exchange rates history
+-- Intraday exchange rate ticks (one row per pair per upstream update, monthly partitions)
 CREATE TABLE exchange_rates (
-    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    id UUID DEFAULT gen_random_uuid(),
     currency_from VARCHAR(3) NOT NULL,
     currency_to VARCHAR(3) NOT NULL,
     rate DECIMAL(15,6) NOT NULL,
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),  -- upstream update time of the tick
+    PRIMARY KEY (id, timestamp),
+    UNIQUE (currency_from, currency_to, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Monthly partitions are created by ensure_exchange_rate_partitions; rows outside them land here
+CREATE TABLE exchange_rates_default PARTITION OF exchange_rates DEFAULT;
 
 -- Daily exchange rates table for consistent daily snapshots
 CREATE TABLE daily_exchange_rates (
-    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    id UUID DEFAULT gen_random_uuid(),
     currency_from VARCHAR(3) NOT NULL,
     currency_to VARCHAR(3) NOT NULL,
     rate DECIMAL(15,6) NOT NULL,
@@ -43,7 +53,42 @@ CREATE TABLE daily_exchange_rates (
     change_percentage DECIMAL(8,4),
     date DATE NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),  -- data version for conditional GETs
+    PRIMARY KEY (id, date),
     UNIQUE(currency_from, currency_to, date)
+) PARTITION BY RANGE (date);
+
+-- Yearly partitions are created by ensure_exchange_rate_partitions; rows outside them land here
+CREATE TABLE daily_exchange_rates_default PARTITION OF daily_exchange_rates DEFAULT;
+
+-- Daily open/high/low/close of intraday ticks rolled up by rollup_exchange_rate_ticks
+CREATE TABLE exchange_rate_ohlc_daily (
+    currency_from VARCHAR(3) NOT NULL,
+    currency_to VARCHAR(3) NOT NULL,
+    date DATE NOT NULL,  -- UTC day
+    open DECIMAL(15,6) NOT NULL,
+    high DECIMAL(15,6) NOT NULL,
+    low DECIMAL(15,6) NOT NULL,
+    close DECIMAL(15,6) NOT NULL,
+    open_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    close_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    tick_count INTEGER NOT NULL,
+    PRIMARY KEY (currency_from, currency_to, date)
+);
+
+-- Latest daily rate per currency pair (maintained by store_daily_exchange_rates;
+-- existing deployments create and backfill it with migrations/20261020000002_latest_exchange_rates.sql)
+CREATE TABLE latest_exchange_rates (
+    currency_from VARCHAR(3) NOT NULL,
+    currency_to VARCHAR(3) NOT NULL,
+    id UUID NOT NULL,  -- daily_exchange_rates.id of the latest row
+    rate DECIMAL(15,6) NOT NULL,
+    previous_rate DECIMAL(15,6),
+    change_amount DECIMAL(15,6),
+    change_percentage DECIMAL(8,4),
+    date DATE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (currency_from, currency_to)
 );
 
 -- Notification history
@@ -56,19 +101,211 @@ CREATE TABLE notification_history (
     sent_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Scheduler leader lease (only the holder runs alert checks and the daily job)
+CREATE TABLE scheduler_leases (
+    name VARCHAR(50) PRIMARY KEY,
+    holder VARCHAR(200) NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Acquire or renew a lease; succeeds if free, expired, or already held by p_holder
+CREATE OR REPLACE FUNCTION acquire_scheduler_lease(p_name TEXT, p_holder TEXT, p_lease_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+    acquired BOOLEAN;
+BEGIN
+    INSERT INTO scheduler_leases (name, holder, expires_at)
+    VALUES (p_name, p_holder, NOW() + make_interval(secs => p_lease_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+        WHERE scheduler_leases.holder = EXCLUDED.holder OR scheduler_leases.expires_at < NOW()
+    RETURNING true INTO acquired;
+    RETURN COALESCE(acquired, false);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION release_scheduler_lease(p_name TEXT, p_holder TEXT)
+RETURNS VOID AS $$
+    DELETE FROM scheduler_leases WHERE name = p_name AND holder = p_holder;
+$$ LANGUAGE sql;
+
+-- Upstream API calls per UTC month and purpose, shared by all instances and restarts (UpstreamBudget)
+CREATE TABLE upstream_budget_usage (
+    month CHAR(7) NOT NULL,  -- YYYY-MM
+    purpose VARCHAR(20) NOT NULL,  -- scheduled / alert / on_demand
+    used INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, purpose)
+);
+
+-- Spend one call if the purposes in p_pool have used fewer than p_limit calls this month;
+-- returns {"allowed": ..., "used": {purpose: count}} with the month's usage after the attempt
+CREATE OR REPLACE FUNCTION spend_upstream_budget(p_month TEXT, p_purpose TEXT, p_pool TEXT[], p_limit INTEGER)
+RETURNS JSONB AS $$
+DECLARE
+    pool_used INTEGER;
+    allowed BOOLEAN;
+BEGIN
+    -- Serialize spenders of the same month so concurrent instances cannot overshoot the limit
+    PERFORM pg_advisory_xact_lock(hashtext('upstream_budget:' || p_month));
+    SELECT COALESCE(SUM(used), 0) INTO pool_used
+    FROM upstream_budget_usage WHERE month = p_month AND purpose = ANY(p_pool);
+    allowed := pool_used < p_limit;
+    IF allowed THEN
+        INSERT INTO upstream_budget_usage (month, purpose, used) VALUES (p_month, p_purpose, 1)
+        ON CONFLICT (month, purpose) DO UPDATE SET used = upstream_budget_usage.used + 1;
+    END IF;
+    RETURN jsonb_build_object(
+        'allowed', allowed,
+        'used', COALESCE((SELECT jsonb_object_agg(purpose, used) FROM upstream_budget_usage WHERE month = p_month), '{}'::jsonb)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bulk alert state update: [{"id": ..., "armed": ..., "last_triggered_at": ..., "decided_at": ...}, ...]
+-- A state decided before the user's last edit (updated_at) is stale and skipped
+CREATE OR REPLACE FUNCTION apply_alert_states(p_states JSONB)
+RETURNS INTEGER AS $$
+    WITH updated AS (
+        UPDATE alert_settings a
+        SET armed = s.armed,
+            last_triggered_at = COALESCE(s.last_triggered_at, a.last_triggered_at)
+        FROM jsonb_to_recordset(p_states) AS s(id UUID, armed BOOLEAN, last_triggered_at TIMESTAMP WITH TIME ZONE,
+            decided_at TIMESTAMP WITH TIME ZONE)
+        WHERE a.id = s.id
+          AND (s.decided_at IS NULL OR a.updated_at IS NULL OR a.updated_at <= s.decided_at)
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM updated;
+$$ LANGUAGE sql;
+
+-- Upsert one day's rates and move latest_exchange_rates forward in the same statement (same transaction)
+CREATE OR REPLACE FUNCTION store_daily_exchange_rates(p_rates JSONB)
+RETURNS SETOF daily_exchange_rates AS $$
+    WITH upserted AS (
+        INSERT INTO daily_exchange_rates (currency_from, currency_to, rate, previous_rate, change_amount, change_percentage, date)
+        SELECT r.currency_from, r.currency_to, r.rate, r.previous_rate, r.change_amount, r.change_percentage, r.date
+        FROM jsonb_to_recordset(p_rates) AS r(currency_from VARCHAR(3), currency_to VARCHAR(3), rate DECIMAL(15,6),
+            previous_rate DECIMAL(15,6), change_amount DECIMAL(15,6), change_percentage DECIMAL(8,4), date DATE)
+        ON CONFLICT (currency_from, currency_to, date) DO UPDATE
+        SET rate = EXCLUDED.rate,
+            previous_rate = EXCLUDED.previous_rate,
+            change_amount = EXCLUDED.change_amount,
+            change_percentage = EXCLUDED.change_percentage,
+            updated_at = NOW()
+        RETURNING *
+    ), latest AS (
+        INSERT INTO latest_exchange_rates (currency_from, currency_to, id, rate, previous_rate, change_amount, change_percentage, date, created_at)
+        SELECT currency_from, currency_to, id, rate, previous_rate, change_amount, change_percentage, date, created_at
+        FROM upserted
+        ON CONFLICT (currency_from, currency_to) DO UPDATE
+        SET id = EXCLUDED.id,
+            rate = EXCLUDED.rate,
+            previous_rate = EXCLUDED.previous_rate,
+            change_amount = EXCLUDED.change_amount,
+            change_percentage = EXCLUDED.change_percentage,
+            date = EXCLUDED.date,
+            created_at = EXCLUDED.created_at
+        WHERE latest_exchange_rates.date <= EXCLUDED.date  -- backfilling an older day never moves latest back
+    )
+    SELECT * FROM upserted;
+$$ LANGUAGE sql;
+
+-- Create the current and upcoming partitions (monthly ticks, yearly daily rates); run daily by the rollup job
+CREATE OR REPLACE FUNCTION ensure_exchange_rate_partitions(p_months_ahead INTEGER DEFAULT 2)
+RETURNS VOID AS $$
+DECLARE
+    month_start DATE;
+    year_start DATE;
+BEGIN
+    FOR i IN 0..p_months_ahead LOOP
+        month_start := (date_trunc('month', NOW() AT TIME ZONE 'UTC') + make_interval(months => i))::DATE;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF exchange_rates FOR VALUES FROM (%L) TO (%L)',
+            'exchange_rates_' || to_char(month_start, 'YYYYMM'),
+            month_start::TIMESTAMP AT TIME ZONE 'UTC',
+            (month_start + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+    FOR i IN 0..1 LOOP
+        year_start := (date_trunc('year', NOW() AT TIME ZONE 'UTC') + make_interval(years => i))::DATE;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF daily_exchange_rates FOR VALUES FROM (%L) TO (%L)',
+            'daily_exchange_rates_' || to_char(year_start, 'YYYY'),
+            year_start,
+            (year_start + INTERVAL '1 year')::DATE
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Compact ticks before p_before (UTC day) into daily OHLC rows, then drop/delete them
+CREATE OR REPLACE FUNCTION rollup_exchange_rate_ticks(p_before DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff TIMESTAMP WITH TIME ZONE := p_before::TIMESTAMP AT TIME ZONE 'UTC';
+    rolled INTEGER;
+    partition_name TEXT;
+BEGIN
+    INSERT INTO exchange_rate_ohlc_daily AS o
+        (currency_from, currency_to, date, open, high, low, close, open_at, close_at, tick_count)
+    SELECT currency_from, currency_to, (timestamp AT TIME ZONE 'UTC')::DATE,
+           (array_agg(rate ORDER BY timestamp))[1], MAX(rate), MIN(rate),
+           (array_agg(rate ORDER BY timestamp DESC))[1], MIN(timestamp), MAX(timestamp), COUNT(*)
+    FROM exchange_rates
+    WHERE timestamp < cutoff
+    GROUP BY currency_from, currency_to, (timestamp AT TIME ZONE 'UTC')::DATE
+    ON CONFLICT (currency_from, currency_to, date) DO UPDATE  -- late ticks for an already rolled-up day
+    SET open = CASE WHEN EXCLUDED.open_at < o.open_at THEN EXCLUDED.open ELSE o.open END,
+        close = CASE WHEN EXCLUDED.close_at > o.close_at THEN EXCLUDED.close ELSE o.close END,
+        high = GREATEST(o.high, EXCLUDED.high),
+        low = LEAST(o.low, EXCLUDED.low),
+        open_at = LEAST(o.open_at, EXCLUDED.open_at),
+        close_at = GREATEST(o.close_at, EXCLUDED.close_at),
+        tick_count = o.tick_count + EXCLUDED.tick_count;
+    GET DIAGNOSTICS rolled = ROW_COUNT;
+
+    -- Whole months before the cutoff are dropped instead of deleted row by row
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'exchange_rates'::regclass
+          AND c.relname ~ '^exchange_rates_[0-9]{6}$'
+          AND to_date(right(c.relname, 6), 'YYYYMM') + INTERVAL '1 month' <= p_before
+    LOOP
+        EXECUTE format('DROP TABLE %I', partition_name);
+    END LOOP;
+    DELETE FROM exchange_rates WHERE timestamp < cutoff;
+
+    RETURN rolled;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Partition maintenance runs with the owner's rights, so only the service key may call it
+REVOKE EXECUTE ON FUNCTION ensure_exchange_rate_partitions(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rollup_exchange_rate_ticks(DATE) FROM PUBLIC, anon, authenticated;
+
+SELECT ensure_exchange_rate_partitions(2);
+
 -- Indexes for performance
 CREATE INDEX idx_alert_settings_user_id ON alert_settings(user_id);
 CREATE INDEX idx_alert_settings_active ON alert_settings(is_active) WHERE is_active = true;
-CREATE INDEX idx_exchange_rates_currency_pair ON exchange_rates(currency_from, currency_to);
+CREATE INDEX idx_alert_settings_alert_bucket ON alert_settings(alert_bucket) WHERE is_active = true;
+CREATE INDEX idx_alert_settings_user_bucket ON alert_settings(user_bucket) WHERE is_active = true;
+CREATE INDEX idx_alert_settings_armed_pair ON alert_settings(currency_from, currency_to, target_rate)
+    WHERE is_active = true AND armed = true;
 CREATE INDEX idx_exchange_rates_timestamp ON exchange_rates(timestamp);
 CREATE INDEX idx_daily_exchange_rates_currency_pair ON daily_exchange_rates(currency_from, currency_to);
 CREATE INDEX idx_daily_exchange_rates_date ON daily_exchange_rates(date);
 CREATE INDEX idx_daily_exchange_rates_lookup ON daily_exchange_rates(currency_from, currency_to, date);
+CREATE INDEX idx_daily_exchange_rates_updated_at ON daily_exchange_rates(updated_at DESC);
+CREATE INDEX idx_notification_history_user_sent ON notification_history(user_id, sent_at DESC, id DESC);
 
 -- RLS (Row Level Security) policies
 ALTER TABLE user_profiles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE alert_settings ENABLE ROW LEVEL SECURITY;
 ALTER TABLE notification_history ENABLE ROW LEVEL SECURITY;
+ALTER TABLE scheduler_leases ENABLE ROW LEVEL SECURITY;  -- service key only
+ALTER TABLE upstream_budget_usage ENABLE ROW LEVEL SECURITY;  -- service key only
 
 -- User profiles policies
 CREATE POLICY "Users can view own profile" ON user_profiles